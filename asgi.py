@@ -1,11 +1,63 @@
+import argparse
+import os
+import shutil
+
 import uvicorn
 
-from settings import settings
+from settings import get_settings
 from src.app import create_app
+from src.metrics import MULTIPROC_DIR_ENV
 
 
-app = create_app(settings)
+app = create_app(get_settings())
 
 
-if __name__ == "__main__":
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _prepare_metrics_dir(path: str) -> None:
+    # Workers are spawned after this point, so they import prometheus_client with this set
+    # and pick up multiprocess metrics mode. This process imported it already, so it must
+    # not serve requests itself once the variable is set.
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    os.environ[MULTIPROC_DIR_ENV] = path
+
+
+def run_dev() -> None:
     uvicorn.run("asgi:app", host="0.0.0.0", port=8000, log_level="info", reload=True)
+
+
+def run_prod() -> None:
+    settings = get_settings()
+    workers = settings.server_workers or _available_cores()
+    if workers > 1:
+        _prepare_metrics_dir(os.environ.get(MULTIPROC_DIR_ENV, settings.metrics_multiproc_dir))
+    uvicorn.run(
+        "asgi:app",
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.server_backlog,
+        timeout_keep_alive=settings.server_keep_alive,
+        timeout_graceful_shutdown=settings.server_graceful_shutdown,
+        limit_max_requests=settings.server_max_requests or None,
+        proxy_headers=True,
+        access_log=False,
+        log_level="info",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prod", action="store_true", help="run multi-worker production server")
+    if parser.parse_args().prod:
+        run_prod()
+    else:
+        run_dev()
@@ -0,0 +1,124 @@
+"""
+Login throughput and latency benchmark.
+
+Runs the app in-process against a throwaway SQLite database, so results depend only on the
+machine and the password settings, or against a running server with ``--base-url``. Logins
+cycle through a valid password, a wrong password and an unknown username; the last two
+should take the same time, or response times reveal which usernames exist.
+
+    python -m benchmarks.login --requests 300 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+from collections import Counter, defaultdict
+from pathlib import Path
+from time import perf_counter
+
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks import percentile
+from settings import Settings
+from src.app import create_app
+from src.enums import UserRole
+from src.models import User
+
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+CASES = {
+    "valid": {"username": USERNAME, "password": PASSWORD},
+    "wrong_password": {"username": USERNAME, "password": "not-the-password"},
+    "unknown_user": {"username": "nobody", "password": PASSWORD},
+}
+
+
+async def _run(client: AsyncClient, requests: int, concurrency: int) -> None:
+    cases = list(CASES)
+    latencies: dict[str, list[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(cases[i % len(cases)])
+
+    async def worker() -> None:
+        while not queue.empty():
+            case = queue.get_nowait()
+            start = perf_counter()
+            response = await client.get("/api/login", params=CASES[case])
+            latencies[case].append(perf_counter() - start)
+            statuses[(case, response.status_code)] += 1
+
+    await client.get("/api/login", params=CASES["valid"])  # warm up connections and caches
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+
+    print(f"{requests} logins, concurrency {concurrency}: {requests / elapsed:.1f} logins/s")
+    print(f"{'case':<16}{'n':>6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for case in cases:
+        samples = latencies[case]
+        print(
+            f"{case:<16}{len(samples):>6}{statistics.fmean(samples) * 1000:>10.1f}"
+            f"{percentile(samples, 0.5) * 1000:>10.1f}{percentile(samples, 0.95) * 1000:>10.1f}"
+            f"{percentile(samples, 0.99) * 1000:>10.1f}"
+        )
+    gap = statistics.fmean(latencies["unknown_user"]) - statistics.fmean(
+        latencies["wrong_password"]
+    )
+    print(f"unknown user - wrong password mean: {gap * 1000:+.1f} ms")
+    print("statuses:", dict(sorted(statuses.items())))
+
+
+async def _run_in_process(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = Settings(
+            db_backend="sqlite",
+            sqlite_url=f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}",
+            db_echo=False,
+            jwt_secret="benchmark-secret-at-least-32-bytes",
+            audit_archive_dir=str(Path(tmp) / "audit_archive"),
+            report_jobs_dir=str(Path(tmp) / "report_jobs"),
+            password_hash_workers=args.hash_workers,
+        )
+        app = create_app(settings)
+        async with app.router.lifespan_context(app):
+            async with app.state.db.sessions["root"]() as session:
+                session.add(
+                    User(
+                        username=USERNAME,
+                        password=await app.state.passwords.hash(PASSWORD),
+                        role=UserRole.manager,
+                        full_name="Benchmark User",
+                    )
+                )
+                await session.commit()
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://bench") as client:
+                await _run(client, args.requests, args.concurrency)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--hash-workers", type=int, default=0, help="password hash threads, 0 for the default"
+    )
+    parser.add_argument(
+        "--base-url",
+        help=f"benchmark a running server instead; it needs a {USERNAME!r} user "
+        f"with password {PASSWORD!r}",
+    )
+    args = parser.parse_args()
+    if args.base_url:
+        async with AsyncClient(base_url=args.base_url) as client:
+            await _run(client, args.requests, args.concurrency)
+    else:
+        await _run_in_process(args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,178 @@
+"""
+Search latency benchmark.
+
+Seeds ``--rows`` computers and software and a tenth as many vendors, then times
+``GET /api/search`` in-process with a mix of hits and misses. By default it runs against a
+throwaway SQLite database, which has no trigram indexes and scans every row; ``--from-env``
+uses the database configured in the environment instead, which is the PostgreSQL setup the
+p95 target applies to. Seeded rows are left in that database.
+
+    python -m benchmarks.search --rows 1000000 --requests 500
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+from datetime import UTC, datetime
+from pathlib import Path
+from time import perf_counter
+from uuid import uuid4
+
+import jwt
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+
+from benchmarks import percentile
+from settings import Settings, get_settings
+from src.app import create_app
+from src.enums import ComputerType, UserRole
+from src.models import Computer, Software, SoftwareType, User, Vendor
+
+
+WORDS = ("office", "studio", "server", "adobe", "visual", "cloud", "micro", "data", "net", "pro")
+MISSES = ("zzqx", "qwxz", "xjqv")
+BATCH = 10_000
+
+
+def _software_name(i: int) -> str:
+    return f"{WORDS[i % len(WORDS)].title()} {WORDS[i // len(WORDS) % len(WORDS)]} {i}"
+
+
+async def _seed(app, rows: int, run: str) -> int:
+    purchased = datetime(2024, 1, 1, tzinfo=UTC)
+    async with app.state.db.sessions["root"]() as session:
+        user = User(
+            username=f"bench-{run}",
+            password=await app.state.passwords.hash(uuid4().hex),
+            role=UserRole.manager,
+            full_name="Benchmark User",
+        )
+        sw_type = SoftwareType(name=f"bench-{run}")
+        session.add_all([user, sw_type])
+        await session.flush()
+        for start in range(0, rows, BATCH):
+            chunk = range(start, min(start + BATCH, rows))
+            await session.execute(
+                insert(Computer),
+                [
+                    {
+                        "inventory_number": f"{run}-INV-{i:07d}",
+                        "computer_type": ComputerType.workstation,
+                        "purchase_date": purchased,
+                        "status": "active",
+                    }
+                    for i in chunk
+                ],
+            )
+            await session.execute(
+                insert(Software),
+                [
+                    {
+                        "sw_type_id": sw_type.sw_type_id,
+                        "code": f"{run}-SW{i}",
+                        "name": _software_name(i),
+                        "manufacturer": WORDS[i % 7].title() + " Inc",
+                    }
+                    for i in chunk
+                ],
+            )
+            vendors = [i for i in chunk if i % 10 == 0]
+            if vendors:
+                await session.execute(
+                    insert(Vendor),
+                    [
+                        {
+                            "name": f"{WORDS[i % 3].title()} Supplies {i}",
+                            "address": "1 Main St",
+                            "phone": f"{run}-{i}",
+                        }
+                        for i in vendors
+                    ],
+                )
+        await session.commit()
+        return user.user_id
+
+
+def _queries(rows: int, run: str, count: int) -> list[str]:
+    rng = random.Random(0)
+    queries = []
+    for n in range(count):
+        i = rng.randrange(max(rows, 1))
+        match n % 4:
+            case 0:
+                queries.append(f"INV-{i:07d}"[:-2])  # prefix of a hundred computers
+            case 1:
+                queries.append(_software_name(i).split()[0].lower())
+            case 2:
+                queries.append(f"{run}-SW{i}")
+            case _:
+                queries.append(MISSES[n % len(MISSES)])
+    return queries
+
+
+async def _run(client: AsyncClient, headers: dict, queries: list[str], limit: int) -> None:
+    for query in queries[:10]:  # warm up connections and caches
+        await client.get("/api/search", headers=headers, params={"q": query, "limit": limit})
+    latencies = []
+    for query in queries:
+        start = perf_counter()
+        response = await client.get(
+            "/api/search", headers=headers, params={"q": query, "limit": limit}
+        )
+        latencies.append(perf_counter() - start)
+        response.raise_for_status()
+    print(f"{len(latencies)} searches, limit {limit}")
+    print(
+        f"mean {statistics.fmean(latencies) * 1000:.1f} ms, "
+        f"p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+        f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+        f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms"
+    )
+
+
+async def _benchmark(settings: Settings, args: argparse.Namespace) -> None:
+    app = create_app(settings)
+    run = uuid4().hex[:8]
+    async with app.router.lifespan_context(app):
+        start = perf_counter()
+        user_id = await _seed(app, args.rows, run)
+        print(f"seeded {args.rows} rows per table in {perf_counter() - start:.1f} s")
+        token = jwt.encode(
+            {"user_id": user_id, "role": UserRole.manager.value, "type": "access"},
+            settings.jwt_secret,
+            algorithm=settings.jwt_algorithm,
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            await _run(client, headers, _queries(args.rows, run, args.requests), args.limit)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument(
+        "--from-env", action="store_true", help="use the configured database, not SQLite"
+    )
+    args = parser.parse_args()
+    if args.from_env:
+        await _benchmark(get_settings(), args)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = Settings(
+            db_backend="sqlite",
+            sqlite_url=f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}",
+            db_echo=False,
+            jwt_secret="benchmark-secret-at-least-32-bytes",
+            audit_archive_dir=str(Path(tmp) / "audit_archive"),
+            report_jobs_dir=str(Path(tmp) / "report_jobs"),
+        )
+        await _benchmark(settings, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
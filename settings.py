@@ -1,3 +1,7 @@
+from functools import cache
+from typing import Literal
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -5,19 +9,95 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
     app_title: str = "SW Management API"
 
-    sql_root_url: str
-    sql_admin_url: str
-    sql_manager_url: str
-    sql_supervisor_url: str
+    # "sqlite" runs every role on one aiosqlite engine for local and test runs, see
+    # src/database.py; the role URLs and replicas apply to "postgresql" only.
+    db_backend: Literal["postgresql", "sqlite"] = "postgresql"
+    sqlite_url: str = "sqlite+aiosqlite:///:memory:"
+    sql_root_url: str | None = None
+    sql_admin_url: str | None = None
+    sql_manager_url: str | None = None
+    sql_supervisor_url: str | None = None
+    sql_admin_replica_url: str | None = None
+    sql_manager_replica_url: str | None = None
+    sql_supervisor_replica_url: str | None = None
+    replica_pin_seconds: float = 5
+    replica_max_lag_seconds: float = 10
+    replica_check_interval: float = 5
     db_echo: bool = True
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_warmup: int = 2
+    db_prepared_statement_cache_size: int = 500
+
+    slow_query_threshold_ms: float = 200
+    slow_query_redact_params: bool = True
+    slow_query_explain: bool = False
+    slow_query_max_entries: int = 500
 
     allowed_origins: list = ["*"]
     allowed_credentials: bool = True
     allowed_methods: list = ["*"]
     allowed_headers: list = ["*"]
 
+    admission_global_limit: int = 0
+    admission_user_limit: int = 8
+    admission_heavy_share: float = 0.5
+    admission_heavy_prefixes: list = ["/api/reports/", "/api/installations"]
+    admission_retry_after: int = 1
+
+    batch_max_operations: int = 10
+    inventory_max_items: int = 1000
+
+    audit_retention_days: int = 180
+    audit_archive_dir: str = "audit_archive"
+    audit_archive_batch_size: int = 5000
+    audit_archive_interval: float = 3600
+
+    report_jobs_dir: str = "report_jobs"
+    report_job_workers: int = 2
+    report_job_ttl_seconds: int = 3600
+    report_job_timeout_seconds: int = 1800
+
+    compliance_max_days: int = 366
+
+    idempotency_ttl_seconds: int = 24 * 3600
+    idempotency_lock_seconds: int = 60
+    idempotency_poll_seconds: float = 0.1
+    idempotency_cache_size: int = 10_000
+
+    password_hash_workers: int = 0
+    password_hash_queue: int = 64
+    password_scrypt_n: int = 2**14
+    password_scrypt_r: int = 8
+    password_scrypt_p: int = 1
+
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 0
+    server_backlog: int = 2048
+    server_keep_alive: int = 75
+    server_graceful_shutdown: int = 30
+    server_max_requests: int = 50_000
+    metrics_multiproc_dir: str = "/tmp/sw-management-metrics"
+
     jwt_secret: str
     jwt_algorithm: str = "HS256"
+    jwt_access_ttl_seconds: int = 3600
+    jwt_refresh_ttl_seconds: int = 7 * 24 * 3600
+    revocation_filter_capacity: int = 100_000
+    revocation_filter_error_rate: float = 0.01
+    revocation_reload_interval: float = 30
+
+    @model_validator(mode="after")
+    def _require_role_urls(self) -> "Settings":
+        if self.db_backend == "postgresql":
+            roles = ("root", "admin", "manager", "supervisor")
+            missing = [f"sql_{role}_url" for role in roles if not getattr(self, f"sql_{role}_url")]
+            if missing:
+                raise ValueError(f"{', '.join(missing)} required for the postgresql backend")
+        return self
 
 
-settings = Settings()
+@cache
+def get_settings() -> Settings:
+    return Settings()
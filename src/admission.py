@@ -0,0 +1,58 @@
+from collections import Counter
+
+from settings import Settings
+from src.exceptions import ServiceUnavailable
+from src.metrics import ADMISSION_REJECTED
+
+
+class AdmissionController:
+    """
+    Non-blocking in-flight limits checked before a request takes a pooled connection.
+
+    The event loop is single threaded, so plain counters are enough; requests over a
+    limit are rejected immediately instead of queueing on pool checkout.
+    """
+
+    def __init__(self, settings: Settings, role_capacity: dict[str, int]) -> None:
+        self._retry_after = settings.admission_retry_after
+        self._heavy_prefixes = tuple(settings.admission_heavy_prefixes)
+        self._role_limits = role_capacity
+        self._global_limit = settings.admission_global_limit or sum(role_capacity.values())
+        self._heavy_limit = max(1, int(self._global_limit * settings.admission_heavy_share))
+        self._user_limit = settings.admission_user_limit
+        self._in_flight = 0
+        self._heavy = 0
+        self._by_role: Counter[str] = Counter()
+        self._by_user: Counter[int] = Counter()
+
+    def is_heavy(self, path: str) -> bool:
+        return path.startswith(self._heavy_prefixes)
+
+    def acquire(self, role: str, user_id: int, heavy: bool) -> None:
+        if self._in_flight >= self._global_limit:
+            self._reject("global")
+        if self._by_role[role] >= self._role_limits.get(role, 0):
+            self._reject("role")
+        if self._by_user[user_id] >= self._user_limit:
+            self._reject("user")
+        if heavy and self._heavy >= self._heavy_limit:
+            self._reject("heavy")
+
+        self._in_flight += 1
+        self._by_role[role] += 1
+        self._by_user[user_id] += 1
+        if heavy:
+            self._heavy += 1
+
+    def release(self, role: str, user_id: int, heavy: bool) -> None:
+        self._in_flight -= 1
+        self._by_role[role] -= 1
+        self._by_user[user_id] -= 1
+        if not self._by_user[user_id]:
+            del self._by_user[user_id]
+        if heavy:
+            self._heavy -= 1
+
+    def _reject(self, reason: str) -> None:
+        ADMISSION_REJECTED.labels(reason).inc()
+        raise ServiceUnavailable("Server is busy, retry later", retry_after=self._retry_after)
@@ -1,16 +1,35 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, status
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
 
 from settings import Settings
+from src.admission import AdmissionController
+from src.audit_archive import AuditArchive
+from src.database import Database
 from src.exceptions import (
+    ServiceBadRequest,
     ServiceConflict,
     ServiceException,
     ServiceForbidden,
     ServiceNotFound,
     ServiceUnauthorized,
+    ServiceUnavailable,
 )
-from src.views import admin, login, manager, supervisor
+from src.idempotency import IdempotencyStore
+from src.metrics import MetricsMiddleware, mark_worker_dead
+from src.passwords import PasswordHasher
+from src.primary_pins import PrimaryPinMiddleware
+from src.report_jobs import ReportJobs
+from src.repositories.audit_logs import AuditLogRepo
+from src.repositories.idempotency_keys import IdempotencyKeyRepo
+from src.repositories.revoked_tokens import RevokedTokenRepo
+from src.revocations import RevocationList
+from src.single_flight import SingleFlight
+from src.views import admin, batch, login, manager, metrics, supervisor
 
 
 def _add_middlewares(app: FastAPI, settings: Settings) -> None:
@@ -21,6 +40,8 @@ def _add_middlewares(app: FastAPI, settings: Settings) -> None:
         allow_methods=settings.allowed_methods,
         allow_headers=settings.allowed_headers,
     )
+    app.add_middleware(PrimaryPinMiddleware, pin_seconds=settings.replica_pin_seconds)
+    app.add_middleware(MetricsMiddleware)
 
 
 def _include_routers(app: FastAPI) -> None:
@@ -28,6 +49,8 @@ def _include_routers(app: FastAPI) -> None:
     app.include_router(admin.router)
     app.include_router(manager.router)
     app.include_router(supervisor.router)
+    app.include_router(batch.router)
+    app.include_router(metrics.router)
 
 
 def _custom_exception_handler(_: Request, exception: ServiceException) -> JSONResponse:
@@ -40,6 +63,14 @@ def _custom_exception_handler(_: Request, exception: ServiceException) -> JSONRe
         status_code = status.HTTP_403_FORBIDDEN
     if isinstance(exception, ServiceUnauthorized):
         status_code = status.HTTP_401_UNAUTHORIZED
+    if isinstance(exception, ServiceBadRequest):
+        status_code = status.HTTP_400_BAD_REQUEST
+    if isinstance(exception, ServiceUnavailable):
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"message": str(exception)},
+            headers={"Retry-After": str(exception.retry_after)},
+        )
     return JSONResponse(status_code=status_code, content={"message": str(exception)})
 
 
@@ -47,8 +78,56 @@ def _add_exception_handler(app: FastAPI) -> None:
     app.add_exception_handler(ServiceException, _custom_exception_handler)
 
 
+RBAC_ROLES = ("admin", "manager", "supervisor")
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    db = Database(app.state.settings)
+    db.connect()
+    await db.create_schema()
+    await db.warm_up()
+    app.state.db = db
+    app.state.admission = AdmissionController(
+        app.state.settings, {role: db.capacity(role) for role in RBAC_ROLES}
+    )
+    app.state.flights = SingleFlight()
+    app.state.passwords = PasswordHasher(app.state.settings)
+    app.state.revocations = RevocationList(app.state.settings, RevokedTokenRepo())
+    await app.state.revocations.reload(db.sessions["root"])
+    app.state.idempotency = IdempotencyStore(
+        app.state.settings, IdempotencyKeyRepo(), db.sessions["root"]
+    )
+    app.state.audit_archive = AuditArchive(app.state.settings, AuditLogRepo())
+    app.state.report_jobs = ReportJobs(app.state.settings)
+    replica_monitor = asyncio.create_task(db.monitor_replicas())
+    revocation_monitor = asyncio.create_task(app.state.revocations.monitor(db.sessions["root"]))
+    idempotency_monitor = asyncio.create_task(app.state.idempotency.monitor())
+    audit_archive_monitor = asyncio.create_task(
+        app.state.audit_archive.monitor(db.sessions["root"])
+    )
+    report_jobs_monitor = asyncio.create_task(app.state.report_jobs.monitor())
+    try:
+        yield
+    finally:
+        replica_monitor.cancel()
+        revocation_monitor.cancel()
+        idempotency_monitor.cancel()
+        audit_archive_monitor.cancel()
+        report_jobs_monitor.cancel()
+        await app.state.report_jobs.shutdown()
+        app.state.passwords.shutdown()
+        await db.dispose()
+        mark_worker_dead()
+
+
 def create_app(settings: Settings) -> FastAPI:
-    app = FastAPI(title=settings.app_title, swagger_ui_parameters={"operationsSorter": "method"})
+    app = FastAPI(
+        title=settings.app_title,
+        swagger_ui_parameters={"operationsSorter": "method"},
+        lifespan=_lifespan,
+    )
+    app.state.settings = settings
     _add_middlewares(app, settings)
     _include_routers(app)
     _add_exception_handler(app)
@@ -0,0 +1,188 @@
+import asyncio
+import fcntl
+import gzip
+import json
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from settings import Settings
+from src.logger import get_logger
+from src.metrics import AUDIT_ARCHIVED
+from src.models import AuditLog
+from src.repositories.audit_logs import AuditLogRepo
+
+
+logger = get_logger()
+
+SEGMENT_PREFIX = "audit-"
+SEGMENT_SUFFIX = ".ndjson.gz"
+LOCK_FILE = ".archive.lock"
+
+
+@dataclass(frozen=True)
+class AuditRecord:
+    log_id: int
+    user_id: int
+    username: str | None
+    action: str
+    action_time: datetime
+
+    @classmethod
+    def from_model(cls, model: AuditLog) -> "AuditRecord":
+        return cls(
+            log_id=model.log_id,
+            user_id=model.user_id,
+            username=model.user.username if model.user else None,
+            action=model.action,
+            action_time=model.action_time,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "log_id": self.log_id,
+                "user_id": self.user_id,
+                "username": self.username,
+                "action": self.action,
+                "action_time": self.action_time.isoformat(),
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, line: str) -> "AuditRecord":
+        data = json.loads(line)
+        return cls(
+            log_id=data["log_id"],
+            user_id=data["user_id"],
+            username=data["username"],
+            action=data["action"],
+            action_time=datetime.fromisoformat(data["action_time"]),
+        )
+
+
+def _month(moment: datetime) -> str:
+    return moment.astimezone(UTC).strftime("%Y-%m")
+
+
+class AuditArchive:
+    """
+    Moves audit rows older than ``audit_retention_days`` into gzip-compressed NDJSON
+    segments, one per month, and reads them back for historical queries.
+
+    Segments are append-only: every batch is written as a new gzip member, fsynced, and
+    only then deleted from the table in its own short transaction. A crash in between
+    archives the batch twice, so readers skip duplicate ``log_id``s. An exclusive ``flock``
+    keeps the workers of one host from archiving at the same time.
+    """
+
+    def __init__(self, settings: Settings, audit_logs: AuditLogRepo) -> None:
+        self._retention = timedelta(days=settings.audit_retention_days)
+        self._enabled = settings.audit_retention_days > 0
+        self._directory = Path(settings.audit_archive_dir)
+        self._batch_size = settings.audit_archive_batch_size
+        self._interval = settings.audit_archive_interval
+        self._audit_logs = audit_logs
+
+    @property
+    def cutoff(self) -> datetime:
+        return datetime.now(UTC) - self._retention
+
+    def covers(self, start: datetime | None) -> bool:
+        return self._enabled and (start is None or start < self.cutoff)
+
+    async def archive(self, sessionmaker: async_sessionmaker[AsyncSession]) -> int:
+        if not self._enabled:
+            return 0
+        self._directory.mkdir(parents=True, exist_ok=True)
+        with open(self._directory / LOCK_FILE, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0  # another worker is archiving
+
+            cutoff = self.cutoff
+            archived = 0
+            while True:
+                async with sessionmaker() as session:
+                    models = await self._audit_logs.get_expired(session, cutoff, self._batch_size)
+                    if not models:
+                        break
+                    records = [AuditRecord.from_model(model) for model in models]
+                    await asyncio.to_thread(self._append, records)
+                    await self._audit_logs.delete_by_ids(session, [r.log_id for r in records])
+                    await session.commit()
+                archived += len(records)
+                AUDIT_ARCHIVED.inc(len(records))
+                if len(records) < self._batch_size:
+                    break
+        if archived:
+            logger.info(f"Archived {archived} audit log entries older than {cutoff.isoformat()}")
+        return archived
+
+    async def monitor(self, sessionmaker: async_sessionmaker[AsyncSession]) -> None:
+        while self._enabled:
+            try:
+                await self.archive(sessionmaker)
+            except (SQLAlchemyError, OSError) as err:
+                logger.warning(f"Audit log archival failed: {err}")
+            await asyncio.sleep(self._interval)
+
+    async def scan(
+        self, start: datetime | None, end: datetime | None, limit: int, skip: set[int]
+    ) -> list[AuditRecord]:
+        return await asyncio.to_thread(self._scan, start, end, limit, skip)
+
+    def _append(self, records: list[AuditRecord]) -> None:
+        by_month = defaultdict(list)
+        for record in records:
+            by_month[_month(record.action_time)].append(record.to_json())
+        for month, lines in by_month.items():
+            path = self._directory / f"{SEGMENT_PREFIX}{month}{SEGMENT_SUFFIX}"
+            with open(path, "ab") as segment:
+                segment.write(gzip.compress(("\n".join(lines) + "\n").encode("utf-8")))
+                segment.flush()
+                os.fsync(segment.fileno())
+
+    def _segments(self, start: datetime | None, end: datetime | None) -> list[Path]:
+        if not self._directory.is_dir():
+            return []
+        first = _month(start) if start else ""
+        last = _month(end) if end else "9999-99"
+        segments = []
+        for path in self._directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"):
+            month = path.name.removeprefix(SEGMENT_PREFIX).removesuffix(SEGMENT_SUFFIX)
+            if first <= month <= last:
+                segments.append((month, path))
+        return [path for _, path in sorted(segments, reverse=True)]
+
+    def _scan(
+        self, start: datetime | None, end: datetime | None, limit: int, skip: set[int]
+    ) -> list[AuditRecord]:
+        records = []
+        seen = set(skip)
+        # Newest month first; months are disjoint, so once a month fills the limit every
+        # older segment can be skipped.
+        for path in self._segments(start, end):
+            with gzip.open(path, "rt", encoding="utf-8") as segment:
+                for line in segment:
+                    record = AuditRecord.from_json(line)
+                    if record.log_id in seen:
+                        continue
+                    if start and record.action_time < start:
+                        continue
+                    if end and record.action_time >= end:
+                        continue
+                    seen.add(record.log_id)
+                    records.append(record)
+            if len(records) >= limit:
+                break
+        records.sort(key=lambda record: record.action_time, reverse=True)
+        return records[:limit]
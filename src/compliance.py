@@ -0,0 +1,109 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import Row
+
+from src.exceptions import ServiceUnavailable
+
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+DAY_SECONDS = 86_400.0
+
+
+def _column(values: list | None, dtype: str) -> "np.ndarray":
+    return np.asarray(values if values is not None else (), dtype=dtype)
+
+
+def _timestamp(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, UTC)
+
+
+def license_compliance(installations: Row, licenses: Row, start: datetime, days: int) -> dict:
+    """
+    Compares installed seats with active licenses per software at ``start`` and each of the
+    following ``days - 1`` days, and finds installations made after their license ended.
+
+    Both inputs are rows of whole columns (``get_columns``); every step is a vectorized
+    array operation, so the cost is a few passes over the installation arrays.
+    """
+    if np is None:
+        raise ServiceUnavailable("License compliance analysis requires numpy")
+
+    license_ids = _column(licenses.license_id, "int64")
+    license_start = _column(licenses.start_date, "float64")
+    license_end = _column(licenses.end_date, "float64")
+    software_ids, license_software = np.unique(
+        _column(licenses.software_id, "int64"), return_inverse=True
+    )
+
+    installation_ids = _column(installations.installation_id, "int64")
+    install_time = _column(installations.install_date, "float64")
+
+    # Row of each installation's license, found by binary search over the sorted ids.
+    order = np.argsort(license_ids, kind="stable")
+    position = np.searchsorted(license_ids[order], _column(installations.license_id, "int64"))
+    installed_license = order[np.minimum(position, len(order) - 1)] if len(order) else position
+    installed_software = license_software[installed_license]
+
+    # Day k is evaluated at start + k days. An installation counts from the first day at
+    # or after it, a license on the days between its start and end; index ``days``
+    # collects whatever only starts after the window.
+    origin = (start if start.tzinfo else start.replace(tzinfo=UTC)).timestamp()
+    width = days + 1
+    cells = len(software_ids) * width
+    install_day = np.clip(np.ceil((install_time - origin) / DAY_SECONDS), 0, days).astype("int64")
+    first_day = np.clip(np.ceil((license_start - origin) / DAY_SECONDS), 0, days).astype("int64")
+    after_day = np.clip(np.floor((license_end - origin) / DAY_SECONDS) + 1, 0, days)
+    after_day = after_day.astype("int64")
+    active = after_day > first_day
+
+    installed = np.bincount(installed_software * width + install_day, minlength=cells)
+    licensed = np.bincount(
+        license_software[active] * width + first_day[active], minlength=cells
+    ) - np.bincount(license_software[active] * width + after_day[active], minlength=cells)
+    installed = installed.reshape(-1, width).cumsum(axis=1)[:, :days]
+    licensed = licensed.reshape(-1, width).cumsum(axis=1)[:, :days]
+
+    excess = installed - licensed
+    day_index, software_index = np.nonzero(excess.T > 0)
+    shortfalls = [
+        {
+            "date": _timestamp(origin + day * DAY_SECONDS),
+            "software_id": software_id,
+            "installed": seats,
+            "licensed": covered,
+        }
+        for day, software_id, seats, covered in zip(
+            day_index.tolist(),
+            software_ids[software_index].tolist(),
+            installed[software_index, day_index].tolist(),
+            licensed[software_index, day_index].tolist(),
+            strict=True,
+        )
+    ]
+
+    expired = np.flatnonzero(install_time > license_end[installed_license])
+    expired_license = installed_license[expired]
+    expired_installations = [
+        {
+            "installation_id": installation_id,
+            "license_id": license_id,
+            "software_id": software_id,
+            "install_date": _timestamp(installed_at),
+            "license_end_date": _timestamp(ended_at),
+        }
+        for installation_id, license_id, software_id, installed_at, ended_at in zip(
+            installation_ids[expired].tolist(),
+            license_ids[expired_license].tolist(),
+            software_ids[license_software[expired_license]].tolist(),
+            install_time[expired].tolist(),
+            license_end[expired_license].tolist(),
+            strict=True,
+        )
+    ]
+
+    return {"shortfalls": shortfalls, "expired_installations": expired_installations}
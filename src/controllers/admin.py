@@ -1,14 +1,18 @@
-from hashlib import sha256
+from datetime import UTC, datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from settings import Settings
+from src.audit_archive import AuditArchive, AuditRecord
+from src.controllers.common import as_utc
 from src.enums import UserRole
-from src.exceptions import ServiceConflict, ServiceNotFound
+from src.exceptions import ServiceConflict, ServiceForbidden, ServiceNotFound
 from src.models import AuditLog, Department, SoftwareType, User
+from src.passwords import PasswordHasher
 from src.repositories.audit_logs import AuditLogRepo
 from src.repositories.software_types import SoftwareTypeRepo
 from src.repositories.users import UserRepo
+from src.slow_queries import SlowQuery, SlowQueryLog
 
 
 class AdminController:
@@ -18,11 +22,17 @@ class AdminController:
         users: UserRepo,
         sw_types: SoftwareTypeRepo,
         audit_logs: AuditLogRepo,
+        slow_queries: SlowQueryLog,
+        passwords: PasswordHasher,
+        audit_archive: AuditArchive,
     ) -> None:
         self._settings = settings
         self._users = users
         self._sw_types = sw_types
         self._audit_logs = audit_logs
+        self._slow_queries = slow_queries
+        self._passwords = passwords
+        self._audit_archive = audit_archive
 
     async def get_all_users(self, session: AsyncSession, token: dict) -> list[User]:
         try:
@@ -55,7 +65,7 @@ class AdminController:
         role: UserRole,
         full_name: str,
     ) -> User:
-        hashed_pass = sha256(password.encode()).hexdigest()
+        hashed_pass = await self._passwords.hash(password)
         model = User(username=username, password=hashed_pass, role=role, full_name=full_name)
         try:
             model = await self._users.create(session, model)
@@ -124,9 +134,38 @@ class AdminController:
         await session.commit()
         return model
 
-    async def get_audit_logs(self, session: AsyncSession, limit: int) -> list[AuditLog]:
+    async def get_audit_logs(
+        self,
+        session: AsyncSession,
+        limit: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[AuditRecord]:
+        start, end = as_utc(start), as_utc(end)
         try:
-            models = await self._audit_logs.get_many(session, limit)
+            if start is None and end is None:
+                models = await self._audit_logs.get_many(session, limit)
+            else:
+                models = await self._audit_logs.get_range(
+                    session,
+                    start or datetime.min.replace(tzinfo=UTC),
+                    end or datetime.now(UTC),
+                    limit,
+                )
         except ValueError as err:
             raise ServiceConflict(err) from err
-        return models
+        records = [AuditRecord.from_model(model) for model in models]
+
+        # Archived rows are older than everything still in the table, so the archive is
+        # only read when the table could not fill the page.
+        if len(records) < limit and self._audit_archive.covers(start):
+            archived = await self._audit_archive.scan(
+                start, end, limit - len(records), {record.log_id for record in records}
+            )
+            records.extend(archived)
+        return records
+
+    def get_slow_queries(self, token: dict, limit: int) -> list[SlowQuery]:
+        if token["role"] != UserRole.admin.value:
+            raise ServiceForbidden("Insufficient permissions")
+        return self._slow_queries.top(limit)
@@ -0,0 +1,147 @@
+from dataclasses import dataclass, field
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from settings import Settings
+from src.controllers.common import parse_list_query, parse_projection
+from src.exceptions import ServiceBadRequest, ServiceConflict
+from src.fieldsets import FIELDS_PARAM
+from src.filters import parse_datetime
+from src.loaders import INCLUDE_PARAM
+from src.models import AuditLog
+from src.repositories.audit_logs import AuditLogRepo
+from src.repositories.computers import ComputerRepo
+from src.repositories.departments import DepartmentRepo
+from src.repositories.installations import InstallationRepo
+from src.repositories.licenses import LicenseRepo
+from src.repositories.software import SoftwareRepo
+from src.repositories.software_types import SoftwareTypeRepo
+from src.repositories.vendor import VendorRepo
+
+
+@dataclass
+class BatchOperation:
+    op: str
+    id: str | None = None
+    params: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def result_id(self) -> str:
+        return self.id or self.op
+
+
+class BatchController:
+    def __init__(
+        self,
+        settings: Settings,
+        computers: ComputerRepo,
+        departments: DepartmentRepo,
+        software: SoftwareRepo,
+        software_types: SoftwareTypeRepo,
+        vendors: VendorRepo,
+        licenses: LicenseRepo,
+        installations: InstallationRepo,
+        audit_logs: AuditLogRepo,
+    ) -> None:
+        self._settings = settings
+        self._computers = computers
+        self._departments = departments
+        self._software = software
+        self._software_types = software_types
+        self._vendors = vendors
+        self._licenses = licenses
+        self._installations = installations
+        self._audit_logs = audit_logs
+        self._loaders = {
+            "computers": self._load_computers,
+            "software": self._load_software,
+            "softwareTypes": self._load_software_types,
+            "vendors": self._load_vendors,
+            "licenses": self._load_licenses,
+            "installations": self._load_installations,
+            "departments": self._load_departments,
+            "expiringLicenses": self._load_expiring_licenses,
+        }
+
+    async def run(
+        self, session: AsyncSession, token: dict, operations: list[BatchOperation]
+    ) -> dict[str, list]:
+        if not operations:
+            raise ServiceBadRequest("Batch is empty")
+        if len(operations) > self._settings.batch_max_operations:
+            raise ServiceBadRequest(
+                f"Batch exceeds {self._settings.batch_max_operations} operations"
+            )
+        result_ids = [operation.result_id for operation in operations]
+        if len(set(result_ids)) != len(result_ids):
+            raise ServiceBadRequest("Batch operation ids must be unique")
+        unknown = [operation.op for operation in operations if operation.op not in self._loaders]
+        if unknown:
+            raise ServiceBadRequest(f"Unknown batch operations: {', '.join(unknown)}")
+        if any(INCLUDE_PARAM in operation.params for operation in operations):
+            raise ServiceBadRequest("include is not supported in batch operations")
+
+        # One AsyncSession runs one statement at a time, so the reads go out back to back
+        # on the single connection the batch checked out.
+        results = {}
+        try:
+            for operation in operations:
+                results[operation.result_id] = await self._loaders[operation.op](
+                    session, operation.params
+                )
+            await self._audit_logs.create(
+                session,
+                AuditLog(
+                    user_id=token["user_id"],
+                    action=f"Batch retrieved: {', '.join(op.op for op in operations)}",
+                ),
+            )
+        except ValueError as err:
+            raise ServiceConflict(err) from err
+        await session.commit()
+        return results
+
+    async def _load_computers(self, session: AsyncSession, params: dict[str, str]) -> list:
+        query = parse_list_query(self._computers.filters, params.items())
+        projection = parse_projection(self._computers.fields, params.get(FIELDS_PARAM))
+        return await self._computers.get_all(session, query, projection)
+
+    async def _load_software(self, session: AsyncSession, params: dict[str, str]) -> list:
+        query = parse_list_query(self._software.filters, params.items())
+        return await self._software.get_all(session, query)
+
+    async def _load_software_types(self, session: AsyncSession, params: dict[str, str]) -> list:
+        _reject_filters("softwareTypes", params)
+        return await self._software_types.get_all(session)
+
+    async def _load_vendors(self, session: AsyncSession, params: dict[str, str]) -> list:
+        _reject_filters("vendors", params)
+        return await self._vendors.get_all(session)
+
+    async def _load_licenses(self, session: AsyncSession, params: dict[str, str]) -> list:
+        query = parse_list_query(self._licenses.filters, params.items())
+        projection = parse_projection(self._licenses.fields, params.get(FIELDS_PARAM))
+        return await self._licenses.get_all(session, query, projection)
+
+    async def _load_installations(self, session: AsyncSession, params: dict[str, str]) -> list:
+        query = parse_list_query(self._installations.filters, params.items())
+        return await self._installations.get_all(session, query)
+
+    async def _load_departments(self, session: AsyncSession, params: dict[str, str]) -> list:
+        _reject_filters("departments", params)
+        return await self._departments.get_all(session)
+
+    async def _load_expiring_licenses(self, session: AsyncSession, params: dict[str, str]) -> list:
+        try:
+            start_date = parse_datetime(params["start_date"])
+            end_date = parse_datetime(params["end_date"])
+        except (KeyError, ValueError) as err:
+            raise ServiceBadRequest(
+                "expiringLicenses needs ISO start_date and end_date params"
+            ) from err
+        return await self._licenses.get_expiring(session, start_date, end_date)
+
+
+def _reject_filters(op: str, params: dict[str, str]) -> None:
+    if params.keys() - {FIELDS_PARAM}:
+        raise ServiceBadRequest(f"Operation {op} does not take filters")
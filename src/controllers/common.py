@@ -0,0 +1,35 @@
+from collections.abc import Iterable
+from datetime import UTC, datetime
+
+from src.exceptions import ServiceBadRequest
+from src.fieldsets import FieldSet, Projection
+from src.filters import FilterSpec, ListQuery
+from src.loaders import Includes, IncludeSpec
+
+
+def parse_list_query(spec: FilterSpec, params: Iterable[tuple[str, str]]) -> ListQuery:
+    try:
+        return spec.parse(params)
+    except ValueError as err:
+        raise ServiceBadRequest(err) from err
+
+
+def parse_includes(spec: IncludeSpec, include: str | None) -> Includes | None:
+    try:
+        return spec.parse(include)
+    except ValueError as err:
+        raise ServiceBadRequest(err) from err
+
+
+def parse_projection(fieldset: FieldSet, fields: str | None) -> Projection:
+    try:
+        return fieldset.parse(fields)
+    except ValueError as err:
+        raise ServiceBadRequest(err) from err
+
+
+def as_utc(value: datetime | None) -> datetime | None:
+    # Query parameters without an offset parse as naive datetimes; they are taken as UTC.
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value
@@ -1,40 +1,135 @@
 from datetime import UTC, datetime, timedelta
-from hashlib import sha256
+from uuid import uuid4
 
 import jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from settings import Settings
-from src.exceptions import ServiceForbidden
+from src.exceptions import ServiceConflict, ServiceForbidden
+from src.models import RevokedToken, User
+from src.passwords import PasswordHasher
+from src.repositories.revoked_tokens import RevokedTokenRepo
 from src.repositories.users import UserRepo
+from src.revocations import RevocationList
+
+
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
 
 
 class LoginController:
-    def __init__(self, settings: Settings, users: UserRepo) -> None:
+    def __init__(
+        self,
+        settings: Settings,
+        users: UserRepo,
+        passwords: PasswordHasher,
+        revoked_tokens: RevokedTokenRepo,
+        revocations: RevocationList,
+    ) -> None:
         self._settings = settings
         self._users = users
+        self._passwords = passwords
+        self._revoked_tokens = revoked_tokens
+        self._revocations = revocations
 
     async def login(self, session: AsyncSession, username: str, password: str) -> dict:
         user = await self._users.get_by_username(session, username)
-        if not user:
+        # Unknown usernames are checked too, so response times do not reveal which exist.
+        hashed = user.password if user else self._passwords.dummy_hash
+        if not await self._passwords.verify(password, hashed) or not user:
             raise ServiceForbidden("Incorrect username or password")
+        if self._passwords.needs_rehash(user.password):
+            user.password = await self._passwords.hash(password)
+            await session.commit()
+        expires_at = datetime.now(UTC) + timedelta(seconds=self._settings.jwt_refresh_ttl_seconds)
+        return self._issue_tokens(self._user_data(user), uuid4().hex, expires_at)
 
-        hashed_pass = sha256(password.encode()).hexdigest()
-        if hashed_pass != user.password:
-            raise ServiceForbidden("Incorrect username or password")
-        user_data = {
+    async def refresh(self, session: AsyncSession, refresh_token: str) -> dict:
+        try:
+            payload = jwt.decode(
+                refresh_token, self._settings.jwt_secret, algorithms=[self._settings.jwt_algorithm]
+            )
+        except jwt.ExpiredSignatureError as err:
+            raise ServiceForbidden("Token expired") from err
+        except jwt.InvalidTokenError as err:
+            raise ServiceForbidden("Invalid token") from err
+        if payload.get("type") != REFRESH_TOKEN:
+            raise ServiceForbidden("Invalid token")
+
+        sid, jti = payload["sid"], payload["jti"]
+        expires_at = datetime.fromtimestamp(payload["exp"], UTC)
+        if sid in self._revocations and await self._revoked_tokens.exists(session, sid):
+            raise ServiceForbidden("Token revoked")
+        if jti in self._revocations and await self._revoked_tokens.exists(session, jti):
+            # A rotated refresh token came back, so it leaked: end the whole session.
+            await self._revoke(session, sid, expires_at)
+            raise ServiceForbidden("Token revoked")
+
+        # Claims come from the current row, so role changes and deletions apply on refresh.
+        user = await self._users.get_by_id(session, payload["user_id"])
+        if user is None:
+            await self._revoke(session, sid, expires_at)
+            raise ServiceForbidden("Token revoked")
+
+        try:
+            await self._revoked_tokens.create(
+                session, RevokedToken(token_id=jti, expires_at=expires_at)
+            )
+        except ValueError as err:
+            await session.rollback()
+            if not await self._revoked_tokens.exists(session, jti):
+                raise ServiceConflict(err) from err
+            # A concurrent refresh consumed the same token first: treat it as reuse.
+            await self._revoke(session, sid, expires_at)
+            raise ServiceForbidden("Token revoked") from err
+        await session.commit()
+        self._revocations.add(jti)
+
+        return self._issue_tokens(self._user_data(user), sid, expires_at)
+
+    async def logout(self, session: AsyncSession, token: dict) -> None:
+        if "sid" not in token:
+            raise ServiceForbidden("Invalid token")
+        expires_at = datetime.now(UTC) + timedelta(seconds=self._settings.jwt_refresh_ttl_seconds)
+        await self._revoke(session, token["sid"], expires_at)
+
+    async def _revoke(self, session: AsyncSession, token_id: str, expires_at: datetime) -> None:
+        if not await self._revoked_tokens.exists(session, token_id):
+            try:
+                await self._revoked_tokens.create(
+                    session, RevokedToken(token_id=token_id, expires_at=expires_at)
+                )
+            except ValueError as err:
+                raise ServiceConflict(err) from err
+            await session.commit()
+        self._revocations.add(token_id)
+
+    @staticmethod
+    def _user_data(user: User) -> dict:
+        return {
             "username": user.username,
             "user_id": user.user_id,
             "role": user.role.value,
             "full_name": user.full_name,
         }
-        token = self._create_jwt_token(user_data)
-        return {"token": token, "refreshToken": "", **user_data}
 
-    def _create_jwt_token(self, data: dict, expires_delta: timedelta = timedelta(hours=1)):
+    def _issue_tokens(self, user_data: dict, sid: str, expires_at: datetime) -> dict:
+        # Rotation keeps the session's original expiry, so a session lives at most
+        # jwt_refresh_ttl_seconds and its revocation entry can expire with it.
+        access_expires_at = min(
+            datetime.now(UTC) + timedelta(seconds=self._settings.jwt_access_ttl_seconds), expires_at
+        )
+        token = self._create_jwt_token(
+            {**user_data, "type": ACCESS_TOKEN, "sid": sid}, access_expires_at
+        )
+        refresh_token = self._create_jwt_token(
+            {**user_data, "type": REFRESH_TOKEN, "sid": sid, "jti": uuid4().hex}, expires_at
+        )
+        return {"token": token, "refreshToken": refresh_token, **user_data}
+
+    def _create_jwt_token(self, data: dict, expires_at: datetime):
         to_encode = data.copy()
-        expire = datetime.now(UTC) + expires_delta
-        to_encode.update({"exp": expire})
+        to_encode.update({"exp": expires_at})
         encoded_jwt = jwt.encode(
             to_encode, self._settings.jwt_secret, algorithm=self._settings.jwt_algorithm
         )
@@ -1,10 +1,19 @@
-from datetime import datetime
+import asyncio
+from collections import defaultdict
+from collections.abc import AsyncIterator, Callable, Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from settings import Settings
-from src.enums import ComputerType
-from src.exceptions import ServiceConflict, ServiceNotFound
+from src.compliance import license_compliance
+from src.controllers.common import as_utc, parse_includes, parse_list_query, parse_projection
+from src.enums import ComputerType, ReportJobStatus, ReportKind
+from src.exceptions import ServiceBadRequest, ServiceConflict, ServiceNotFound
+from src.loaders import Includes
 from src.models import (
     AuditLog,
     Computer,
@@ -12,18 +21,31 @@ from src.models import (
     Installation,
     License,
     Software,
-    SoftwareType,
     Vendor,
 )
+from src.report_jobs import ReportJob, ReportJobs
 from src.repositories.audit_logs import AuditLogRepo
+from src.repositories.changes import ChangeRepo
 from src.repositories.computer_assignments import ComputerAssignmentRepo
 from src.repositories.computers import ComputerRepo
 from src.repositories.departments import DepartmentRepo
 from src.repositories.installations import InstallationRepo
 from src.repositories.licenses import LicenseRepo
+from src.repositories.search import SearchRepo
 from src.repositories.software import SoftwareRepo
 from src.repositories.software_types import SoftwareTypeRepo
 from src.repositories.vendor import VendorRepo
+from src.single_flight import Share
+
+
+CHANGE_CURSOR_SEPARATOR = "-"
+CHANGE_CURSOR_PATTERN = r"^\d{1,18}-\d{1,18}$"
+
+
+@dataclass
+class InventoryItem:
+    license_id: int
+    install_date: datetime | None = None
 
 
 class ManagerController:
@@ -38,7 +60,10 @@ class ManagerController:
         vendors: VendorRepo,
         licenses: LicenseRepo,
         installations: InstallationRepo,
+        search: SearchRepo,
+        changes: ChangeRepo,
         audit_logs: AuditLogRepo,
+        report_jobs: ReportJobs,
     ) -> None:
         self._settings = settings
         self._computers = computers
@@ -49,73 +74,118 @@ class ManagerController:
         self._vendors = vendors
         self._licenses = licenses
         self._installations = installations
+        self._search = search
+        self._changes = changes
         self._audit_logs = audit_logs
+        self._report_jobs = report_jobs
+
+    def license_includes(self, include: str | None, flat: bool = False) -> Includes | None:
+        if flat and include:
+            raise ServiceBadRequest("include is not supported for spreadsheet exports")
+        return parse_includes(self._licenses.includes, include)
 
-    async def get_all_sw_types(self, session: AsyncSession, token: dict) -> list[SoftwareType]:
+    def installation_includes(self, include: str | None, flat: bool = False) -> Includes | None:
+        if flat and include:
+            raise ServiceBadRequest("include is not supported for spreadsheet exports")
+        return parse_includes(self._installations.includes, include)
+
+    async def get_all_sw_types(self, session: AsyncSession, token: dict, share: Share) -> bytes:
         try:
-            models = await self._software_types.get_all(session)
+            body = await share(lambda: self._software_types.get_all(session))
             await self._audit_logs.create(
                 session, AuditLog(user_id=token["user_id"], action="All Software types retrieved")
             )
         except ValueError as err:
             raise ServiceConflict(err) from err
         await session.commit()
-        return models
+        return body
 
-    async def get_all_software(self, session: AsyncSession, token: dict) -> list[Software]:
+    async def get_all_software(
+        self, session: AsyncSession, token: dict, params: Iterable[tuple[str, str]], share: Share
+    ) -> bytes:
+        query = parse_list_query(self._software.filters, params)
         try:
-            models = await self._software.get_all(session)
+            body = await share(lambda: self._software.get_all(session, query))
             await self._audit_logs.create(
                 session, AuditLog(user_id=token["user_id"], action="All Software retrieved")
             )
         except ValueError as err:
             raise ServiceConflict(err) from err
         await session.commit()
-        return models
+        return body
 
-    async def get_all_computers(self, session: AsyncSession, token: dict) -> list[Computer]:
+    async def get_all_computers(
+        self,
+        session: AsyncSession,
+        token: dict,
+        params: Iterable[tuple[str, str]],
+        fields: str | None,
+        share: Share,
+    ) -> bytes:
+        query = parse_list_query(self._computers.filters, params)
+        projection = parse_projection(self._computers.fields, fields)
         try:
-            models = await self._computers.get_all(session)
+            body = await share(lambda: self._computers.get_all(session, query, projection))
             await self._audit_logs.create(
                 session, AuditLog(user_id=token["user_id"], action="All computers retrieved")
             )
         except ValueError as err:
             raise ServiceConflict(err) from err
         await session.commit()
-        return models
+        return body
 
-    async def get_all_vendors(self, session: AsyncSession, token: dict) -> list[Vendor]:
+    async def get_all_vendors(self, session: AsyncSession, token: dict, share: Share) -> bytes:
         try:
-            models = await self._vendors.get_all(session)
+            body = await share(lambda: self._vendors.get_all(session))
             await self._audit_logs.create(
                 session, AuditLog(user_id=token["user_id"], action="All vendors retrieved")
             )
         except ValueError as err:
             raise ServiceConflict(err) from err
         await session.commit()
-        return models
+        return body
 
-    async def get_all_licenses(self, session: AsyncSession, token: dict) -> list[License]:
+    async def get_all_licenses(
+        self,
+        session: AsyncSession,
+        token: dict,
+        params: Iterable[tuple[str, str]],
+        fields: str | None,
+        includes: Includes | None,
+        share: Share,
+    ) -> bytes:
+        if fields and includes is not None:
+            raise ServiceBadRequest("fields and include cannot be combined")
+        query = parse_list_query(self._licenses.filters, params)
+        projection = parse_projection(self._licenses.fields, fields)
         try:
-            models = await self._licenses.get_all(session)
+            body = await share(lambda: self._licenses.get_all(session, query, projection, includes))
             await self._audit_logs.create(
                 session, AuditLog(user_id=token["user_id"], action="All licenses retrieved")
             )
         except ValueError as err:
             raise ServiceConflict(err) from err
         await session.commit()
-        return models
+        return body
 
-    async def get_all_installations(self, session: AsyncSession, token: dict) -> list[Installation]:
+    async def get_all_installations(
+        self,
+        session: AsyncSession,
+        token: dict,
+        params: Iterable[tuple[str, str]],
+        includes: Includes | None,
+        share: Share,
+    ) -> bytes:
+        query = parse_list_query(self._installations.filters, params)
         try:
-            models = await self._installations.get_all(session)
+            body = await share(lambda: self._installations.get_all(session, query, includes))
             await self._audit_logs.create(
                 session, AuditLog(user_id=token["user_id"], action="All installations retrieved")
             )
         except ValueError as err:
             raise ServiceConflict(err) from err
         await session.commit()
-        return models
+        return body
 
     async def create_computer(
         self,
@@ -163,16 +233,40 @@ class ManagerController:
         if not department:
             raise ServiceNotFound(f"Department with ID:{dept_id} not found")
 
-        model = ComputerAssignment(
-            computer=computer,
-            department=department,
-            start_date=start_date,
-            end_date=end_date,
-            doc_number=doc_number,
-            doc_date=doc_date,
-            doc_type=doc_type,
+        start_date, end_date = as_utc(start_date), as_utc(end_date)
+        # The assignment running at start_date ends where the new one begins, unless the
+        # new one would leave it running again afterwards. Anything else the new period
+        # overlaps is a conflict; checking here keeps SQLite, which has no exclusion
+        # constraint, consistent with PostgreSQL.
+        previous = await self._computer_assignments.get_at(session, computer_id, start_date)
+        supersedes = (
+            previous is not None
+            and previous.start_date < start_date
+            and (
+                end_date is None
+                or (previous.end_date is not None and end_date >= previous.end_date)
+            )
+        )
+        overlapping = await self._computer_assignments.get_overlapping(
+            session, computer_id, start_date, end_date, previous.assignment_id if supersedes else 0
         )
+        if overlapping is not None:
+            raise ServiceConflict(
+                f"Assignment overlaps assignment {overlapping.doc_number} of computer {computer_id}"
+            )
+
         try:
+            if supersedes:
+                await self._computer_assignments.close(session, previous, start_date)
+            model = ComputerAssignment(
+                computer=computer,
+                department=department,
+                start_date=start_date,
+                end_date=end_date,
+                doc_number=doc_number,
+                doc_date=doc_date,
+                doc_type=doc_type,
+            )
             model = await self._computer_assignments.create(session, model)
             await self._audit_logs.create(
                 session,
@@ -185,6 +279,27 @@ class ManagerController:
         await session.commit()
         return model
 
+    async def get_computer_assignments(
+        self, session: AsyncSession, token: dict, computer_id: int
+    ) -> list[ComputerAssignment]:
+        computer = await self._computers.get_by_id(session, computer_id)
+        if not computer:
+            raise ServiceNotFound(f"Computer with ID:{computer_id} not found")
+
+        models = await self._computer_assignments.get_history(session, computer_id)
+        try:
+            await self._audit_logs.create(
+                session,
+                AuditLog(
+                    user_id=token["user_id"],
+                    action=f"Computer assignments retrieved: {computer.inventory_number}",
+                ),
+            )
+        except ValueError as err:
+            raise ServiceConflict(err) from err
+        await session.commit()
+        return models
+
     async def delete_computer(self, session: AsyncSession, token: dict, computer_id: int) -> None:
         existing = await self._computers.get_by_id(session, computer_id)
 
@@ -302,6 +417,97 @@ class ManagerController:
         await session.commit()
         return model
 
+    async def sync_inventory(
+        self, session: AsyncSession, token: dict, computer_id: int, items: list[InventoryItem]
+    ) -> tuple[list[Row], list[int]]:
+        if len(items) > self._settings.inventory_max_items:
+            raise ServiceBadRequest(
+                f"Inventory exceeds {self._settings.inventory_max_items} licenses"
+            )
+        desired = {}
+        for item in items:
+            desired.setdefault(item.license_id, item.install_date)
+
+        # The row lock serializes syncs of one computer. Installations are read after it
+        # is granted, so they include whatever the previous sync committed.
+        computer = await self._computers.lock(session, computer_id)
+        if not computer:
+            raise ServiceNotFound(f"Computer with ID:{computer_id} not found")
+        kept, removed = set(), []
+        for row in await self._installations.get_for_computer(session, computer_id):
+            if row.license_id in desired and row.license_id not in kept:
+                kept.add(row.license_id)
+            else:
+                removed.append(row.installation_id)
+        missing = [license_id for license_id in desired if license_id not in kept]
+        if missing:
+            unknown = set(missing) - await self._licenses.get_existing_ids(session, missing)
+            if unknown:
+                raise ServiceNotFound(f"Licenses with IDs:{sorted(unknown)} not found")
+
+        now = datetime.now(UTC)
+        added = []
+        try:
+            if removed:
+                await self._installations.delete_by_ids(session, removed)
+            if missing:
+                added = await self._installations.create_many(
+                    session,
+                    [
+                        {
+                            "computer_id": computer_id,
+                            "license_id": license_id,
+                            "install_date": desired[license_id] or now,
+                        }
+                        for license_id in missing
+                    ],
+                )
+            await self._audit_logs.create(
+                session,
+                AuditLog(
+                    user_id=token["user_id"],
+                    action=f"Inventory synced on {computer.inventory_number}: "
+                    f"{len(added)} installed, {len(removed)} removed",
+                ),
+            )
+        except ValueError as err:
+            raise ServiceConflict(err) from err
+        await session.commit()
+        return added, removed
+
+    async def get_changes(self, session: AsyncSession, token: dict, since: str, limit: int) -> dict:
+        # The cursor is "<xid>-<seq>" of the last change served; see ChangeRepo.
+        xid, _, seq = since.partition(CHANGE_CURSOR_SEPARATOR)
+        rows = await self._changes.get_since(session, (int(xid), int(seq)), limit)
+        ids = defaultdict(list)
+        for row in rows:
+            if not row.deleted:
+                ids[row.table_name].append(row.row_id)
+        data = {name: await self._changes.get_rows(session, name, ids[name]) for name in ids}
+
+        changes = []
+        for row in rows:
+            change = {"seq": row.seq, "table": row.table_name, "id": row.row_id}
+            if row.deleted:
+                changes.append({**change, "op": "delete"})
+            elif row.row_id in data[row.table_name]:
+                changes.append({**change, "op": "upsert", "data": data[row.table_name][row.row_id]})
+            # Otherwise the row was deleted after the first query; its tombstone comes later.
+
+        try:
+            await self._audit_logs.create(
+                session,
+                AuditLog(user_id=token["user_id"], action=f"Changes since {since} retrieved"),
+            )
+        except ValueError as err:
+            raise ServiceConflict(err) from err
+        await session.commit()
+        return {
+            "changes": changes,
+            "cursor": f"{rows[-1].xid}{CHANGE_CURSOR_SEPARATOR}{rows[-1].seq}" if rows else since,
+            "has_more": len(rows) == limit,
+        }
+
     async def get_computer_software(
         self, session: AsyncSession, token: dict, computer_id: int
     ) -> list[Software]:
@@ -337,9 +543,34 @@ class ManagerController:
         await session.commit()
         return model
 
+    async def search(self, session: AsyncSession, token: dict, query: str, limit: int) -> list[Row]:
+        try:
+            rows = await self._search.search(session, query, limit)
+            await self._audit_logs.create(
+                session, AuditLog(user_id=token["user_id"], action=f"Search performed: {query}")
+            )
+        except ValueError as err:
+            raise ServiceConflict(err) from err
+        await session.commit()
+        return rows
+
     async def gen_installed_sw_report(
-        self, session: AsyncSession, token: dict, date: datetime
-    ) -> list[dict]:
+        self, session: AsyncSession, token: dict, date: datetime, share: Share
+    ) -> bytes:
+        body = await share(lambda: self._installed_sw_report(session, date))
+
+        try:
+            await self._audit_logs.create(
+                session,
+                AuditLog(user_id=token["user_id"], action="Installed software report generated"),
+            )
+        except ValueError as err:
+            raise ServiceConflict(err) from err
+        await session.commit()
+
+        return body
+
+    async def _installed_sw_report(self, session: AsyncSession, date: datetime) -> list[dict]:
         models = await self._installations.get_with_software(session, date)
         data = []
         for m in models:
@@ -355,20 +586,28 @@ class ManagerController:
                     "sw_type": sw.sw_type.name,
                 }
             )
+        return data
+
+    async def gen_counted_sw_licenses_report(
+        self, session: AsyncSession, token: dict, date: datetime, share: Share
+    ) -> bytes:
+        body = await share(lambda: self._counted_sw_licenses_report(session, date))
 
         try:
             await self._audit_logs.create(
                 session,
-                AuditLog(user_id=token["user_id"], action="Installed software report generated"),
+                AuditLog(
+                    user_id=token["user_id"], action="Software licenses count report generated"
+                ),
             )
         except ValueError as err:
             raise ServiceConflict(err) from err
         await session.commit()
 
-        return data
+        return body
 
-    async def gen_counted_sw_licenses_report(
-        self, session: AsyncSession, token: dict, date: datetime
+    async def _counted_sw_licenses_report(
+        self, session: AsyncSession, date: datetime
     ) -> list[dict]:
         models = await self._software.get_with_licenses(session, date)
         data = []
@@ -385,22 +624,29 @@ class ManagerController:
                     "total_licenses": len(m.licenses),
                 }
             )
+        return data
+
+    async def gen_counted_depts_comps_report(
+        self, session: AsyncSession, token: dict, date: datetime, share: Share
+    ) -> bytes:
+        body = await share(lambda: self._counted_depts_comps_report(session, date))
 
         try:
             await self._audit_logs.create(
                 session,
                 AuditLog(
-                    user_id=token["user_id"], action="Software licenses count report generated"
+                    user_id=token["user_id"],
+                    action="Department assigned computers report generated",
                 ),
             )
         except ValueError as err:
             raise ServiceConflict(err) from err
         await session.commit()
 
-        return data
+        return body
 
-    async def gen_counted_depts_comps_report(
-        self, session: AsyncSession, token: dict, date: datetime
+    async def _counted_depts_comps_report(
+        self, session: AsyncSession, date: datetime
     ) -> list[dict]:
         models = await self._departments.get_with_assignments(session, date)
         data = []
@@ -414,17 +660,172 @@ class ManagerController:
                     "total_computers": len(m.assignments),
                 }
             )
+        return data
+
+    async def gen_license_compliance_report(
+        self, session: AsyncSession, token: dict, start: datetime, end: datetime, share: Share
+    ) -> bytes:
+        start, end = as_utc(start), as_utc(end)
+        if end < start:
+            raise ServiceBadRequest("end must not be before start")
+        days = (end - start) // timedelta(days=1) + 1
+        if days > self._settings.compliance_max_days:
+            raise ServiceBadRequest(
+                f"At most {self._settings.compliance_max_days} days can be analysed at once"
+            )
+        body = await share(lambda: self._license_compliance_report(session, start, end, days))
 
         try:
             await self._audit_logs.create(
                 session,
-                AuditLog(
-                    user_id=token["user_id"],
-                    action="Department assigned computers report generated",
-                ),
+                AuditLog(user_id=token["user_id"], action="License compliance report generated"),
             )
         except ValueError as err:
             raise ServiceConflict(err) from err
         await session.commit()
 
-        return data
+        return body
+
+    async def _license_compliance_report(
+        self, session: AsyncSession, start: datetime, end: datetime, days: int
+    ) -> dict:
+        # Installations first: every license they reference is then already visible.
+        installations = await self._installations.get_columns(session, end)
+        licenses = await self._licenses.get_columns(session)
+        return await asyncio.to_thread(license_compliance, installations, licenses, start, days)
+
+    async def export_licenses(
+        self,
+        session: AsyncSession,
+        token: dict,
+        params: Iterable[tuple[str, str]],
+        fields: str | None,
+        includes: Includes | None,
+        getters: dict[str, Callable[[License], object]],
+    ) -> AsyncIterator[dict]:
+        if fields and includes is not None:
+            raise ServiceBadRequest("fields and include cannot be combined")
+        query = parse_list_query(self._licenses.filters, params)
+        projection = parse_projection(self._licenses.fields, fields)
+        models = self._licenses.stream_all(session, query, projection, includes)
+        rows = ({name: get(m) for name, get in getters.items()} async for m in models)
+        async for row in self._export(session, token, rows, "All licenses exported"):
+            yield row
+
+    def export_installations(
+        self,
+        session: AsyncSession,
+        token: dict,
+        params: Iterable[tuple[str, str]],
+        includes: Includes | None,
+        getters: dict[str, Callable[[Installation], object]],
+    ) -> AsyncIterator[dict]:
+        query = parse_list_query(self._installations.filters, params)
+        models = self._installations.stream_all(session, query, includes)
+        rows = ({name: get(m) for name, get in getters.items()} async for m in models)
+        return self._export(session, token, rows, "All installations exported")
+
+    def export_installed_sw_report(
+        self, session: AsyncSession, token: dict, date: datetime
+    ) -> AsyncIterator[dict]:
+        rows = self._stream_installed_sw_report(session, date)
+        return self._export(session, token, rows, "Installed software report exported")
+
+    def export_counted_sw_licenses_report(
+        self, session: AsyncSession, token: dict, date: datetime
+    ) -> AsyncIterator[dict]:
+        rows = self._stream_counted_sw_licenses_report(session, date)
+        return self._export(session, token, rows, "Software licenses count report exported")
+
+    def export_counted_depts_comps_report(
+        self, session: AsyncSession, token: dict, date: datetime
+    ) -> AsyncIterator[dict]:
+        rows = self._stream_counted_depts_comps_report(session, date)
+        return self._export(session, token, rows, "Department assigned computers report exported")
+
+    async def _export(
+        self, session: AsyncSession, token: dict, rows: AsyncIterator[dict], action: str
+    ) -> AsyncIterator[dict]:
+        async for row in rows:
+            yield row
+        try:
+            await self._audit_logs.create(
+                session, AuditLog(user_id=token["user_id"], action=action)
+            )
+        except ValueError as err:
+            raise ServiceConflict(err) from err
+        await session.commit()
+
+    def submit_report_job(
+        self,
+        token: dict,
+        kind: ReportKind,
+        date: datetime,
+        sessionmaker: async_sessionmaker[AsyncSession] | None,
+    ) -> ReportJob:
+        if not sessionmaker:
+            raise ServiceConflict(f"No sessionmaker for role: {token['role']}")
+        produce_rows, action = {
+            ReportKind.installed_software: (
+                self._stream_installed_sw_report,
+                "Installed software report generated",
+            ),
+            ReportKind.count_software_licenses: (
+                self._stream_counted_sw_licenses_report,
+                "Software licenses count report generated",
+            ),
+            ReportKind.count_departments_computers: (
+                self._stream_counted_depts_comps_report,
+                "Department assigned computers report generated",
+            ),
+        }[kind]
+
+        async def produce() -> AsyncIterator[dict]:
+            async with sessionmaker() as session:
+                async for row in produce_rows(session, date):
+                    yield row
+                await self._audit_logs.create(
+                    session, AuditLog(user_id=token["user_id"], action=action)
+                )
+                await session.commit()
+
+        return self._report_jobs.submit(
+            kind, {"date": date.isoformat()}, token["role"], token["user_id"], produce
+        )
+
+    def get_report_job(self, token: dict, job_id: str) -> ReportJob:
+        job = self._report_jobs.get(job_id)
+        if not job or job.role != token["role"]:
+            raise ServiceNotFound(f"Report job {job_id} not found")
+        return job
+
+    def get_report_job_result(self, token: dict, job_id: str) -> Path:
+        job = self.get_report_job(token, job_id)
+        if job.status != ReportJobStatus.done.value:
+            raise ServiceConflict(f"Report job {job_id} is {job.status}")
+        return self._report_jobs.result_path(job)
+
+    async def _stream_installed_sw_report(
+        self, session: AsyncSession, date: datetime
+    ) -> AsyncIterator[dict]:
+        async for row in self._installations.stream_with_software(session, date):
+            yield {
+                "install_date": row.install_date.isoformat(),
+                "license_start_date": row.license_start_date.isoformat(),
+                "license_end_date": row.license_end_date.isoformat(),
+                "sw_name": row.sw_name,
+                "sw_code": row.sw_code,
+                "sw_type": row.sw_type,
+            }
+
+    async def _stream_counted_sw_licenses_report(
+        self, session: AsyncSession, date: datetime
+    ) -> AsyncIterator[dict]:
+        async for row in self._software.stream_license_counts(session, date):
+            yield row._asdict()
+
+    async def _stream_counted_depts_comps_report(
+        self, session: AsyncSession, date: datetime
+    ) -> AsyncIterator[dict]:
+        async for row in self._departments.stream_assignment_counts(session, date):
+            yield row._asdict()
@@ -4,10 +4,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from settings import Settings
 from src.exceptions import ServiceConflict, ServiceNotFound
-from src.models import AuditLog, Computer, Department, License, Software
+from src.models import AuditLog, Computer, License, Software
 from src.repositories.audit_logs import AuditLogRepo
 from src.repositories.departments import DepartmentRepo
 from src.repositories.licenses import LicenseRepo
+from src.single_flight import Share
 
 
 class SupervisorController:
@@ -23,16 +24,16 @@ class SupervisorController:
         self._licenses = licenses
         self._audit_logs = audit_logs
 
-    async def get_all_depts(self, session: AsyncSession, token: dict) -> list[Department]:
+    async def get_all_depts(self, session: AsyncSession, token: dict, share: Share) -> bytes:
         try:
-            models = await self._departments.get_all(session)
+            body = await share(lambda: self._departments.get_all(session))
             await self._audit_logs.create(
                 session, AuditLog(user_id=token["user_id"], action="All departments retrieved")
             )
         except ValueError as err:
             raise ServiceConflict(err) from err
         await session.commit()
-        return models
+        return body
 
     async def get_dept_installed_sw(
         self, session: AsyncSession, token: dict, dept_id: int
@@ -42,7 +43,7 @@ class SupervisorController:
             raise ServiceNotFound(f"Department with ID:{dept_id} not found")
 
         result = set()
-        for ca in model.assignments:
+        for ca in model.current_assignments:
             computer: Computer = ca.computer
             for inst in computer.installations:
                 lcns: License = inst.license
@@ -81,12 +82,17 @@ class SupervisorController:
             raise ServiceConflict(err) from err
         await session.commit()
 
-        return [i.computer for i in model.assignments]
+        return [i.computer for i in model.current_assignments]
 
     async def get_expiring_licenses(
-        self, session: AsyncSession, token: dict, start_date: datetime, end_date: datetime
-    ) -> list[License]:
-        expiring = await self._licenses.get_expiring(session, start_date, end_date)
+        self,
+        session: AsyncSession,
+        token: dict,
+        start_date: datetime,
+        end_date: datetime,
+        share: Share,
+    ) -> bytes:
+        body = await share(lambda: self._licenses.get_expiring(session, start_date, end_date))
 
         try:
             await self._audit_logs.create(
@@ -96,4 +102,4 @@ class SupervisorController:
             raise ServiceConflict(err) from err
         await session.commit()
 
-        return expiring
+        return body
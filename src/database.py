@@ -0,0 +1,282 @@
+import asyncio
+from time import time
+
+from sqlalchemy import event, make_url, text
+from sqlalchemy.exc import ProgrammingError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import ORMExecuteState, Session, object_mapper
+
+from settings import Settings
+from src.logger import get_logger
+from src.metrics import InstrumentedPool, instrument_engine
+from src.models import AuditLog
+from src.models.base import Base
+from src.repositories.computers import ComputerRepo
+from src.repositories.departments import DepartmentRepo
+from src.repositories.licenses import LicenseRepo
+from src.repositories.software import SoftwareRepo
+from src.repositories.software_types import SoftwareTypeRepo
+from src.repositories.users import UserRepo
+from src.repositories.vendor import VendorRepo
+from src.slow_queries import SlowQueryLog
+
+
+logger = get_logger()
+
+# Cheap lookups that share their SQL with the hot request paths, so running them once per
+# warmed connection primes the driver's per-connection prepared statement cache.
+WARMUP_QUERIES = {
+    "root": (lambda session: UserRepo().get_by_username(session, ""),),
+    "admin": (
+        lambda session: UserRepo().get_by_id(session, 0),
+        lambda session: SoftwareTypeRepo().get_by_id(session, 0),
+    ),
+    "manager": (
+        lambda session: ComputerRepo().get_by_id(session, 0),
+        lambda session: DepartmentRepo().get_by_id(session, 0),
+        lambda session: LicenseRepo().get_by_id(session, 0),
+        lambda session: SoftwareRepo().get_by_id(session, 0),
+        lambda session: SoftwareTypeRepo().get_by_id(session, 0),
+        lambda session: VendorRepo().get_by_id(session, 0),
+    ),
+    "supervisor": (lambda session: DepartmentRepo().get_by_id(session, 0),),
+}
+
+ROLES = ("root", "admin", "manager", "supervisor")
+
+# Tables each PostgreSQL login may write to, enforced by RoleSession when all roles share
+# one SQLite engine. Roles that are not listed, i.e. root, may write everywhere.
+SQLITE_WRITE_GRANTS = {
+    "admin": frozenset({"users", "software_types", "audit_logs"}),
+    "manager": frozenset(
+        {
+            "computers",
+            "computer_assignments",
+            "installations",
+            "licenses",
+            "software",
+            "vendors",
+            "audit_logs",
+        }
+    ),
+    "supervisor": frozenset({"audit_logs"}),
+}
+
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class RoleSession(Session):
+    """
+    Session acting as the database role in ``info["role"]`` on the SQLite backend.
+
+    Writes outside the role's ``SQLITE_WRITE_GRANTS`` raise the ``ProgrammingError`` that
+    PostgreSQL raises for a missing privilege, so repositories handle both the same way.
+    """
+
+
+def _check_write_grant(session: Session, table: str) -> None:
+    grants = SQLITE_WRITE_GRANTS.get(session.info["role"])
+    if grants is not None and table not in grants:
+        message = f"permission denied for table {table}"
+        raise ProgrammingError(message, None, PermissionError(message))
+
+
+@event.listens_for(RoleSession, "before_flush")
+def _check_flush_grants(session: Session, flush_context, instances) -> None:
+    dirty = (model for model in session.dirty if session.is_modified(model))
+    for model in (*session.new, *dirty, *session.deleted):
+        _check_write_grant(session, object_mapper(model).local_table.name)
+
+
+@event.listens_for(RoleSession, "do_orm_execute")
+def _check_statement_grants(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        _check_write_grant(state.session, state.statement.table.name)
+
+
+class Database:
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings
+        self.slow_queries = SlowQueryLog(
+            threshold_ms=settings.slow_query_threshold_ms,
+            redact_params=settings.slow_query_redact_params,
+            explain=settings.slow_query_explain,
+            max_entries=settings.slow_query_max_entries,
+        )
+        self.engines: dict[str, AsyncEngine] = {}
+        self.sessions: dict[str, async_sessionmaker[AsyncSession]] = {}
+        self.replica_sessions: dict[str, async_sessionmaker[AsyncSession]] = {}
+        self._healthy_replicas: set[str] = set()
+        self._primary_pins: dict[int, float] = {}
+
+    def connect(self) -> None:
+        if self._settings.db_backend == "sqlite":
+            self._connect_sqlite()
+            return
+
+        urls = {
+            "root": self._settings.sql_root_url,
+            "admin": self._settings.sql_admin_url,
+            "manager": self._settings.sql_manager_url,
+            "supervisor": self._settings.sql_supervisor_url,
+        }
+        for role, url in urls.items():
+            engine = self._create_engine(url, role)
+            self.engines[role] = engine
+            self.sessions[role] = async_sessionmaker(engine, expire_on_commit=False)
+
+        replica_urls = {
+            "admin": self._settings.sql_admin_replica_url,
+            "manager": self._settings.sql_manager_replica_url,
+            "supervisor": self._settings.sql_supervisor_replica_url,
+        }
+        for role, url in replica_urls.items():
+            if not url:
+                continue
+            replica = self._create_engine(url, f"{role}_replica")
+            self.engines[f"{role}_replica"] = replica
+            # Read endpoints still write their audit entry, which must land on the primary.
+            self.replica_sessions[role] = async_sessionmaker(
+                replica, binds={AuditLog: self.engines[role]}, expire_on_commit=False
+            )
+
+    async def create_schema(self) -> None:
+        # PostgreSQL schemas are managed outside the app, but a SQLite database may be new.
+        if self._settings.db_backend == "sqlite":
+            async with self.engines["sqlite"].begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+
+    def capacity(self, role: str) -> int:
+        per_pool = self._settings.db_pool_size + self._settings.db_max_overflow
+        return per_pool * (2 if role in self.replica_sessions else 1)
+
+    def sessionmaker_for(
+        self, role: str, user_id: int, read_only: bool, pinned_until: float = 0
+    ) -> async_sessionmaker[AsyncSession] | None:
+        # pinned_until comes from the client (see PrimaryPinMiddleware) and covers writes
+        # served by other workers; _primary_pins covers clients that drop the cookie.
+        if (
+            read_only
+            and role in self._healthy_replicas
+            and max(self._primary_pins.get(user_id, 0), pinned_until) < time()
+        ):
+            return self.replica_sessions[role]
+        return self.sessions.get(role)
+
+    def pin_to_primary(self, user_id: int) -> None:
+        if self.replica_sessions:
+            self._primary_pins[user_id] = time() + self._settings.replica_pin_seconds
+
+    async def monitor_replicas(self) -> None:
+        while self.replica_sessions:
+            await asyncio.gather(*(self._check_replica(role) for role in self.replica_sessions))
+            now = time()
+            self._primary_pins = {
+                user_id: until for user_id, until in self._primary_pins.items() if until > now
+            }
+            await asyncio.sleep(self._settings.replica_check_interval)
+
+    async def warm_up(self) -> None:
+        connections = min(self._settings.db_pool_warmup, self._settings.db_pool_size)
+        await asyncio.gather(
+            *(self._warm_connection(role) for role in self.sessions for _ in range(connections))
+        )
+
+    async def dispose(self) -> None:
+        await self.slow_queries.drain()
+        await asyncio.gather(*(engine.dispose() for engine in self.engines.values()))
+        self.engines.clear()
+        self.sessions.clear()
+        self.replica_sessions.clear()
+
+    def _create_engine(self, url: str, role: str) -> AsyncEngine:
+        engine = create_async_engine(
+            url,
+            echo=self._settings.db_echo,
+            pool_size=self._settings.db_pool_size,
+            max_overflow=self._settings.db_max_overflow,
+            pool_recycle=3600,
+            pool_pre_ping=True,
+            poolclass=InstrumentedPool,
+            pool_logging_name=role,
+            connect_args={
+                "prepared_statement_cache_size": self._settings.db_prepared_statement_cache_size
+            },
+        )
+        instrument_engine(engine, role)
+        self.slow_queries.attach(engine, role)
+        return engine
+
+    def _connect_sqlite(self) -> None:
+        engine = self._create_sqlite_engine(self._settings.sqlite_url)
+        self.engines["sqlite"] = engine
+        for role in ROLES:
+            self.sessions[role] = async_sessionmaker(
+                engine, expire_on_commit=False, sync_session_class=RoleSession, info={"role": role}
+            )
+
+    def _create_sqlite_engine(self, url: str) -> AsyncEngine:
+        pool_size, max_overflow = self._settings.db_pool_size, self._settings.db_max_overflow
+        if make_url(url).database in (None, "", ":memory:"):
+            # An in-memory database lives as long as its connection, so keep exactly one
+            # and let sessions queue for it; use a file for concurrent access.
+            pool_size, max_overflow = 1, 0
+        engine = create_async_engine(
+            url,
+            echo=self._settings.db_echo,
+            poolclass=InstrumentedPool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_logging_name="sqlite",
+        )
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys = ON")
+            cursor.close()
+
+        instrument_engine(engine, "sqlite")
+        self.slow_queries.attach(engine, "sqlite")
+        return engine
+
+    async def _check_replica(self, role: str) -> None:
+        engine = self.engines[f"{role}_replica"]
+        try:
+            async with asyncio.timeout(self._settings.replica_check_interval):
+                async with engine.connect() as conn:
+                    lag = await conn.scalar(REPLICA_LAG_QUERY)
+        except (SQLAlchemyError, OSError, TimeoutError) as err:
+            lag = None
+            logger.warning(f"Replica for role {role} unavailable: {err}")
+        else:
+            lag = float(lag or 0)
+
+        if lag is not None and lag <= self._settings.replica_max_lag_seconds:
+            self._healthy_replicas.add(role)
+            return
+        if lag is not None:
+            logger.warning(f"Replica for role {role} lagging by {lag:.1f}s")
+        self._healthy_replicas.discard(role)
+
+    async def _warm_connection(self, role: str) -> None:
+        async with self.sessions[role]() as session:
+            try:
+                await session.connection()
+            except (SQLAlchemyError, OSError) as err:
+                logger.warning(f"Pool warm-up failed for role {role}: {err}")
+                return
+            for query in WARMUP_QUERIES.get(role, ()):
+                try:
+                    await query(session)
+                except SQLAlchemyError as err:
+                    logger.warning(f"Warm-up query failed for role {role}: {err}")
+                    await session.rollback()
@@ -1,63 +1,120 @@
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
 import jwt
-from fastapi import Depends
+from fastapi import Depends, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from settings import settings
+from settings import Settings
+from src.admission import AdmissionController
+from src.audit_archive import AuditArchive
 from src.controllers.admin import AdminController
-from src.controllers.login import LoginController
+from src.controllers.batch import BatchController
+from src.controllers.login import REFRESH_TOKEN, LoginController
 from src.controllers.manager import ManagerController
 from src.controllers.supervisor import SupervisorController
+from src.database import Database
+from src.enums import UserRole
 from src.exceptions import ServiceConflict, ServiceForbidden
+from src.idempotency import IdempotencyStore
+from src.passwords import PasswordHasher
+from src.primary_pins import PRIMARY_PIN_STATE, pinned_until
+from src.renderers import EXPORT_MEDIA_TYPES, STREAMED_MEDIA_TYPES, negotiate
+from src.report_jobs import ReportJobs
 from src.repositories.audit_logs import AuditLogRepo
+from src.repositories.changes import ChangeRepo
 from src.repositories.computer_assignments import ComputerAssignmentRepo
 from src.repositories.computers import ComputerRepo
 from src.repositories.departments import DepartmentRepo
 from src.repositories.installations import InstallationRepo
 from src.repositories.licenses import LicenseRepo
+from src.repositories.revoked_tokens import RevokedTokenRepo
+from src.repositories.search import SearchRepo
 from src.repositories.software import SoftwareRepo
 from src.repositories.software_types import SoftwareTypeRepo
 from src.repositories.users import UserRepo
 from src.repositories.vendor import VendorRepo
+from src.revocations import RevocationList
+from src.single_flight import SESSION_TARGET_STATE, Share, SingleFlight, request_key
+
+
+READ_ONLY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# POST routes that only read, so they may use replicas and do not pin the user to the primary.
+READ_ONLY_PATHS = frozenset({"/api/batch"})
+
+
+def get_settings(request: Request) -> Settings:
+    return request.app.state.settings
+
+
+def get_database(request: Request) -> Database:
+    return request.app.state.db
+
+
+def get_admission(request: Request) -> AdmissionController:
+    return request.app.state.admission
+
+
+def get_single_flight(request: Request) -> SingleFlight:
+    return request.app.state.flights
+
+
+def get_audit_archive(request: Request) -> AuditArchive:
+    return request.app.state.audit_archive
+
 
+def get_idempotency_store(request: Request) -> IdempotencyStore:
+    return request.app.state.idempotency
 
-root_engine = create_async_engine(
-    settings.sql_root_url, echo=settings.db_echo, pool_recycle=3600, pool_pre_ping=True
-)
-admin_engine = create_async_engine(
-    settings.sql_admin_url, echo=settings.db_echo, pool_recycle=3600, pool_pre_ping=True
-)
-manager_engine = create_async_engine(
-    settings.sql_manager_url, echo=settings.db_echo, pool_recycle=3600, pool_pre_ping=True
-)
-supervisor_engine = create_async_engine(
-    settings.sql_supervisor_url, echo=settings.db_echo, pool_recycle=3600, pool_pre_ping=True
-)
 
-root_session = async_sessionmaker(root_engine, expire_on_commit=False)
-admin_session = async_sessionmaker(admin_engine, expire_on_commit=False)
-manager_session = async_sessionmaker(manager_engine, expire_on_commit=False)
-supervisor_session = async_sessionmaker(supervisor_engine, expire_on_commit=False)
+def get_password_hasher(request: Request) -> PasswordHasher:
+    return request.app.state.passwords
 
-session_map = {
-    "root": root_session,
-    "admin": admin_session,
-    "manager": manager_session,
-    "supervisor": supervisor_session,
-}
 
+def get_revocations(request: Request) -> RevocationList:
+    return request.app.state.revocations
 
-def get_login_controller():
-    return LoginController(settings=settings, users=UserRepo())
 
+def get_report_jobs(request: Request) -> ReportJobs:
+    return request.app.state.report_jobs
 
-def get_admin_controller():
+
+def get_login_controller(
+    settings: Settings = Depends(get_settings),
+    passwords: PasswordHasher = Depends(get_password_hasher),
+    revocations: RevocationList = Depends(get_revocations),
+):
+    return LoginController(
+        settings=settings,
+        users=UserRepo(),
+        passwords=passwords,
+        revoked_tokens=RevokedTokenRepo(),
+        revocations=revocations,
+    )
+
+
+def get_admin_controller(
+    settings: Settings = Depends(get_settings),
+    db: Database = Depends(get_database),
+    passwords: PasswordHasher = Depends(get_password_hasher),
+    audit_archive: AuditArchive = Depends(get_audit_archive),
+):
     return AdminController(
-        settings=settings, users=UserRepo(), sw_types=SoftwareTypeRepo(), audit_logs=AuditLogRepo()
+        settings=settings,
+        users=UserRepo(),
+        sw_types=SoftwareTypeRepo(),
+        audit_logs=AuditLogRepo(),
+        slow_queries=db.slow_queries,
+        passwords=passwords,
+        audit_archive=audit_archive,
     )
 
 
-def get_manager_controller():
+def get_manager_controller(
+    settings: Settings = Depends(get_settings), report_jobs: ReportJobs = Depends(get_report_jobs)
+):
     return ManagerController(
         settings=settings,
         computers=ComputerRepo(),
@@ -68,11 +125,14 @@ def get_manager_controller():
         vendors=VendorRepo(),
         licenses=LicenseRepo(),
         installations=InstallationRepo(),
+        search=SearchRepo(),
+        changes=ChangeRepo(),
         audit_logs=AuditLogRepo(),
+        report_jobs=report_jobs,
     )
 
 
-def get_supervisor_controller():
+def get_supervisor_controller(settings: Settings = Depends(get_settings)):
     return SupervisorController(
         settings=settings,
         departments=DepartmentRepo(),
@@ -81,7 +141,26 @@ def get_supervisor_controller():
     )
 
 
-def read_token(auth_token: HTTPAuthorizationCredentials = Depends(HTTPBearer())) -> dict:
+def get_batch_controller(settings: Settings = Depends(get_settings)):
+    return BatchController(
+        settings=settings,
+        computers=ComputerRepo(),
+        departments=DepartmentRepo(),
+        software=SoftwareRepo(),
+        software_types=SoftwareTypeRepo(),
+        vendors=VendorRepo(),
+        licenses=LicenseRepo(),
+        installations=InstallationRepo(),
+        audit_logs=AuditLogRepo(),
+    )
+
+
+async def read_token(
+    auth_token: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
+    settings: Settings = Depends(get_settings),
+    db: Database = Depends(get_database),
+    revocations: RevocationList = Depends(get_revocations),
+) -> dict:
     try:
         payload = jwt.decode(
             auth_token.credentials, settings.jwt_secret, algorithms=[settings.jwt_algorithm]
@@ -90,25 +169,131 @@ def read_token(auth_token: HTTPAuthorizationCredentials = Depends(HTTPBearer()))
         raise ServiceForbidden("Token expired") from err
     except jwt.InvalidTokenError as err:
         raise ServiceForbidden("Invalid token") from err
+    if payload.get("type") == REFRESH_TOKEN:
+        raise ServiceForbidden("Invalid token")
+    sid = payload.get("sid")
+    if sid and await revocations.is_revoked(db.sessions["root"], sid):
+        raise ServiceForbidden("Token revoked")
     return payload
 
 
-async def get_rbac_session(user_data: dict = Depends(read_token)) -> AsyncSession:
+def get_sharing(
+    request: Request,
+    token: dict = Depends(read_token),
+    flights: SingleFlight = Depends(get_single_flight),
+) -> Callable[[Callable[[Any], Any]], Share]:
+    # The key is taken when the view shares a load, after its session dependency has
+    # recorded whether the request reads the primary or a replica.
+    return lambda render: flights.sharing(request_key(request, token), render)
+
+
+@asynccontextmanager
+async def _rbac_session(
+    request: Request, user_data: dict, db: Database, admission: AdmissionController
+) -> AsyncIterator[AsyncSession]:
     role = user_data["role"]
-    sessionmaker = session_map.get(role)
+    user_id = user_data["user_id"]
+    read_only = request.method in READ_ONLY_METHODS or request.url.path in READ_ONLY_PATHS
+    sessionmaker = db.sessionmaker_for(role, user_id, read_only, pinned_until(request))
     if not sessionmaker:
         raise ServiceConflict(f"No sessionmaker for role: {role}")
 
-    async with sessionmaker() as session:
+    heavy = admission.is_heavy(request.url.path)
+    admission.acquire(role, user_id, heavy)
+    target = "primary" if sessionmaker is db.sessions.get(role) else "replica"
+    setattr(request.state, SESSION_TARGET_STATE, target)
+    if not read_only and db.replica_sessions:
+        setattr(request.state, PRIMARY_PIN_STATE, True)
+    try:
+        async with sessionmaker() as session:
+            try:
+                yield session
+            except Exception:
+                await session.rollback()
+                raise
+    finally:
+        admission.release(role, user_id, heavy)
+        if not read_only:
+            db.pin_to_primary(user_id)
+
+
+def require_admin(user_data: dict = Depends(read_token)) -> None:
+    # PostgreSQL keeps other roles out of admin tables with grants; the SQLite backend only
+    # emulates write grants, so admin routes check the role themselves.
+    if user_data["role"] != UserRole.admin.value:
+        raise ServiceForbidden("Insufficient permissions")
+
+
+async def get_rbac_session(
+    request: Request,
+    user_data: dict = Depends(read_token),
+    db: Database = Depends(get_database),
+    admission: AdmissionController = Depends(get_admission),
+) -> AsyncSession:
+    async with _rbac_session(request, user_data, db, admission) as session:
+        yield session
+
+
+async def get_rbac_session_unless_export(
+    request: Request,
+    user_data: dict = Depends(read_token),
+    db: Database = Depends(get_database),
+    admission: AdmissionController = Depends(get_admission),
+) -> AsyncSession | None:
+    # Streamed exports run in get_rbac_stream's session and admission slot; opening the
+    # request session as well would count them twice against the admission limits.
+    media_type = negotiate(request.headers.get("accept"), EXPORT_MEDIA_TYPES)
+    if media_type in STREAMED_MEDIA_TYPES:
+        yield None
+        return
+    async with _rbac_session(request, user_data, db, admission) as session:
+        yield session
+
+
+async def get_rbac_stream(
+    request: Request,
+    user_data: dict = Depends(read_token),
+    db: Database = Depends(get_database),
+    admission: AdmissionController = Depends(get_admission),
+) -> Callable[[Callable[[AsyncSession], AsyncIterator[bytes]]], Awaitable[AsyncIterator[bytes]]]:
+    role = user_data["role"]
+    user_id = user_data["user_id"]
+    read_only = request.method in READ_ONLY_METHODS or request.url.path in READ_ONLY_PATHS
+    sessionmaker = db.sessionmaker_for(role, user_id, read_only, pinned_until(request))
+    if not sessionmaker:
+        raise ServiceConflict(f"No sessionmaker for role: {role}")
+    heavy = admission.is_heavy(request.url.path)
+
+    async def produce_in_session(
+        produce: Callable[[AsyncSession], AsyncIterator[bytes]],
+    ) -> AsyncIterator[bytes]:
         try:
-            yield session
-        except Exception:
-            await session.rollback()
-            raise
+            async with sessionmaker() as session:
+                async for chunk in produce(session):
+                    yield chunk
+        finally:
+            admission.release(role, user_id, heavy)
+
+    async def with_first(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        yield first
+        async for chunk in rest:
+            yield chunk
+
+    async def stream(
+        produce: Callable[[AsyncSession], AsyncIterator[bytes]],
+    ) -> AsyncIterator[bytes]:
+        # A streamed body is sent after the request's dependencies have exited, so it gets
+        # its own session and admission slot. The first chunk is produced here, letting
+        # admission and validation errors still become a normal error response.
+        admission.acquire(role, user_id, heavy)
+        chunks = produce_in_session(produce)
+        return with_first(await anext(chunks, b""), chunks)
+
+    return stream
 
 
-async def get_root_session() -> AsyncSession:
-    sessionmaker = session_map["root"]
+async def get_root_session(db: Database = Depends(get_database)) -> AsyncSession:
+    sessionmaker = db.sessions["root"]
     async with sessionmaker() as session:
         try:
             yield session
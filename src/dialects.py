@@ -0,0 +1,282 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    DateTime,
+    Float,
+    String,
+    and_,
+    any_,
+    column,
+    literal,
+    or_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSTZRANGE, Range
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import ClauseElement, ColumnElement
+from sqlalchemy.sql.functions import GenericFunction
+from sqlalchemy.sql.visitors import InternalTraversal
+from sqlalchemy.types import TypeDecorator
+
+
+class TZDateTime(TypeDecorator):
+    """
+    ``timestamptz`` on PostgreSQL. SQLite has no time zones, so values are stored as naive
+    UTC, which keeps their text ordering chronological, and come back tagged as UTC.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value: datetime | None, dialect) -> datetime | None:
+        if value is not None and dialect.name == "sqlite" and value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value: datetime | None, dialect) -> datetime | None:
+        if value is not None and dialect.name == "sqlite":
+            value = value.replace(tzinfo=UTC)
+        return value
+
+
+class _RangeOf(ColumnElement):
+    # Half-open range over two columns of the same row, for generated period columns.
+    inherit_cache = True
+    _traverse_internals = [
+        ("lower", InternalTraversal.dp_clauseelement),
+        ("upper", InternalTraversal.dp_clauseelement),
+    ]
+
+    def __init__(self, lower: ColumnElement, upper: ColumnElement) -> None:
+        self.lower = lower
+        self.upper = upper
+        self.type = TSTZRANGE()
+
+
+@compiles(_RangeOf)
+def _compile_range_of(element: _RangeOf, compiler, **kw) -> str:
+    lower = compiler.process(element.lower, **kw)
+    upper = compiler.process(element.upper, **kw)
+    return f"tstzrange({lower}, {upper}, '[)')"
+
+
+@compiles(_RangeOf, "sqlite")
+def _compile_range_of_sqlite(element: _RangeOf, compiler, **kw) -> str:
+    lower = compiler.process(element.lower, **kw)
+    upper = compiler.process(element.upper, **kw)
+    return f"{lower} || '/' || coalesce({upper}, '')"
+
+
+class _RangeContains(ColumnElement):
+    inherit_cache = True
+    _is_implicitly_boolean = True
+    _traverse_internals = [
+        ("period", InternalTraversal.dp_clauseelement),
+        ("value", InternalTraversal.dp_clauseelement),
+    ]
+
+    def __init__(self, period: ColumnElement, value: ColumnElement) -> None:
+        self.period = period
+        self.value = value
+        self.type = Boolean()
+
+
+@compiles(_RangeContains)
+def _compile_range_contains(element: _RangeContains, compiler, **kw) -> str:
+    return compiler.process(element.period.op("@>", is_comparison=True)(element.value), **kw)
+
+
+@compiles(_RangeContains, "sqlite")
+def _compile_range_contains_sqlite(element: _RangeContains, compiler, **kw) -> str:
+    # SQLite stores the range as text, so test the columns it is generated from. Going
+    # through the period's own table keeps this correct for aliased joins.
+    period_type = element.period.type
+    columns = element.period.table.c
+    lower, upper = columns[period_type.lower], columns[period_type.upper]
+    value = element.value
+    condition = and_(lower <= value, or_(upper.is_(None), upper > value))
+    return f"({compiler.process(condition, **kw)})"
+
+
+class TimeRange(TypeDecorator):
+    """
+    ``tstzrange`` generated from the ``lower`` and ``upper`` timestamp columns of its row,
+    with ``contains`` as the only operator. SQLite stores it as ``lower/upper`` text.
+    """
+
+    impl = TSTZRANGE
+    cache_ok = True
+
+    def __init__(self, lower: str, upper: str) -> None:
+        super().__init__()
+        self.lower = lower
+        self.upper = upper
+
+    def generated(self) -> _RangeOf:
+        return _RangeOf(column(self.lower), column(self.upper))
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(String())
+        return dialect.type_descriptor(TSTZRANGE())
+
+    def process_result_value(self, value, dialect) -> Range | None:
+        if value is None or dialect.name != "sqlite":
+            return value
+        lower, _, upper = value.partition("/")
+        return Range(
+            datetime.fromisoformat(lower).replace(tzinfo=UTC),
+            datetime.fromisoformat(upper).replace(tzinfo=UTC) if upper else None,
+            bounds="[)",
+        )
+
+    class comparator_factory(TypeDecorator.Comparator):  # noqa: N801
+        def contains(self, other, **kw) -> _RangeContains:
+            if not isinstance(other, ClauseElement):
+                other = literal(other, TZDateTime())
+            return _RangeContains(self.expr, other)
+
+
+class ArrayOf(TypeDecorator):
+    """
+    Bind type for a list of ids matched with ``any_of``: an array on PostgreSQL, so the
+    statement text does not change with the list length, and JSON on SQLite.
+    """
+
+    impl = ARRAY
+    cache_ok = True
+
+    def __init__(self, item_type) -> None:
+        super().__init__(item_type)
+        self.item_type = item_type
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(JSON())
+        return dialect.type_descriptor(ARRAY(self.item_type))
+
+
+class _AnyOf(ColumnElement):
+    inherit_cache = True
+    _is_implicitly_boolean = True
+    _traverse_internals = [
+        ("column", InternalTraversal.dp_clauseelement),
+        ("values", InternalTraversal.dp_clauseelement),
+    ]
+
+    def __init__(self, column: ColumnElement, values: ColumnElement) -> None:
+        self.column = column
+        self.values = values
+        self.type = Boolean()
+
+
+def any_of(column: ColumnElement, values: ColumnElement) -> _AnyOf:
+    return _AnyOf(column, values)
+
+
+@compiles(_AnyOf)
+def _compile_any_of(element: _AnyOf, compiler, **kw) -> str:
+    return compiler.process(element.column == any_(element.values), **kw)
+
+
+@compiles(_AnyOf, "sqlite")
+def _compile_any_of_sqlite(element: _AnyOf, compiler, **kw) -> str:
+    column = compiler.process(element.column, **kw)
+    values = compiler.process(element.values, **kw)
+    return f"({column} IN (SELECT value FROM json_each({values})))"
+
+
+class Similarity(GenericFunction):
+    name = "similarity"
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(Similarity, "sqlite")
+def _compile_similarity_sqlite(element: Similarity, compiler, **kw) -> str:
+    # No trigrams: a substring match scores by how much of the text the query covers.
+    text, query = (compiler.process(clause, **kw) for clause in element.clauses)
+    return (
+        f"CASE WHEN instr(lower({text}), lower({query})) > 0 "
+        f"THEN CAST(length({query}) AS REAL) / max(length({text}), length({query}), 1) "
+        "ELSE 0.0 END"
+    )
+
+
+class Greatest(GenericFunction):
+    name = "greatest"
+    inherit_cache = True
+
+
+@compiles(Greatest, "sqlite")
+def _compile_greatest_sqlite(element: Greatest, compiler, **kw) -> str:
+    arguments = [compiler.process(clause, **kw) for clause in element.clauses]
+    if len(arguments) == 1:
+        return arguments[0]  # max() of one argument is the aggregate in SQLite
+    return f"max({', '.join(arguments)})"
+
+
+class ArrayAgg(GenericFunction):
+    """
+    ``array_agg`` of one column, typed with ``ArrayOf`` so it comes back as a list on both
+    backends. SQLite builds the list with ``json_group_array``.
+    """
+
+    name = "array_agg"
+    inherit_cache = True
+    _register = False  # leave func.array_agg to SQLAlchemy
+
+    def __init__(self, column: ColumnElement, **kw) -> None:
+        kw.setdefault("type_", ArrayOf(column.type))
+        super().__init__(column, **kw)
+
+
+@compiles(ArrayAgg, "sqlite")
+def _compile_array_agg_sqlite(element: ArrayAgg, compiler, **kw) -> str:
+    return f"json_group_array({compiler.process(element.clauses, **kw)})"
+
+
+class Epoch(GenericFunction):
+    # Seconds since the Unix epoch as a float, cheaper to decode than a timestamp.
+    name = "epoch"
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(Epoch)
+def _compile_epoch(element: Epoch, compiler, **kw) -> str:
+    return f"date_part('epoch', {compiler.process(element.clauses, **kw)})"
+
+
+@compiles(Epoch, "sqlite")
+def _compile_epoch_sqlite(element: Epoch, compiler, **kw) -> str:
+    # Whole seconds plus the fraction %f carries, to the millisecond. Going through
+    # julianday() would be off by microseconds even for whole seconds.
+    value = compiler.process(element.clauses, **kw)
+    return (
+        f"(CAST(strftime('%s', {value}) AS REAL) "
+        f"+ (strftime('%f', {value}) - strftime('%S', {value})))"
+    )
+
+
+class TransactionHorizon(ColumnElement):
+    """
+    Id of the oldest transaction still running when the statement's snapshot was taken.
+    Every transaction below it has finished, so none of them can still add a row. SQLite
+    runs one writer at a time and reports no horizon.
+    """
+
+    inherit_cache = True
+    type = BigInteger()
+
+
+@compiles(TransactionHorizon)
+def _compile_transaction_horizon(element: TransactionHorizon, compiler, **kw) -> str:
+    return "pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+
+@compiles(TransactionHorizon, "sqlite")
+def _compile_transaction_horizon_sqlite(element: TransactionHorizon, compiler, **kw) -> str:
+    return "9223372036854775807"
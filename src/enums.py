@@ -10,3 +10,16 @@ class UserRole(Enum):
 class ComputerType(Enum):
     workstation = "workstation"
     server = "server"
+
+
+class ReportKind(Enum):
+    installed_software = "installedSoftware"
+    count_software_licenses = "countSoftwareLicenses"
+    count_departments_computers = "countDepartmentsComputers"
+
+
+class ReportJobStatus(Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
@@ -18,5 +18,15 @@ class ServiceNotFound(ServiceException):
     pass
 
 
+class ServiceBadRequest(ServiceException):
+    pass
+
+
 class ServiceLimitExceeded(ServiceException):
     pass
+
+
+class ServiceUnavailable(ServiceException):
+    def __init__(self, message: str, retry_after: int = 1) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,65 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import Select
+from sqlalchemy.orm import InstrumentedAttribute, load_only
+from sqlalchemy.sql.base import ExecutableOption
+
+
+FIELDS_PARAM = "fields"
+FIELD_SEPARATOR = ","
+
+
+@dataclass(frozen=True)
+class SparseField:
+    columns: tuple[InstrumentedAttribute, ...] = ()
+    loaders: tuple[ExecutableOption, ...] = ()
+
+
+@dataclass(frozen=True)
+class Projection:
+    fields: tuple[str, ...]
+    columns: tuple[InstrumentedAttribute, ...]
+    loaders: tuple[ExecutableOption, ...]
+
+    def apply(self, statement: Select) -> Select:
+        return statement.options(load_only(*self.columns), *self.loaders)
+
+
+class FieldSet:
+    """
+    Maps the public field names of a list endpoint to the columns and relationship
+    loaders needed to produce them, so ``?fields=`` narrows the query itself.
+    """
+
+    def __init__(self, fields: dict[str, SparseField], primary_key: InstrumentedAttribute) -> None:
+        self._fields = fields
+        self._primary_key = primary_key
+        self.all = self._project(tuple(fields))
+
+    def parse(self, raw: str | None) -> Projection:
+        if not raw:
+            return self.all
+        requested = set(filter(None, raw.split(FIELD_SEPARATOR)))
+        unknown = requested - self._fields.keys()
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return self._project(tuple(name for name in self._fields if name in requested))
+
+    def _project(self, names: tuple[str, ...]) -> Projection:
+        columns = [self._primary_key]
+        loaders = []
+        for name in names:
+            columns.extend(self._fields[name].columns)
+            loaders.extend(self._fields[name].loaders)
+        return Projection(fields=names, columns=tuple(columns), loaders=tuple(loaders))
+
+
+def select_fields(
+    getters: dict[str, Callable[[Any], Any]], raw: str | None
+) -> dict[str, Callable[[Any], Any]]:
+    if not raw:
+        return getters
+    requested = set(raw.split(FIELD_SEPARATOR))
+    return {name: getter for name, getter in getters.items() if name in requested}
@@ -0,0 +1,114 @@
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import ColumnElement, Select
+from sqlalchemy.orm import InstrumentedAttribute
+
+from src.fieldsets import FIELDS_PARAM
+from src.loaders import INCLUDE_PARAM
+
+
+EQ = "eq"
+IN = "in"
+RANGE = "range"
+PREFIX = "prefix"
+
+SORT_PARAM = "sort"
+LOOKUP_SEPARATOR = "__"
+VALUE_SEPARATOR = ","
+
+# Query parameters owned by the view rather than by a filter spec.
+RESERVED_PARAMS = frozenset({SORT_PARAM, FIELDS_PARAM, INCLUDE_PARAM})
+
+# Lookup suffix -> the whitelisted operator it belongs to.
+_LOOKUPS = {"": EQ, "in": IN, "gte": RANGE, "lte": RANGE, "prefix": PREFIX}
+
+
+def parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+@dataclass(frozen=True)
+class FilterField:
+    column: InstrumentedAttribute
+    parse: Callable[[str], Any] = str
+    ops: frozenset[str] = frozenset({EQ, IN})
+    sortable: bool = True
+    # Scalar relationship the column is reached through, compiled to an EXISTS.
+    via: InstrumentedAttribute | None = None
+
+    def condition(self, lookup: str, raw: str) -> ColumnElement[bool]:
+        if lookup == "in":
+            condition = self.column.in_([self.parse(v) for v in raw.split(VALUE_SEPARATOR)])
+        elif lookup == "gte":
+            condition = self.column >= self.parse(raw)
+        elif lookup == "lte":
+            condition = self.column <= self.parse(raw)
+        elif lookup == "prefix":
+            condition = self.column.startswith(self.parse(raw), autoescape=True)
+        else:
+            condition = self.column == self.parse(raw)
+        return self.via.has(condition) if self.via is not None else condition
+
+
+@dataclass(frozen=True)
+class ListQuery:
+    where: tuple[ColumnElement[bool], ...] = ()
+    order_by: tuple[ColumnElement, ...] = ()
+
+    def apply(self, statement: Select) -> Select:
+        if self.where:
+            statement = statement.where(*self.where)
+        if self.order_by:
+            statement = statement.order_by(*self.order_by)
+        return statement
+
+
+class FilterSpec:
+    """
+    Whitelist of filterable and sortable fields for a list endpoint.
+
+    Filters are ``field=value``, ``field__in=a,b``, ``field__gte=``/``field__lte=`` and
+    ``field__prefix=``; ``sort=-field,other`` orders the result, with the primary key
+    appended so rows with equal sort keys come back in a stable order.
+    """
+
+    def __init__(self, fields: dict[str, FilterField], tiebreaker: InstrumentedAttribute) -> None:
+        self._fields = fields
+        self._tiebreaker = tiebreaker
+
+    def parse(self, params: Iterable[tuple[str, str]]) -> ListQuery:
+        where = []
+        order_by = []
+        for key, raw in params:
+            if key == SORT_PARAM:
+                order_by.extend(self._parse_sort(raw))
+                continue
+            if key in RESERVED_PARAMS:
+                continue
+            name, _, lookup = key.partition(LOOKUP_SEPARATOR)
+            field = self._fields.get(name)
+            if field is None:
+                raise ValueError(f"Unknown filter field: {name}")
+            if lookup not in _LOOKUPS or _LOOKUPS[lookup] not in field.ops:
+                raise ValueError(f"Unsupported filter: {key}")
+            try:
+                where.append(field.condition(lookup, raw))
+            except (TypeError, ValueError) as err:
+                raise ValueError(f"Invalid value for {key}: {raw}") from err
+
+        if order_by:
+            order_by.append(self._tiebreaker)
+        return ListQuery(where=tuple(where), order_by=tuple(order_by))
+
+    def _parse_sort(self, raw: str) -> list[ColumnElement]:
+        order_by = []
+        for name in filter(None, raw.split(VALUE_SEPARATOR)):
+            descending = name.startswith("-")
+            field = self._fields.get(name.removeprefix("-"))
+            if field is None or not field.sortable or field.via is not None:
+                raise ValueError(f"Cannot sort by: {name.removeprefix('-')}")
+            order_by.append(field.column.desc() if descending else field.column.asc())
+        return order_by
@@ -0,0 +1,233 @@
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from hashlib import sha256
+from time import monotonic
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from settings import Settings
+from src.exceptions import ServiceBadRequest, ServiceConflict
+from src.logger import get_logger
+from src.metrics import record_cache
+from src.models import IdempotencyKey
+from src.repositories.idempotency_keys import IdempotencyKeyRepo
+
+
+logger = get_logger()
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def request_fingerprint(request: Request) -> str:
+    query = sorted(request.query_params.multi_items())
+    return sha256(repr((request.method, request.url.path, query)).encode()).hexdigest()
+
+
+class _ClaimHeld(Exception):
+    """Another process holds a pending claim on the key."""
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    media_type: str | None
+    body: bytes
+    created_at: datetime
+
+    def replay(self, fingerprint: str) -> Response:
+        if fingerprint != self.fingerprint:
+            raise ServiceBadRequest(f"{IDEMPOTENCY_HEADER} was already used for another request")
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            media_type=self.media_type,
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+
+class IdempotencyStore:
+    """
+    Replays the stored response of a write retried with the same ``Idempotency-Key``.
+
+    Successful responses are kept in ``idempotency_keys`` and in a per-process LRU. A duplicate
+    arriving while the first execution runs waits for it: within a process on its future,
+    across processes by polling the pending row until it holds a response, is released, or
+    outlives ``idempotency_lock_seconds``. Failed executions release the key so the client can
+    retry them.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        keys: IdempotencyKeyRepo,
+        sessionmaker: async_sessionmaker[AsyncSession],
+    ) -> None:
+        self._ttl = timedelta(seconds=settings.idempotency_ttl_seconds)
+        self._lock_timeout = timedelta(seconds=settings.idempotency_lock_seconds)
+        self._poll_interval = settings.idempotency_poll_seconds
+        self._max_entries = settings.idempotency_cache_size
+        self._keys = keys
+        self._sessionmaker = sessionmaker
+        self._cache: OrderedDict[tuple[int, str], StoredResponse] = OrderedDict()
+        self._flights: dict[tuple[int, str], asyncio.Future] = {}
+
+    async def run(
+        self,
+        user_id: int,
+        key: str | None,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Response]],
+    ) -> Response:
+        if not key:
+            return await handler()
+
+        cache_key = (user_id, key)
+        while (flight := self._flights.get(cache_key)) is not None:
+            await asyncio.wait([flight])
+
+        stored = self._cached(cache_key)
+        if stored is not None:
+            record_cache("idempotency", True)
+            return stored.replay(fingerprint)
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[cache_key] = flight
+        try:
+            stored = await self._claim(cache_key, fingerprint)
+            if stored is not None:
+                record_cache("idempotency", True)
+                return stored.replay(fingerprint)
+
+            record_cache("idempotency", False)
+            try:
+                response = await handler()
+            except BaseException:
+                await self._release(cache_key)
+                raise
+            if 200 <= response.status_code < 300:
+                await self._save(cache_key, fingerprint, response)
+            else:
+                await self._release(cache_key)
+            return response
+        finally:
+            flight.set_result(None)
+            del self._flights[cache_key]
+
+    async def purge(self) -> None:
+        async with self._sessionmaker() as session:
+            await self._keys.delete_expired(session, datetime.now(UTC) - self._ttl)
+            await session.commit()
+
+    async def monitor(self) -> None:
+        while True:
+            await asyncio.sleep(self._ttl.total_seconds())
+            try:
+                await self.purge()
+            except (SQLAlchemyError, OSError) as err:
+                logger.warning(f"Idempotency key purge failed: {err}")
+
+    def _cached(self, cache_key: tuple[int, str]) -> StoredResponse | None:
+        stored = self._cache.get(cache_key)
+        if stored is None:
+            return None
+        if stored.created_at + self._ttl < datetime.now(UTC):
+            del self._cache[cache_key]
+            return None
+        self._cache.move_to_end(cache_key)
+        return stored
+
+    def _remember(self, cache_key: tuple[int, str], stored: StoredResponse) -> None:
+        self._cache[cache_key] = stored
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
+
+    async def _claim(self, cache_key: tuple[int, str], fingerprint: str) -> StoredResponse | None:
+        # A pending claim goes stale after the lock timeout, so the wait is bounded by it.
+        deadline = monotonic() + self._lock_timeout.total_seconds()
+        while True:
+            try:
+                return await self._try_claim(cache_key, fingerprint)
+            except _ClaimHeld as err:
+                if monotonic() >= deadline:
+                    raise ServiceConflict(
+                        f"A request with this {IDEMPOTENCY_HEADER} is in progress"
+                    ) from err
+            await asyncio.sleep(self._poll_interval)
+
+    async def _try_claim(
+        self, cache_key: tuple[int, str], fingerprint: str
+    ) -> StoredResponse | None:
+        user_id, key = cache_key
+        now = datetime.now(UTC)
+        async with self._sessionmaker() as session:
+            model = await self._keys.get(session, user_id, key)
+            if model is not None and model.created_at + self._ttl >= now:
+                if model.status_code is not None:
+                    stored = StoredResponse(
+                        fingerprint=model.fingerprint,
+                        status_code=model.status_code,
+                        media_type=model.media_type,
+                        body=model.body,
+                        created_at=model.created_at,
+                    )
+                    self._remember(cache_key, stored)
+                    return stored
+                if model.created_at + self._lock_timeout >= now:
+                    raise _ClaimHeld
+
+            # Absent, expired, or left pending by a process that died: take the key over.
+            if model is not None:
+                model.fingerprint = fingerprint
+                model.status_code = model.media_type = model.body = None
+                model.created_at = now
+            else:
+                try:
+                    await self._keys.create(
+                        session,
+                        IdempotencyKey(
+                            user_id=user_id, key=key, fingerprint=fingerprint, created_at=now
+                        ),
+                    )
+                except ValueError as err:
+                    # Another process inserted the key first; wait on its row.
+                    raise _ClaimHeld from err
+            await session.commit()
+        return None
+
+    async def _save(self, cache_key: tuple[int, str], fingerprint: str, response: Response) -> None:
+        user_id, key = cache_key
+        stored = StoredResponse(
+            fingerprint=fingerprint,
+            status_code=response.status_code,
+            media_type=response.media_type,
+            body=bytes(response.body),
+            created_at=datetime.now(UTC),
+        )
+        self._remember(cache_key, stored)
+        try:
+            async with self._sessionmaker() as session:
+                model = await self._keys.get(session, user_id, key)
+                if model is not None:
+                    model.status_code = stored.status_code
+                    model.media_type = stored.media_type
+                    model.body = stored.body
+                    model.created_at = stored.created_at
+                    await session.commit()
+        except (SQLAlchemyError, OSError) as err:
+            # The write itself is committed; only replays from other processes are lost.
+            logger.warning(f"Storing idempotent response failed: {err}")
+
+    async def _release(self, cache_key: tuple[int, str]) -> None:
+        user_id, key = cache_key
+        async with self._sessionmaker() as session:
+            await self._keys.delete(session, user_id, key)
+            await session.commit()
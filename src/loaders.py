@@ -0,0 +1,130 @@
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Sequence
+from enum import Enum
+from functools import partial
+from typing import Any
+
+from sqlalchemy import bindparam, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapper, RelationshipProperty
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql.elements import BooleanClauseList
+
+from src.dialects import ArrayOf, any_of
+from src.models import BOOKKEEPING_COLUMNS
+
+
+INCLUDE_PARAM = "include"
+INCLUDE_SEPARATOR = ","
+PATH_SEPARATOR = "."
+
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _render_related(getters: dict[str, Callable], name: str, model: Any) -> Any:
+    related = getattr(model, name)
+    if related is None:
+        return None
+    if isinstance(related, list):
+        return [{key: get(item) for key, get in getters.items()} for item in related]
+    return {key: get(related) for key, get in getters.items()}
+
+
+def _entity_getters(mapper: Mapper, tree: dict) -> dict[str, Callable[[Any], Any]]:
+    # Generated columns only restate other columns, e.g. an assignment's period.
+    getters = {
+        attr.key: lambda model, key=attr.key: _plain(getattr(model, key))
+        for attr in mapper.column_attrs
+        if attr.columns[0].computed is None and attr.key not in BOOKKEEPING_COLUMNS
+    }
+    for name, subtree in tree.items():
+        nested = _entity_getters(mapper.relationships[name].mapper, subtree)
+        getters[name] = partial(_render_related, nested, name)
+    return getters
+
+
+def _extra_criteria(relationship: RelationshipProperty, local: Any, remote: Any) -> list:
+    # Conditions of a custom primaryjoin besides the key pair, e.g. "currently assigned".
+    join = relationship.primaryjoin
+    clauses = join.clauses if isinstance(join, BooleanClauseList) else (join,)
+    return [c for c in clauses if not (c.compare(local == remote) or c.compare(remote == local))]
+
+
+async def _load_relationship(
+    session: AsyncSession, relationship: RelationshipProperty, models: Sequence
+) -> list:
+    ((local, remote),) = relationship.local_remote_pairs
+    local_key = relationship.parent.get_property_by_column(local).key
+    remote_key = relationship.mapper.get_property_by_column(remote).key
+    ids = {getattr(model, local_key) for model in models} - {None}
+
+    related = []
+    if ids:
+        statement = select(relationship.mapper.class_).where(
+            any_of(remote, bindparam("ids", type_=ArrayOf(remote.type))),
+            *_extra_criteria(relationship, local, remote),
+        )
+        related = (await session.scalars(statement, {"ids": list(ids)})).all()
+
+    if relationship.uselist:
+        groups = defaultdict(list)
+        for item in related:
+            groups[getattr(item, remote_key)].append(item)
+        for model in models:
+            set_committed_value(model, relationship.key, groups.get(getattr(model, local_key), []))
+    else:
+        index = {getattr(item, remote_key): item for item in related}
+        for model in models:
+            set_committed_value(model, relationship.key, index.get(getattr(model, local_key)))
+    return related
+
+
+async def _load_level(session: AsyncSession, mapper: Mapper, models: Sequence, tree: dict) -> None:
+    for name, subtree in tree.items():
+        relationship = mapper.relationships[name]
+        related = await _load_relationship(session, relationship, models)
+        if subtree and related:
+            await _load_level(session, relationship.mapper, related, subtree)
+
+
+class Includes:
+    """
+    Per-request batching loader for ``?include=`` expansions.
+
+    Each requested relationship is fetched once for the whole page with
+    ``WHERE key = ANY(:ids)`` and stitched onto the parents in memory, so a page costs
+    one query per relationship edge no matter how many rows it holds.
+    """
+
+    def __init__(self, entity: type, tree: dict) -> None:
+        self._mapper = inspect(entity)
+        self._tree = tree
+
+    async def load(self, session: AsyncSession, models: Sequence) -> None:
+        if models:
+            await _load_level(session, self._mapper, models, self._tree)
+
+    def getters(self) -> dict[str, Callable[[Any], Any]]:
+        return _entity_getters(self._mapper, self._tree)
+
+
+class IncludeSpec:
+    def __init__(self, entity: type, paths: Iterable[str]) -> None:
+        self._entity = entity
+        self._paths = frozenset(paths)
+
+    def parse(self, raw: str | None) -> Includes | None:
+        if not raw:
+            return None
+        requested = set(filter(None, raw.split(INCLUDE_SEPARATOR)))
+        unknown = requested - self._paths
+        if unknown:
+            raise ValueError(f"Unknown include paths: {', '.join(sorted(unknown))}")
+        tree = {}
+        for path in sorted(requested):
+            node = tree
+            for name in path.split(PATH_SEPARATOR):
+                node = node.setdefault(name, {})
+        return Includes(self._entity, tree)
@@ -0,0 +1,187 @@
+import os
+from contextvars import ContextVar
+from time import perf_counter
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+__all__ = [
+    "ADMISSION_REJECTED",
+    "AUDIT_ARCHIVED",
+    "AUDIT_WRITE_SECONDS",
+    "CONTENT_TYPE_LATEST",
+    "PASSWORD_HASH_SECONDS",
+    "InstrumentedPool",
+    "MetricsMiddleware",
+    "current_route",
+    "instrument_engine",
+    "mark_worker_dead",
+    "record_cache",
+    "render_latest",
+]
+
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request duration by route template",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+DB_STATEMENT_SECONDS = Histogram(
+    "db_statement_duration_seconds", "DB statement execution time", ["role"]
+)
+AUDIT_WRITE_SECONDS = Histogram("audit_write_duration_seconds", "Audit log write time")
+AUDIT_ARCHIVED = Counter("audit_archived_rows", "Audit log rows moved to archive segments")
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "Password hash and verify time, queueing in the worker pool included",
+    ["operation"],
+)
+POOL_SIZE = Gauge("db_pool_size", "Configured pool size", ["role"], multiprocess_mode="livesum")
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections checked out", ["role"], multiprocess_mode="livesum"
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections open above pool size", ["role"], multiprocess_mode="livesum"
+)
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pool connection", ["role"]
+)
+current_route: ContextVar[str] = ContextVar("current_route", default=UNMATCHED_ROUTE)
+
+ADMISSION_REJECTED = Counter(
+    "admission_rejected", "Requests rejected by admission control", ["reason"]
+)
+CACHE_REQUESTS = Counter("cache_requests", "Cache lookups by outcome", ["cache", "result"])
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def mark_worker_dead() -> None:
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        mark_process_dead(os.getpid())
+
+
+def render_latest() -> bytes:
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool reporting checkout wait time under its ``pool_logging_name``.
+    """
+
+    def connect(self):
+        start = perf_counter()
+        try:
+            return super().connect()
+        finally:
+            POOL_CHECKOUT_SECONDS.labels(self.logging_name).observe(perf_counter() - start)
+
+
+def _update_pool_gauges(role: str, pool: AsyncAdaptedQueuePool) -> None:
+    POOL_SIZE.labels(role).set(pool.size())
+    POOL_CHECKED_OUT.labels(role).set(pool.checkedout())
+    POOL_OVERFLOW.labels(role).set(max(pool.overflow(), 0))
+
+
+def instrument_engine(engine: AsyncEngine, role: str) -> None:
+    sync_engine = engine.sync_engine
+    pool = sync_engine.pool
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        DB_STATEMENT_SECONDS.labels(role).observe(perf_counter() - conn.info["metrics_start"].pop())
+        if context is not None and context.cache_hit in (CACHE_HIT, CACHE_MISS):
+            record_cache("sql_compiled", context.cache_hit is CACHE_HIT)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _on_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_start"):
+            conn.info["metrics_start"].pop()
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _update_pool_gauges(role, pool)
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        _update_pool_gauges(role, pool)
+
+    _update_pool_gauges(role, pool)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency and in-flight requests.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route_template(scope)
+        current_route.set(route)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            REQUEST_SECONDS.labels(method, route, str(status_code)).observe(perf_counter() - start)
+
+    @staticmethod
+    def _route_template(scope: Scope) -> str:
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return UNMATCHED_ROUTE
@@ -1,9 +1,12 @@
 from src.models.audit_log import *
+from src.models.change import *
 from src.models.computer import *
 from src.models.computer_assignment import *
 from src.models.department import *
+from src.models.idempotency_key import *
 from src.models.installation import *
 from src.models.license import *
+from src.models.revoked_token import *
 from src.models.software import *
 from src.models.software_type import *
 from src.models.user import *
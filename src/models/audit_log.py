@@ -1,8 +1,8 @@
-
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, ForeignKey, Integer, String
 from sqlalchemy.orm import mapped_column, relationship
 from sqlalchemy.sql import func
 
+from src.dialects import TZDateTime
 from src.models.base import Base
 
 
@@ -12,6 +12,6 @@ class AuditLog(Base):
     log_id = Column(Integer, primary_key=True)
     user_id = mapped_column(ForeignKey("users.user_id"), nullable=False)
     action = Column(String, nullable=False)
-    action_time = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+    action_time = Column(TZDateTime, default=func.now(), nullable=False)
 
     user = relationship("User", back_populates="audit_logs", foreign_keys=[user_id])
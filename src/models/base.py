@@ -1,4 +1,14 @@
+from sqlalchemy import DDL, event
 from sqlalchemy.orm import declarative_base
 
 
 Base = declarative_base()
+
+# Trigram indexes backing /api/search and the GiST exclusion constraint on assignment
+# periods (integer equality inside GiST) need their extensions before any table is created.
+for extension in ("pg_trgm", "btree_gist"):
+    event.listen(
+        Base.metadata,
+        "before_create",
+        DDL(f"CREATE EXTENSION IF NOT EXISTS {extension}").execute_if(dialect="postgresql"),
+    )
@@ -0,0 +1,94 @@
+from sqlalchemy import DDL, BigInteger, Column, Index, Integer, Sequence, String, event
+
+from src.models.base import Base
+
+
+# Tables whose writes feed GET /api/changes, with their primary key column.
+TRACKED_TABLES = {
+    "computers": "computer_id",
+    "software": "software_id",
+    "vendors": "vendor_id",
+    "licenses": "license_id",
+    "installations": "installation_id",
+}
+# Columns kept for the change feed itself and left out of every payload.
+BOOKKEEPING_COLUMNS = frozenset({"updated_seq", "updated_xid"})
+
+
+# Hands out change sequence numbers on PostgreSQL. Writers draw from it without waiting on
+# each other, so sequence order is not commit order: the feed orders changes by the writing
+# transaction's id first and only serves transactions older than every one still running.
+CHANGE_SEQ = Sequence("change_seq", metadata=Base.metadata)
+
+
+class Tombstone(Base):
+    __tablename__ = "tombstones"
+    __table_args__ = (Index("ix_tombstones_change_cursor", "xid", "seq"),)
+
+    seq = Column(BigInteger, primary_key=True)
+    xid = Column(BigInteger, nullable=False, server_default="0")
+    table_name = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=False)
+
+
+# Triggers stamp updated_seq and updated_xid on every insert and update and record a
+# tombstone on every delete, whichever statement or role made the write. They run as their
+# owner, so the application roles need no privileges on change_seq or tombstones.
+_POSTGRESQL_FUNCTIONS = (
+    """
+    CREATE OR REPLACE FUNCTION track_change() RETURNS trigger
+    LANGUAGE plpgsql SECURITY DEFINER SET search_path FROM CURRENT AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO tombstones (seq, xid, table_name, row_id)
+            VALUES (
+                nextval('change_seq'),
+                pg_current_xact_id()::text::bigint,
+                TG_TABLE_NAME,
+                (to_jsonb(OLD) ->> TG_ARGV[0])::integer
+            );
+            RETURN OLD;
+        END IF;
+        NEW.updated_seq := nextval('change_seq');
+        NEW.updated_xid := pg_current_xact_id()::text::bigint;
+        RETURN NEW;
+    END
+    $$
+    """,
+)
+_POSTGRESQL_TRIGGER = """
+    CREATE TRIGGER {table}_track_changes BEFORE INSERT OR UPDATE OR DELETE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION track_change('{key}')
+"""
+# SQLite has no sequences, but it allows one writer at a time, so a counter row will do and
+# sequence order is commit order; updated_xid stays 0.
+_SQLITE_COUNTER = (
+    "CREATE TABLE change_counter (id INTEGER PRIMARY KEY CHECK (id = 1), value INTEGER NOT NULL)",
+    "INSERT INTO change_counter (id, value) VALUES (1, 0)",
+)
+_SQLITE_NEXT_SEQ = "UPDATE change_counter SET value = value + 1 WHERE id = 1;"
+_SQLITE_STAMP = """
+    UPDATE {table} SET updated_seq = (SELECT value FROM change_counter WHERE id = 1)
+    WHERE {key} = NEW.{key};
+"""
+_SQLITE_TRIGGERS = (
+    f"CREATE TRIGGER {{table}}_insert_changes AFTER INSERT ON {{table}} "
+    f"BEGIN {_SQLITE_NEXT_SEQ} {_SQLITE_STAMP} END",
+    # The stamp is itself an update of the row; WHEN keeps it from firing the trigger again.
+    f"CREATE TRIGGER {{table}}_update_changes AFTER UPDATE ON {{table}} "
+    f"WHEN NEW.updated_seq IS OLD.updated_seq BEGIN {_SQLITE_NEXT_SEQ} {_SQLITE_STAMP} END",
+    f"CREATE TRIGGER {{table}}_delete_changes AFTER DELETE ON {{table}} BEGIN {_SQLITE_NEXT_SEQ} "
+    "INSERT INTO tombstones (seq, table_name, row_id) "
+    "SELECT value, '{table}', OLD.{key} FROM change_counter WHERE id = 1; END",
+)
+
+for statement in _POSTGRESQL_FUNCTIONS:
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in _SQLITE_COUNTER:
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for table, key in TRACKED_TABLES.items():
+    trigger = _POSTGRESQL_TRIGGER.format(table=table, key=key)
+    event.listen(Base.metadata, "after_create", DDL(trigger).execute_if(dialect="postgresql"))
+    for trigger in _SQLITE_TRIGGERS:
+        trigger = trigger.format(table=table, key=key)
+        event.listen(Base.metadata, "after_create", DDL(trigger).execute_if(dialect="sqlite"))
@@ -1,20 +1,39 @@
-from sqlalchemy import Column, DateTime, Enum, Integer, String
+from sqlalchemy import BigInteger, Column, Enum, Index, Integer, String
 from sqlalchemy.orm import relationship
 
+from src.dialects import TZDateTime
 from src.enums import ComputerType
 from src.models.base import Base
 
 
 class Computer(Base):
     __tablename__ = "computers"
+    __table_args__ = (
+        Index(
+            "ix_computers_inventory_number_trgm",
+            "inventory_number",
+            postgresql_using="gin",
+            postgresql_ops={"inventory_number": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_computers_change_cursor", "updated_xid", "updated_seq"),
+    )
 
     computer_id = Column(Integer, primary_key=True)
     inventory_number = Column(String, nullable=False, unique=True)
-    computer_type = Column(Enum(ComputerType), nullable=False)
-    purchase_date = Column(DateTime(timezone=True), nullable=False)
-    status = Column(String, nullable=False, default="active")
+    computer_type = Column(Enum(ComputerType), nullable=False, index=True)
+    purchase_date = Column(TZDateTime, nullable=False, index=True)
+    status = Column(String, nullable=False, default="active", index=True)
+    updated_seq = Column(BigInteger, nullable=False, server_default="0")
+    updated_xid = Column(BigInteger, nullable=False, server_default="0")
 
     installations = relationship("Installation", cascade="all,delete", back_populates="computer")
+    assignments = relationship(
+        "ComputerAssignment", cascade="all,delete", back_populates="computer"
+    )
     assignment = relationship(
-        "ComputerAssignment", cascade="all,delete", back_populates="computer", uselist=False
+        "ComputerAssignment",
+        primaryjoin="and_(Computer.computer_id == ComputerAssignment.computer_id, "
+        "ComputerAssignment.period.contains(func.now()))",
+        uselist=False,
+        viewonly=True,
     )
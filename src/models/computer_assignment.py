@@ -1,20 +1,39 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, Computed, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import mapped_column, relationship
 
+from src.dialects import TimeRange, TZDateTime
 from src.models.base import Base
 
 
+_PERIOD = TimeRange("start_date", "end_date")
+
+
 class ComputerAssignment(Base):
     __tablename__ = "computer_assignments"
+    __table_args__ = (
+        # A computer belongs to at most one department at any instant.
+        ExcludeConstraint(
+            ("computer_id", "="),
+            ("period", "&&"),
+            name="ex_computer_assignments_computer_period",
+            using="gist",
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_computer_assignments_period", "period", postgresql_using="gist").ddl_if(
+            dialect="postgresql"
+        ),
+    )
 
     assignment_id = Column(Integer, primary_key=True)
-    computer_id = mapped_column(ForeignKey("computers.computer_id"), nullable=False, unique=True)
-    dept_id = mapped_column(ForeignKey("departments.dept_id"), nullable=False)
-    start_date = Column(DateTime(timezone=True), nullable=False)
-    end_date = Column(DateTime(timezone=True))
+    computer_id = mapped_column(ForeignKey("computers.computer_id"), nullable=False, index=True)
+    dept_id = mapped_column(ForeignKey("departments.dept_id"), nullable=False, index=True)
+    start_date = Column(TZDateTime, nullable=False)
+    end_date = Column(TZDateTime)
+    # Half-open, so a reassignment can end the previous period at its own start date.
+    period = Column(_PERIOD, Computed(_PERIOD.generated()), nullable=False)
     doc_number = Column(String, nullable=False)
-    doc_date = Column(DateTime(timezone=True), nullable=False)
+    doc_date = Column(TZDateTime, nullable=False)
     doc_type = Column(String, nullable=False)
 
-    computer = relationship("Computer", back_populates="assignment", foreign_keys=[computer_id])
+    computer = relationship("Computer", back_populates="assignments", foreign_keys=[computer_id])
     department = relationship("Department", back_populates="assignments", foreign_keys=[dept_id])
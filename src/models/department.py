@@ -15,3 +15,9 @@ class Department(Base):
     assignments = relationship(
         "ComputerAssignment", cascade="all,delete", back_populates="department"
     )
+    current_assignments = relationship(
+        "ComputerAssignment",
+        primaryjoin="and_(Department.dept_id == ComputerAssignment.dept_id, "
+        "ComputerAssignment.period.contains(func.now()))",
+        viewonly=True,
+    )
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, ForeignKey, Integer, LargeBinary, String
+from sqlalchemy.orm import mapped_column
+
+from src.dialects import TZDateTime
+from src.models.base import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    user_id = mapped_column(ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    # Null until the first execution finishes successfully.
+    status_code = Column(Integer)
+    media_type = Column(String)
+    body = Column(LargeBinary)
+    created_at = Column(TZDateTime, nullable=False, index=True)
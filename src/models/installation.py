@@ -1,16 +1,20 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, Integer
 from sqlalchemy.orm import mapped_column, relationship
 
+from src.dialects import TZDateTime
 from src.models.base import Base
 
 
 class Installation(Base):
     __tablename__ = "installations"
+    __table_args__ = (Index("ix_installations_change_cursor", "updated_xid", "updated_seq"),)
 
     installation_id = Column(Integer, primary_key=True)
-    computer_id = mapped_column(ForeignKey("computers.computer_id"), nullable=False)
-    license_id = mapped_column(ForeignKey("licenses.license_id"), nullable=False)
-    install_date = Column(DateTime(timezone=True), nullable=False)
+    computer_id = mapped_column(ForeignKey("computers.computer_id"), nullable=False, index=True)
+    license_id = mapped_column(ForeignKey("licenses.license_id"), nullable=False, index=True)
+    install_date = Column(TZDateTime, nullable=False, index=True)
+    updated_seq = Column(BigInteger, nullable=False, server_default="0")
+    updated_xid = Column(BigInteger, nullable=False, server_default="0")
 
     computer = relationship("Computer", back_populates="installations", foreign_keys=[computer_id])
     license = relationship("License", back_populates="installations", foreign_keys=[license_id])
@@ -1,18 +1,22 @@
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer
+from sqlalchemy import BigInteger, Column, Float, ForeignKey, Index, Integer
 from sqlalchemy.orm import mapped_column, relationship
 
+from src.dialects import TZDateTime
 from src.models.base import Base
 
 
 class License(Base):
     __tablename__ = "licenses"
+    __table_args__ = (Index("ix_licenses_change_cursor", "updated_xid", "updated_seq"),)
 
     license_id = Column(Integer, primary_key=True)
-    software_id = mapped_column(ForeignKey("software.software_id"), nullable=False)
-    vendor_id = mapped_column(ForeignKey("vendors.vendor_id"), nullable=False)
-    start_date = Column(DateTime(timezone=True), nullable=False)
-    end_date = Column(DateTime(timezone=True), nullable=False)
+    software_id = mapped_column(ForeignKey("software.software_id"), nullable=False, index=True)
+    vendor_id = mapped_column(ForeignKey("vendors.vendor_id"), nullable=False, index=True)
+    start_date = Column(TZDateTime, nullable=False, index=True)
+    end_date = Column(TZDateTime, nullable=False, index=True)
     price_per_unit = Column(Float, nullable=False)
+    updated_seq = Column(BigInteger, nullable=False, server_default="0")
+    updated_xid = Column(BigInteger, nullable=False, server_default="0")
 
     software = relationship("Software", back_populates="licenses", foreign_keys=[software_id])
     vendor = relationship("Vendor", back_populates="licenses", foreign_keys=[vendor_id])
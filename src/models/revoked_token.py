@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String
+from sqlalchemy.sql import func
+
+from src.dialects import TZDateTime
+from src.models.base import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    # Session id (``sid``) of a logged out session or ``jti`` of a rotated refresh token.
+    token_id = Column(String, primary_key=True)
+    expires_at = Column(TZDateTime, nullable=False, index=True)
+    revoked_at = Column(TZDateTime, default=func.now(), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import mapped_column, relationship
 
 from src.models.base import Base
@@ -6,13 +6,36 @@ from src.models.base import Base
 
 class Software(Base):
     __tablename__ = "software"
+    __table_args__ = (
+        Index(
+            "ix_software_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_software_code_trgm",
+            "code",
+            postgresql_using="gin",
+            postgresql_ops={"code": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_software_manufacturer_trgm",
+            "manufacturer",
+            postgresql_using="gin",
+            postgresql_ops={"manufacturer": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_software_change_cursor", "updated_xid", "updated_seq"),
+    )
 
     software_id = Column(Integer, primary_key=True)
-    sw_type_id = mapped_column(ForeignKey("software_types.sw_type_id"), nullable=False)
+    sw_type_id = mapped_column(ForeignKey("software_types.sw_type_id"), nullable=False, index=True)
     code = Column(String, nullable=False, unique=True)
     name = Column(String, nullable=False)
     short_name = Column(String)
     manufacturer = Column(String, nullable=False)
+    updated_seq = Column(BigInteger, nullable=False, server_default="0")
+    updated_xid = Column(BigInteger, nullable=False, server_default="0")
 
     licenses = relationship("License", cascade="all,delete", back_populates="software")
     sw_type = relationship("SoftwareType", back_populates="software", foreign_keys=[sw_type_id])
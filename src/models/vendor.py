@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from src.models.base import Base
@@ -6,11 +6,22 @@ from src.models.base import Base
 
 class Vendor(Base):
     __tablename__ = "vendors"
+    __table_args__ = (
+        Index(
+            "ix_vendors_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_vendors_change_cursor", "updated_xid", "updated_seq"),
+    )
 
     vendor_id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     address = Column(String, nullable=False)
     phone = Column(String, nullable=False, unique=True)
     website = Column(String)
+    updated_seq = Column(BigInteger, nullable=False, server_default="0")
+    updated_xid = Column(BigInteger, nullable=False, server_default="0")
 
     licenses = relationship("License", cascade="all,delete", back_populates="vendor")
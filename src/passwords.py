@@ -0,0 +1,131 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import TypeVar
+
+from settings import Settings
+from src.exceptions import ServiceUnavailable
+from src.metrics import ADMISSION_REJECTED, PASSWORD_HASH_SECONDS
+
+
+T = TypeVar("T")
+
+SCRYPT_PREFIX = "scrypt"
+SCRYPT_SALT_BYTES = 16
+SCRYPT_KEY_BYTES = 32
+HASH_SEPARATOR = "$"
+LEGACY_SHA256_LENGTH = 64
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii")
+
+
+def _b64decode(encoded: str) -> bytes:
+    return base64.b64decode(encoded.encode("ascii"))
+
+
+class PasswordHasher:
+    """
+    scrypt password hashing run off the event loop in a bounded thread pool.
+
+    ``hashlib.scrypt`` releases the GIL, so threads hash in parallel. Calls beyond the
+    pool size wait in a queue of at most ``password_hash_queue`` entries; past that the
+    request is rejected with 503 instead of piling up behind a login burst.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self._n = settings.password_scrypt_n
+        self._r = settings.password_scrypt_r
+        self._p = settings.password_scrypt_p
+        # scrypt needs 128 * n * r bytes; OpenSSL refuses anything over maxmem.
+        self._maxmem = 256 * self._n * self._r
+        workers = settings.password_hash_workers or min(4, os.cpu_count() or 1)
+        self._capacity = workers + settings.password_hash_queue
+        self._retry_after = settings.admission_retry_after
+        self._pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        # Checked for unknown usernames, so they cost one scrypt run like a wrong password.
+        # The key is random, so no password matches it.
+        self.dummy_hash = HASH_SEPARATOR.join(
+            (
+                SCRYPT_PREFIX,
+                str(self._n),
+                str(self._r),
+                str(self._p),
+                _b64encode(os.urandom(SCRYPT_SALT_BYTES)),
+                _b64encode(os.urandom(SCRYPT_KEY_BYTES)),
+            )
+        )
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", self._hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._submit("verify", self._verify, password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return hashed.split(HASH_SEPARATOR)[:4] != [
+            SCRYPT_PREFIX,
+            str(self._n),
+            str(self._r),
+            str(self._p),
+        ]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _submit(self, operation: str, func: Callable[..., T], *args) -> T:
+        if self._pending >= self._capacity:
+            ADMISSION_REJECTED.labels("password_hash").inc()
+            raise ServiceUnavailable("Server is busy, retry later", retry_after=self._retry_after)
+
+        self._pending += 1
+        start = perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+            PASSWORD_HASH_SECONDS.labels(operation).observe(perf_counter() - start)
+
+    def _hash(self, password: str) -> str:
+        salt = os.urandom(SCRYPT_SALT_BYTES)
+        key = self._scrypt(password, salt, self._n, self._r, self._p)
+        return HASH_SEPARATOR.join(
+            (
+                SCRYPT_PREFIX,
+                str(self._n),
+                str(self._r),
+                str(self._p),
+                _b64encode(salt),
+                _b64encode(key),
+            )
+        )
+
+    def _verify(self, password: str, hashed: str) -> bool:
+        parts = hashed.split(HASH_SEPARATOR)
+        if parts[0] == SCRYPT_PREFIX and len(parts) == 6:
+            _, n, r, p, salt, key = parts
+            expected = _b64decode(key)
+            actual = self._scrypt(password, _b64decode(salt), int(n), int(r), int(p))
+            return hmac.compare_digest(actual, expected)
+        if len(hashed) == LEGACY_SHA256_LENGTH:
+            legacy = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(legacy, hashed)
+        return False
+
+    def _scrypt(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(
+            password.encode(),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=max(self._maxmem, 256 * n * r),
+            dklen=SCRYPT_KEY_BYTES,
+        )
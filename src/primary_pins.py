@@ -0,0 +1,58 @@
+from http.cookies import SimpleCookie
+from math import ceil
+from time import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+PRIMARY_PIN_COOKIE = "primary_until"
+PRIMARY_PIN_STATE = "pin_primary"
+
+
+def pinned_until(request: Request) -> float:
+    try:
+        return float(request.cookies.get(PRIMARY_PIN_COOKIE, 0))
+    except ValueError:
+        return 0
+
+
+class PrimaryPinMiddleware:
+    """
+    Pure ASGI middleware carrying the read-your-writes pin with the client.
+
+    A successful request that wrote through a primary session (``request.state.pin_primary``)
+    sets a cookie holding the wall-clock time until which the client's reads must go to the
+    primary, so the pin holds whichever worker or host serves the next read. Sessions
+    compare it with ``time()``; a forged value can only send reads to the primary.
+    """
+
+    def __init__(self, app: ASGIApp, pin_seconds: float) -> None:
+        self.app = app
+        self._pin_seconds = pin_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] < 400
+                and scope.get("state", {}).get(PRIMARY_PIN_STATE)
+            ):
+                MutableHeaders(scope=message).append("set-cookie", self._cookie())
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _cookie(self) -> str:
+        cookie = SimpleCookie()
+        cookie[PRIMARY_PIN_COOKIE] = f"{time() + self._pin_seconds:.3f}"
+        cookie[PRIMARY_PIN_COOKIE]["max-age"] = ceil(self._pin_seconds)
+        cookie[PRIMARY_PIN_COOKIE]["path"] = "/"
+        cookie[PRIMARY_PIN_COOKIE]["httponly"] = True
+        cookie[PRIMARY_PIN_COOKIE]["samesite"] = "lax"
+        return cookie.output(header="").strip()
@@ -0,0 +1,386 @@
+import csv
+import io
+import json
+import math
+import re
+import zipfile
+from collections.abc import AsyncIterator, Callable, Sequence
+from datetime import UTC, date, datetime
+from decimal import Decimal
+from typing import Any
+from xml.sax.saxutils import escape
+
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+CSV_MEDIA_TYPE = "text/csv"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+ARROW_BATCH_ROWS = 65_536
+SPREADSHEET_CHUNK_BYTES = 64 * 1024
+XLSX_MAX_ROWS = 1_048_576
+
+SUPPORTED_MEDIA_TYPES = (JSON_MEDIA_TYPE,)
+if msgpack is not None:
+    SUPPORTED_MEDIA_TYPES += (MSGPACK_MEDIA_TYPE,)
+if pa is not None:
+    SUPPORTED_MEDIA_TYPES += (ARROW_STREAM_MEDIA_TYPE,)
+
+SPREADSHEET_MEDIA_TYPES = (CSV_MEDIA_TYPE, XLSX_MEDIA_TYPE)
+EXPORT_MEDIA_TYPES = SUPPORTED_MEDIA_TYPES + SPREADSHEET_MEDIA_TYPES
+# Encoded while rows are fetched through a server-side cursor; see stream_export.
+STREAMED_MEDIA_TYPES = SPREADSHEET_MEDIA_TYPES
+if pa is not None:
+    STREAMED_MEDIA_TYPES += (ARROW_STREAM_MEDIA_TYPE,)
+SPREADSHEET_EXTENSIONS = {CSV_MEDIA_TYPE: "csv", XLSX_MEDIA_TYPE: "xlsx"}
+
+
+def negotiate(accept: str | None, supported: Sequence[str] = SUPPORTED_MEDIA_TYPES) -> str:
+    """
+    Pick the supported media type with the highest quality in ``Accept``.
+
+    Anything unsupported, wildcards included, falls back to JSON.
+    """
+    best, best_quality = JSON_MEDIA_TYPE, 0.0
+    for item in (accept or "").split(","):
+        media_type, *params = (part.strip() for part in item.split(";"))
+        if media_type not in supported:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def render_json(content: Any) -> bytes:
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_json_default,
+    ).encode("utf-8")
+
+
+def render_records(
+    media_type: str, getters: dict[str, Callable[[Any], Any]], models: Sequence
+) -> bytes:
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        return _render_arrow(
+            {name: [get(model) for model in models] for name, get in getters.items()}
+        )
+    return _render_rows(
+        media_type, [{name: get(model) for name, get in getters.items()} for model in models]
+    )
+
+
+def render_rows(media_type: str, rows: list[dict]) -> bytes:
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        names = rows[0].keys() if rows else ()
+        return _render_arrow({name: [row[name] for row in rows] for name in names})
+    return _render_rows(media_type, rows)
+
+
+def _render_rows(media_type: str, rows: list[dict]) -> bytes:
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(rows, datetime=True)
+    return render_json(rows)
+
+
+def _render_arrow(columns: dict[str, list]) -> bytes:
+    # Types are inferred over whole columns so every record batch shares one schema.
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=ARROW_BATCH_ROWS):
+            writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def stream_export(media_type: str, rows: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """
+    Encode rows as CSV, XLSX or Arrow IPC while they are fetched, in chunks of about
+    ``SPREADSHEET_CHUNK_BYTES`` or record batches of ``ARROW_BATCH_ROWS``, so memory does
+    not grow with the row count.
+    """
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        return _stream_arrow(rows)
+    if media_type == XLSX_MEDIA_TYPE:
+        return _stream_xlsx(rows)
+    return _stream_csv(rows)
+
+
+def _arrow_batch(columns: dict[str, list], schema: "pa.Schema | None") -> "pa.RecordBatch":
+    if schema is None:
+        arrays = [pa.array(values) for values in columns.values()]
+        # A column that is all null in the first batch fixes no type; strings can hold
+        # whatever later batches bring.
+        arrays = [
+            array.cast(pa.string()) if pa.types.is_null(array.type) else array for array in arrays
+        ]
+        return pa.record_batch(arrays, names=list(columns))
+    arrays = []
+    for field, values in zip(schema, columns.values(), strict=True):
+        if pa.types.is_string(field.type):
+            values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.record_batch(arrays, schema=schema)
+
+
+async def _stream_arrow(rows: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    # Rows are gathered column by column into record batches; the first batch fixes the
+    # schema every later batch is built with.
+    sink = _ChunkSink()
+    schema = writer = None
+    columns: dict[str, list] = {}
+    count = 0
+    async for row in rows:
+        if not columns:
+            columns = {name: [] for name in row}
+        for name, values in columns.items():
+            values.append(row[name])
+        count += 1
+        if count == ARROW_BATCH_ROWS:
+            batch = _arrow_batch(columns, schema)
+            if writer is None:
+                schema = batch.schema
+                writer = pa.ipc.new_stream(sink, schema)
+            writer.write_batch(batch)
+            columns = {name: [] for name in columns}
+            count = 0
+            yield sink.drain()
+
+    if count:
+        batch = _arrow_batch(columns, schema)
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, batch.schema)
+        writer.write_batch(batch)
+    if writer is None:
+        writer = pa.ipc.new_stream(sink, pa.schema([]))
+    writer.close()
+    yield sink.drain()
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value  # keep spreadsheet apps from evaluating it as a formula
+    return value
+
+
+async def _stream_csv(rows: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")  # lets Excel detect UTF-8
+    header = None
+    async for row in rows:
+        if header is None:
+            header = list(row)
+            writer.writerow(header)
+        writer.writerow([_csv_value(row[name]) for name in header])
+        if buffer.tell() >= SPREADSHEET_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+_XLSX_DATE_STYLE = 1
+_XLSX_DATETIME_STYLE = 2
+
+_XLSX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships/officeDocument" Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    "</cellXfs></styleSheet>"
+)
+_XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_XLSX_SHEET_END = "</sheetData></worksheet>"
+
+
+def _xlsx_cell(value: Any) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, int | Decimal) or (isinstance(value, float) and math.isfinite(value)):
+        return f"<c><v>{value}</v></c>"
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        serial = (value - _EXCEL_EPOCH).total_seconds() / 86_400
+        return f'<c s="{_XLSX_DATETIME_STYLE}"><v>{serial}</v></c>'
+    if isinstance(value, date):
+        serial = (value - _EXCEL_EPOCH.date()).days
+        return f'<c s="{_XLSX_DATE_STYLE}"><v>{serial}</v></c>'
+    text = escape(_XML_ILLEGAL.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values: Any) -> str:
+    return "<row>" + "".join(_xlsx_cell(value) for value in values) + "</row>"
+
+
+def _xlsx_workbook(sheets: int) -> str:
+    entries = "".join(
+        f'<sheet name="Sheet{i}" sheetId="{i}" r:id="rId{i}"/>' for i in range(1, sheets + 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f"<sheets>{entries}</sheets></workbook>"
+    )
+
+
+def _xlsx_workbook_rels(sheets: int) -> str:
+    relationships = "".join(
+        f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/'
+        f'2006/relationships/worksheet" Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, sheets + 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'{relationships}<Relationship Id="rId{sheets + 1}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/></Relationships>'
+    )
+
+
+def _xlsx_content_types(sheets: int) -> str:
+    worksheets = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, sheets + 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        f"{worksheets}</Types>"
+    )
+
+
+class _ChunkSink:
+    # Write-only target for ZipFile and Arrow's stream writer. Without tell() and seek()
+    # ZipFile streams every member with a trailing data descriptor, so nothing is ever
+    # rewritten in place.
+    closed = False
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _stream_xlsx(rows: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    # Worksheets come first in the archive; the workbook parts that list them are written
+    # last, once the row count has decided how many sheets were needed.
+    sink = _ChunkSink()
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+    sheets = 0
+    sheet = None
+    header = None
+    sheet_rows = XLSX_MAX_ROWS
+    pending: list[str] = []
+    pending_size = 0
+    async for row in rows:
+        if header is None:
+            header = list(row)
+        if sheet_rows == XLSX_MAX_ROWS:
+            if sheet is not None:
+                sheet.write("".join(pending).encode("utf-8") + _XLSX_SHEET_END.encode())
+                sheet.close()
+                pending, pending_size = [], 0
+            sheets += 1
+            sheet = archive.open(f"xl/worksheets/sheet{sheets}.xml", "w")
+            pending.append(_XLSX_SHEET_START + _xlsx_row(header))
+            sheet_rows = 1
+        xml = _xlsx_row(row[name] for name in header)
+        pending.append(xml)
+        pending_size += len(xml)
+        sheet_rows += 1
+        if pending_size >= SPREADSHEET_CHUNK_BYTES:
+            sheet.write("".join(pending).encode("utf-8"))
+            pending, pending_size = [], 0
+            yield sink.drain()
+
+    if sheet is None:
+        sheets = 1
+        sheet = archive.open("xl/worksheets/sheet1.xml", "w")
+        pending.append(_XLSX_SHEET_START)
+    sheet.write("".join(pending).encode("utf-8") + _XLSX_SHEET_END.encode())
+    sheet.close()
+    archive.writestr("xl/styles.xml", _XLSX_STYLES)
+    archive.writestr("xl/workbook.xml", _xlsx_workbook(sheets))
+    archive.writestr("xl/_rels/workbook.xml.rels", _xlsx_workbook_rels(sheets))
+    archive.writestr("_rels/.rels", _XLSX_RELS)
+    archive.writestr("[Content_Types].xml", _xlsx_content_types(sheets))
+    archive.close()
+    yield sink.drain()
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import os
+from collections.abc import AsyncIterator, Callable
+from dataclasses import asdict, dataclass, replace
+from datetime import UTC, datetime, timedelta
+from hashlib import sha256
+from pathlib import Path
+from uuid import uuid4
+
+from settings import Settings
+from src.enums import ReportJobStatus, ReportKind
+from src.logger import get_logger
+from src.metrics import record_cache
+from src.renderers import render_json
+
+
+logger = get_logger()
+
+JOB_SUFFIX = ".job.json"
+RESULT_SUFFIX = ".result.json"
+LOCK_SUFFIX = ".lock"
+CLAIM_SUFFIX = ".claim"
+CLEANUP_INTERVAL = 60
+FINISHED = (ReportJobStatus.done.value, ReportJobStatus.failed.value)
+
+
+@dataclass(frozen=True)
+class ReportJob:
+    id: str
+    kind: str
+    params: dict[str, str]
+    role: str
+    user_id: int
+    status: str
+    created_at: str
+    updated_at: str
+    error: str | None = None
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+class ReportJobs:
+    """
+    Runs report generation in background tasks and keeps status and results on disk.
+
+    Every worker shares ``report_jobs_dir``, so any of them can answer a status poll. A
+    ``<fingerprint>.lock`` file, hard-linked into place so it appears complete, points at
+    the pending or running job for a (kind, params, role), which deduplicates identical
+    submissions across workers. Results are streamed row by row into a JSON array and expire after
+    ``report_job_ttl_seconds``.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self._directory = Path(settings.report_jobs_dir)
+        self._ttl = timedelta(seconds=settings.report_job_ttl_seconds)
+        self._timeout = settings.report_job_timeout_seconds
+        self._slots = asyncio.Semaphore(settings.report_job_workers)
+        self._tasks: set[asyncio.Task] = set()
+
+    def submit(
+        self,
+        kind: ReportKind,
+        params: dict[str, str],
+        role: str,
+        user_id: int,
+        produce: Callable[[], AsyncIterator[dict]],
+    ) -> ReportJob:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        fingerprint = sha256(repr((kind.value, sorted(params.items()), role)).encode()).hexdigest()
+        lock = self._directory / f"{fingerprint}{LOCK_SUFFIX}"
+        now = _now()
+        job = self._save(
+            ReportJob(
+                id=uuid4().hex,
+                kind=kind.value,
+                params=params,
+                role=role,
+                user_id=user_id,
+                status=ReportJobStatus.pending.value,
+                created_at=now,
+                updated_at=now,
+            )
+        )
+        # The lock is published by linking a complete file, so a reader never sees it empty
+        # or pointing at a job file that does not exist yet.
+        claim = self._directory / f"{job.id}{CLAIM_SUFFIX}"
+        claim.write_text(job.id)
+        try:
+            while True:
+                try:
+                    os.link(claim, lock)
+                except FileExistsError:
+                    existing = self._active(lock)
+                    if existing is None:
+                        lock.unlink(missing_ok=True)
+                        continue
+                    record_cache("report_jobs", True)
+                    (self._directory / f"{job.id}{JOB_SUFFIX}").unlink(missing_ok=True)
+                    return existing
+                break
+        finally:
+            claim.unlink(missing_ok=True)
+
+        record_cache("report_jobs", False)
+        task = asyncio.create_task(self._run(job, lock, produce))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> ReportJob | None:
+        path = self._directory / f"{job_id}{JOB_SUFFIX}"
+        if not job_id.isalnum() or not path.is_file():
+            return None
+        return ReportJob(**json.loads(path.read_text()))
+
+    def result_path(self, job: ReportJob) -> Path:
+        return self._directory / f"{job.id}{RESULT_SUFFIX}"
+
+    async def monitor(self) -> None:
+        while True:
+            await asyncio.sleep(CLEANUP_INTERVAL)
+            try:
+                await asyncio.to_thread(self._cleanup)
+            except OSError as err:
+                logger.warning(f"Report job cleanup failed: {err}")
+
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(
+        self, job: ReportJob, lock: Path, produce: Callable[[], AsyncIterator[dict]]
+    ) -> None:
+        try:
+            async with self._slots:
+                job = self._save(replace(job, status=ReportJobStatus.running.value))
+                async with asyncio.timeout(self._timeout):
+                    await self._write_result(job, produce)
+            self._save(replace(job, status=ReportJobStatus.done.value))
+        except asyncio.CancelledError:
+            self._save(replace(job, status=ReportJobStatus.failed.value, error="Cancelled"))
+            raise
+        except Exception as err:
+            logger.error(f"Report job {job.id} failed: {err!r}")
+            self._save(replace(job, status=ReportJobStatus.failed.value, error=str(err)))
+        finally:
+            self._release(lock, job)
+
+    async def _write_result(
+        self, job: ReportJob, produce: Callable[[], AsyncIterator[dict]]
+    ) -> None:
+        path = self.result_path(job)
+        partial = path.with_suffix(".partial")
+        with open(partial, "wb") as result:
+            result.write(b"[")
+            separator = b""
+            async for row in produce():
+                result.write(separator)
+                result.write(render_json(row))
+                separator = b","
+            result.write(b"]")
+        os.replace(partial, path)
+
+    def _save(self, job: ReportJob) -> ReportJob:
+        job = replace(job, updated_at=_now())
+        path = self._directory / f"{job.id}{JOB_SUFFIX}"
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(asdict(job)))
+        os.replace(temporary, path)
+        return job
+
+    def _release(self, lock: Path, job: ReportJob) -> None:
+        # A submission may have taken over the lock after this job's timeout passed.
+        try:
+            if lock.read_text() == job.id:
+                lock.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def _active(self, lock: Path) -> ReportJob | None:
+        try:
+            job = self.get(lock.read_text())
+        except (OSError, ValueError):
+            return None
+        if job is None or job.status in FINISHED:
+            return None
+        if datetime.fromisoformat(job.created_at) + timedelta(seconds=self._timeout) < (
+            datetime.now(UTC)
+        ):
+            return None  # its worker died before finishing
+        return job
+
+    def _cleanup(self) -> None:
+        now = datetime.now(UTC)
+        for path in self._directory.glob(f"*{JOB_SUFFIX}"):
+            try:
+                job = ReportJob(**json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+            updated_at = datetime.fromisoformat(job.updated_at)
+            expired = job.status in FINISHED and updated_at + self._ttl < now
+            abandoned = updated_at + timedelta(seconds=self._timeout) + self._ttl < now
+            if expired or abandoned:
+                self.result_path(job).unlink(missing_ok=True)
+                path.unlink(missing_ok=True)
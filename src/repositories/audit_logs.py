@@ -1,34 +1,74 @@
-from sqlalchemy import desc, select
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, desc, select
 from sqlalchemy.exc import IntegrityError, ProgrammingError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
+from sqlalchemy.types import Integer
 
+from src.dialects import ArrayOf, any_of
 from src.logger import get_logger
+from src.metrics import AUDIT_WRITE_SECONDS
 from src.models import AuditLog
 
 
 logger = get_logger()
 
+_GET_MANY = (
+    select(AuditLog)
+    .options(joinedload(AuditLog.user))
+    .order_by(desc(AuditLog.action_time))
+    .limit(bindparam("limit"))
+)
+_GET_RANGE = _GET_MANY.where(
+    AuditLog.action_time >= bindparam("start"), AuditLog.action_time < bindparam("end")
+)
+_GET_EXPIRED = (
+    select(AuditLog)
+    .options(joinedload(AuditLog.user))
+    .where(AuditLog.action_time < bindparam("before"))
+    .order_by(AuditLog.log_id)
+    .limit(bindparam("limit"))
+)
+_DELETE_BY_IDS = delete(AuditLog).where(
+    any_of(AuditLog.log_id, bindparam("ids", type_=ArrayOf(Integer)))
+)
+
 
 class AuditLogRepo:
     async def get_many(self, session: AsyncSession, limit: int = 50) -> list[AuditLog]:
-        query = (
-            select(AuditLog)
-            .options(joinedload(AuditLog.user))
-            .order_by(desc(AuditLog.action_time))
-            .limit(limit)
-        )
         try:
-            models = (await session.scalars(query)).all()
+            models = (await session.scalars(_GET_MANY, {"limit": limit})).all()
+        except ProgrammingError as err:
+            logger.error(f"Programming error: {err}")
+            raise ValueError("Insufficient permissions") from err
+        return models
+
+    async def get_range(
+        self, session: AsyncSession, start: datetime, end: datetime, limit: int = 50
+    ) -> list[AuditLog]:
+        try:
+            models = (
+                await session.scalars(_GET_RANGE, {"start": start, "end": end, "limit": limit})
+            ).all()
         except ProgrammingError as err:
             logger.error(f"Programming error: {err}")
             raise ValueError("Insufficient permissions") from err
         return models
 
+    async def get_expired(
+        self, session: AsyncSession, before: datetime, limit: int
+    ) -> list[AuditLog]:
+        return (await session.scalars(_GET_EXPIRED, {"before": before, "limit": limit})).all()
+
+    async def delete_by_ids(self, session: AsyncSession, ids: list[int]) -> None:
+        await session.execute(_DELETE_BY_IDS, {"ids": ids})
+
     async def create(self, session: AsyncSession, model: AuditLog) -> AuditLog:
         session.add(model)
         try:
-            await session.flush()
+            with AUDIT_WRITE_SECONDS.time():
+                await session.flush()
         except IntegrityError as err:
             logger.error(f"Integrity error: {err}")
             raise ValueError("Audit Log already exists") from err
@@ -0,0 +1,76 @@
+from sqlalchemy import (
+    Integer,
+    Row,
+    RowMapping,
+    bindparam,
+    false,
+    literal,
+    select,
+    true,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.dialects import ArrayOf, TransactionHorizon, any_of
+from src.models import BOOKKEEPING_COLUMNS, TRACKED_TABLES, Base, Tombstone
+
+
+_TABLES = {name: Base.metadata.tables[name] for name in TRACKED_TABLES}
+
+_AFTER_CURSOR = tuple_(bindparam("xid"), bindparam("seq"))
+
+# One statement, so all tables are read from the same snapshot. Every branch is a range
+# scan on its (xid, seq) index, merged in cursor order up to the limit. Transactions at or
+# past the horizon may still commit changes, so nothing of theirs is served yet; everything
+# below it is final, so a client's cursor never skips a change that commits later.
+_GET_SINCE = (
+    union_all(
+        *(
+            select(
+                table.c.updated_xid.label("xid"),
+                table.c.updated_seq.label("seq"),
+                literal(name).label("table_name"),
+                table.c[TRACKED_TABLES[name]].label("row_id"),
+                false().label("deleted"),
+            ).where(
+                tuple_(table.c.updated_xid, table.c.updated_seq) > _AFTER_CURSOR,
+                table.c.updated_xid < TransactionHorizon(),
+            )
+            for name, table in _TABLES.items()
+        ),
+        select(
+            Tombstone.xid,
+            Tombstone.seq,
+            Tombstone.table_name,
+            Tombstone.row_id,
+            true().label("deleted"),
+        ).where(
+            tuple_(Tombstone.xid, Tombstone.seq) > _AFTER_CURSOR,
+            Tombstone.xid < TransactionHorizon(),
+        ),
+    )
+    .order_by("xid", "seq")
+    .limit(bindparam("limit"))
+)
+_GET_ROWS = {
+    name: select(*(column for column in table.c if column.name not in BOOKKEEPING_COLUMNS)).where(
+        any_of(table.c[TRACKED_TABLES[name]], bindparam("ids", type_=ArrayOf(Integer)))
+    )
+    for name, table in _TABLES.items()
+}
+
+
+class ChangeRepo:
+    async def get_since(
+        self, session: AsyncSession, since: tuple[int, int], limit: int
+    ) -> list[Row]:
+        xid, seq = since
+        return (await session.execute(_GET_SINCE, {"xid": xid, "seq": seq, "limit": limit})).all()
+
+    async def get_rows(
+        self, session: AsyncSession, table_name: str, ids: list[int]
+    ) -> dict[int, RowMapping]:
+        key = TRACKED_TABLES[table_name]
+        rows = (await session.execute(_GET_ROWS[table_name], {"ids": ids})).mappings()
+        return {row[key]: row for row in rows}
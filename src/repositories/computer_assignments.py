@@ -1,21 +1,89 @@
+from datetime import datetime
+
+from sqlalchemy import bindparam, or_, select
 from sqlalchemy.exc import IntegrityError, ProgrammingError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
+from src.dialects import TZDateTime
 from src.logger import get_logger
 from src.models import ComputerAssignment
 
 
 logger = get_logger()
 
+_BY_COMPUTER = ComputerAssignment.computer_id == bindparam("computer_id")
+_GET_AT = (
+    select(ComputerAssignment)
+    .where(_BY_COMPUTER, ComputerAssignment.period.contains(bindparam("at", type_=TZDateTime())))
+    .with_for_update()
+)
+_START = bindparam("start", type_=TZDateTime())
+_END = bindparam("end", type_=TZDateTime())
+_GET_OVERLAPPING = (
+    select(ComputerAssignment)
+    .where(
+        _BY_COMPUTER,
+        ComputerAssignment.assignment_id != bindparam("exclude_id"),
+        or_(ComputerAssignment.end_date.is_(None), ComputerAssignment.end_date > _START),
+        or_(_END.is_(None), ComputerAssignment.start_date < _END),
+    )
+    .order_by(ComputerAssignment.start_date)
+    .limit(1)
+)
+_GET_HISTORY = (
+    select(ComputerAssignment)
+    .where(_BY_COMPUTER)
+    .options(joinedload(ComputerAssignment.department))
+    .order_by(ComputerAssignment.start_date)
+)
+
 
 class ComputerAssignmentRepo:
+    async def get_at(
+        self, session: AsyncSession, computer_id: int, at: datetime
+    ) -> ComputerAssignment | None:
+        return await session.scalar(_GET_AT, {"computer_id": computer_id, "at": at})
+
+    async def get_overlapping(
+        self,
+        session: AsyncSession,
+        computer_id: int,
+        start: datetime,
+        end: datetime | None,
+        exclude_id: int = 0,
+    ) -> ComputerAssignment | None:
+        return await session.scalar(
+            _GET_OVERLAPPING,
+            {"computer_id": computer_id, "start": start, "end": end, "exclude_id": exclude_id},
+        )
+
+    async def get_history(
+        self, session: AsyncSession, computer_id: int
+    ) -> list[ComputerAssignment]:
+        return (await session.scalars(_GET_HISTORY, {"computer_id": computer_id})).all()
+
     async def create(self, session: AsyncSession, model: ComputerAssignment) -> ComputerAssignment:
         session.add(model)
         try:
             await session.flush()
         except IntegrityError as err:
             logger.error(f"Integrity error: {err}")
-            raise ValueError("Computer Assignment already exists") from err
+            raise ValueError("Computer Assignment overlaps an existing one") from err
+        except ProgrammingError as err:
+            logger.error(f"Programming error: {err}")
+            raise ValueError("Insufficient permissions") from err
+        except SQLAlchemyError as err:
+            logger.error(f"Generic SQLAlchemy error: {err}")
+            raise ValueError("DB writing error") from err
+        return model
+
+    async def close(
+        self, session: AsyncSession, model: ComputerAssignment, end_date: datetime
+    ) -> ComputerAssignment:
+        model.end_date = end_date
+        try:
+            await session.flush()
         except ProgrammingError as err:
             logger.error(f"Programming error: {err}")
             raise ValueError("Insufficient permissions") from err
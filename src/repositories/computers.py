@@ -1,38 +1,81 @@
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from sqlalchemy.exc import IntegrityError, ProgrammingError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from src.enums import ComputerType
+from src.fieldsets import FieldSet, Projection, SparseField
+from src.filters import EQ, IN, PREFIX, RANGE, FilterField, FilterSpec, ListQuery, parse_datetime
 from src.logger import get_logger
 from src.models import Computer, ComputerAssignment, Installation, License, Software
 
 
 logger = get_logger()
 
+_FIELDS = FieldSet(
+    {
+        "computer_id": SparseField(columns=(Computer.computer_id,)),
+        "inventory_number": SparseField(columns=(Computer.inventory_number,)),
+        "computer_type": SparseField(columns=(Computer.computer_type,)),
+        "purchase_date": SparseField(columns=(Computer.purchase_date,)),
+        "status": SparseField(columns=(Computer.status,)),
+        "assigned_dept": SparseField(
+            loaders=(
+                joinedload(Computer.assignment)
+                .load_only(ComputerAssignment.dept_id)
+                .subqueryload(ComputerAssignment.department),
+            )
+        ),
+    },
+    primary_key=Computer.computer_id,
+)
+_SELECT = select(Computer)
+_GET_ALL = _FIELDS.all.apply(_SELECT)
+_GET_BY_ID = select(Computer).where(Computer.computer_id == bindparam("computer_id"))
+_LOCK = _GET_BY_ID.with_for_update()
+_GET_SOFTWARE = _GET_BY_ID.options(
+    joinedload(Computer.installations)
+    .subqueryload(Installation.license)
+    .subqueryload(License.software)
+    .subqueryload(Software.sw_type)
+)
+
 
 class ComputerRepo:
-    async def get_all(self, session: AsyncSession) -> list[Computer]:
-        query = select(Computer).options(
-            joinedload(Computer.assignment).subqueryload(ComputerAssignment.department)
-        )
-        return (await session.scalars(query)).unique().all()
+    filters = FilterSpec(
+        {
+            "computer_id": FilterField(Computer.computer_id, int),
+            "inventory_number": FilterField(
+                Computer.inventory_number, ops=frozenset({EQ, IN, PREFIX})
+            ),
+            "computer_type": FilterField(Computer.computer_type, ComputerType),
+            "status": FilterField(Computer.status),
+            "purchase_date": FilterField(
+                Computer.purchase_date, parse_datetime, frozenset({EQ, RANGE})
+            ),
+            "dept_id": FilterField(ComputerAssignment.dept_id, int, via=Computer.assignment),
+        },
+        tiebreaker=Computer.computer_id,
+    )
+    fields = _FIELDS
+
+    async def get_all(
+        self,
+        session: AsyncSession,
+        query: ListQuery = ListQuery(),
+        projection: Projection = _FIELDS.all,
+    ) -> list[Computer]:
+        statement = _GET_ALL if projection is _FIELDS.all else projection.apply(_SELECT)
+        return (await session.scalars(query.apply(statement))).unique().all()
 
     async def get_by_id(self, session: AsyncSession, computer_id: int) -> Computer:
-        query = select(Computer).where(Computer.computer_id == computer_id)
-        return await session.scalar(query)
+        return await session.scalar(_GET_BY_ID, {"computer_id": computer_id})
+
+    async def lock(self, session: AsyncSession, computer_id: int) -> Computer:
+        return await session.scalar(_LOCK, {"computer_id": computer_id})
 
     async def get_software(self, session: AsyncSession, computer_id: int) -> Computer:
-        query = (
-            select(Computer)
-            .where(Computer.computer_id == computer_id)
-            .options(
-                joinedload(Computer.installations)
-                .subqueryload(Installation.license)
-                .subqueryload(License.software)
-                .subqueryload(Software.sw_type)
-            )
-        )
-        return await session.scalar(query)
+        return await session.scalar(_GET_SOFTWARE, {"computer_id": computer_id})
 
     async def create(self, session: AsyncSession, model: Computer) -> Computer:
         session.add(model)
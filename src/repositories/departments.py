@@ -1,59 +1,72 @@
+from collections.abc import AsyncIterator
 from datetime import datetime
 
-from sqlalchemy import and_, or_, select
+from sqlalchemy import Row, bindparam, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import contains_eager, joinedload
 
+from src.dialects import TZDateTime
 from src.logger import get_logger
 from src.models import Computer, ComputerAssignment, Department, Installation, License, Software
 
 
 logger = get_logger()
 
+_GET_ALL = select(Department)
+_GET_BY_ID = select(Department).where(Department.dept_id == bindparam("dept_id"))
+_GET_WITH_ASSIGNMENTS = (
+    select(Department)
+    .join(Department.assignments)
+    .where(ComputerAssignment.period.contains(bindparam("date", type_=TZDateTime())))
+    .options(contains_eager(Department.assignments))
+    .order_by(Department.dept_code)
+)
+_STREAM_ASSIGNMENT_COUNTS = (
+    select(
+        Department.dept_id,
+        Department.dept_code,
+        Department.dept_name,
+        Department.dept_short_name,
+        func.count(ComputerAssignment.assignment_id).label("total_computers"),
+    )
+    .join(Department.assignments)
+    .where(ComputerAssignment.period.contains(bindparam("date", type_=TZDateTime())))
+    .group_by(Department.dept_id)
+    .order_by(Department.dept_code)
+    .execution_options(yield_per=1000)
+)
+_GET_COMPUTERS = _GET_BY_ID.options(
+    joinedload(Department.current_assignments).subqueryload(ComputerAssignment.computer)
+)
+_GET_BY_ID_WITH_SOFTWARE = _GET_BY_ID.options(
+    joinedload(Department.current_assignments)
+    .subqueryload(ComputerAssignment.computer)
+    .subqueryload(Computer.installations)
+    .subqueryload(Installation.license)
+    .subqueryload(License.software)
+    .subqueryload(Software.sw_type)
+)
+
 
 class DepartmentRepo:
     async def get_all(self, session: AsyncSession) -> list[Department]:
-        query = select(Department)
-        return (await session.scalars(query)).all()
+        return (await session.scalars(_GET_ALL)).all()
 
     async def get_by_id(self, session: AsyncSession, dept_id: int) -> Department:
-        query = select(Department).where(Department.dept_id == dept_id)
-        return await session.scalar(query)
+        return await session.scalar(_GET_BY_ID, {"dept_id": dept_id})
 
     async def get_with_assignments(self, session: AsyncSession, date: datetime) -> list[Department]:
-        query = (
-            select(Department)
-            .join(Department.assignments)
-            .where(
-                and_(
-                    ComputerAssignment.start_date <= date,
-                    or_(ComputerAssignment.end_date.is_(None), ComputerAssignment.end_date >= date),
-                )
-            )
-            .options(joinedload(Department.assignments))
-            .order_by(Department.dept_code)
-        )
-        return (await session.scalars(query)).unique().all()
+        return (await session.scalars(_GET_WITH_ASSIGNMENTS, {"date": date})).unique().all()
+
+    async def stream_assignment_counts(
+        self, session: AsyncSession, date: datetime
+    ) -> AsyncIterator[Row]:
+        result = await session.stream(_STREAM_ASSIGNMENT_COUNTS, {"date": date})
+        async for row in result:
+            yield row
 
     async def get_computers(self, session: AsyncSession, dept_id: int) -> Department:
-        query = (
-            select(Department)
-            .where(Department.dept_id == dept_id)
-            .options(joinedload(Department.assignments).subqueryload(ComputerAssignment.computer))
-        )
-        return await session.scalar(query)
+        return await session.scalar(_GET_COMPUTERS, {"dept_id": dept_id})
 
     async def get_by_id_with_software(self, session: AsyncSession, dept_id: int) -> Department:
-        query = (
-            select(Department)
-            .where(Department.dept_id == dept_id)
-            .options(
-                joinedload(Department.assignments)
-                .subqueryload(ComputerAssignment.computer)
-                .subqueryload(Computer.installations)
-                .subqueryload(Installation.license)
-                .subqueryload(License.software)
-                .subqueryload(Software.sw_type)
-            )
-        )
-        return await session.scalar(query)
+        return await session.scalar(_GET_BY_ID_WITH_SOFTWARE, {"dept_id": dept_id})
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, select
+from sqlalchemy.exc import IntegrityError, ProgrammingError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.logger import get_logger
+from src.models import IdempotencyKey
+
+
+logger = get_logger()
+
+_GET = select(IdempotencyKey).where(
+    IdempotencyKey.user_id == bindparam("user_id"), IdempotencyKey.key == bindparam("key")
+)
+_DELETE = delete(IdempotencyKey).where(
+    IdempotencyKey.user_id == bindparam("user_id"), IdempotencyKey.key == bindparam("key")
+)
+_DELETE_EXPIRED = delete(IdempotencyKey).where(IdempotencyKey.created_at < bindparam("before"))
+
+
+class IdempotencyKeyRepo:
+    async def get(self, session: AsyncSession, user_id: int, key: str) -> IdempotencyKey | None:
+        return await session.scalar(_GET, {"user_id": user_id, "key": key})
+
+    async def create(self, session: AsyncSession, model: IdempotencyKey) -> IdempotencyKey:
+        session.add(model)
+        try:
+            await session.flush()
+        except IntegrityError as err:
+            logger.error(f"Integrity error: {err}")
+            raise ValueError("Idempotency key already exists") from err
+        except ProgrammingError as err:
+            logger.error(f"Programming error: {err}")
+            raise ValueError("Insufficient permissions") from err
+        except SQLAlchemyError as err:
+            logger.error(f"Generic SQLAlchemy error: {err}")
+            raise ValueError("DB writing error") from err
+        return model
+
+    async def delete(self, session: AsyncSession, user_id: int, key: str) -> None:
+        await session.execute(_DELETE, {"user_id": user_id, "key": key})
+
+    async def delete_expired(self, session: AsyncSession, before: datetime) -> None:
+        await session.execute(_DELETE_EXPIRED, {"before": before})
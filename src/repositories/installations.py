@@ -1,42 +1,178 @@
+from collections.abc import AsyncIterator
 from datetime import datetime
 
-from sqlalchemy import select
+from sqlalchemy import Integer, Row, bindparam, delete, insert, select
 from sqlalchemy.exc import IntegrityError, ProgrammingError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from src.dialects import ArrayAgg, ArrayOf, Epoch, any_of
+from src.filters import EQ, RANGE, FilterField, FilterSpec, ListQuery, parse_datetime
+from src.loaders import Includes, IncludeSpec
 from src.logger import get_logger
-from src.models import Installation, License, Software
+from src.models import Installation, License, Software, SoftwareType
 
 
 logger = get_logger()
 
+_SELECT = select(Installation)
+_GET_ALL = _SELECT.options(
+    joinedload(Installation.license).subqueryload(License.vendor),
+    joinedload(Installation.license).subqueryload(License.software),
+    joinedload(Installation.computer),
+)
+# Many-to-one joins only, which a server-side cursor can load row by row.
+_STREAM_ALL = _SELECT.options(
+    joinedload(Installation.license).joinedload(License.vendor),
+    joinedload(Installation.license).joinedload(License.software),
+    joinedload(Installation.computer),
+)
+_GET_BY_ID = select(Installation).where(
+    Installation.installation_id == bindparam("installation_id")
+)
+_GET_WITH_SOFTWARE = (
+    select(Installation)
+    .where(Installation.install_date <= bindparam("date"))
+    .options(
+        joinedload(Installation.license)
+        .subqueryload(License.software)
+        .subqueryload(Software.sw_type)
+    )
+)
+
+# Flat rows fetched through a server-side cursor, for reports written out incrementally.
+_STREAM_WITH_SOFTWARE = (
+    select(
+        Installation.install_date,
+        License.start_date.label("license_start_date"),
+        License.end_date.label("license_end_date"),
+        Software.name.label("sw_name"),
+        Software.code.label("sw_code"),
+        SoftwareType.name.label("sw_type"),
+    )
+    .join(Installation.license)
+    .join(License.software)
+    .join(Software.sw_type)
+    .where(Installation.install_date <= bindparam("date"))
+    .order_by(Installation.installation_id)
+    .execution_options(yield_per=1000)
+)
+# Whole columns aggregated into one row of arrays, for vectorized analysis.
+_GET_COLUMNS = select(
+    ArrayAgg(Installation.installation_id).label("installation_id"),
+    ArrayAgg(Installation.license_id).label("license_id"),
+    ArrayAgg(Epoch(Installation.install_date)).label("install_date"),
+).where(Installation.install_date <= bindparam("date"))
+_GET_FOR_COMPUTER = (
+    select(Installation.installation_id, Installation.license_id)
+    .where(Installation.computer_id == bindparam("computer_id"))
+    .order_by(Installation.installation_id)
+)
+_CREATE_MANY = insert(Installation).returning(
+    Installation.installation_id,
+    Installation.license_id,
+    Installation.install_date,
+    sort_by_parameter_order=True,
+)
+_DELETE_BY_IDS = delete(Installation).where(
+    any_of(Installation.installation_id, bindparam("ids", type_=ArrayOf(Integer)))
+)
+
 
 class InstallationRepo:
-    async def get_all(self, session: AsyncSession) -> list[Installation]:
-        query = select(Installation).options(
-            joinedload(Installation.license).subqueryload(License.vendor),
-            joinedload(Installation.license).subqueryload(License.software),
-            joinedload(Installation.computer),
-        )
-        result = await session.scalars(query)
-        return result.unique().all()
+    filters = FilterSpec(
+        {
+            "installation_id": FilterField(Installation.installation_id, int),
+            "computer_id": FilterField(Installation.computer_id, int),
+            "license_id": FilterField(Installation.license_id, int),
+            "install_date": FilterField(
+                Installation.install_date, parse_datetime, frozenset({EQ, RANGE})
+            ),
+        },
+        tiebreaker=Installation.installation_id,
+    )
+    includes = IncludeSpec(
+        Installation,
+        (
+            "license",
+            "license.software",
+            "license.software.sw_type",
+            "license.vendor",
+            "computer",
+            "computer.assignment",
+            "computer.assignment.department",
+        ),
+    )
+
+    async def get_all(
+        self,
+        session: AsyncSession,
+        query: ListQuery = ListQuery(),
+        includes: Includes | None = None,
+    ) -> list[Installation]:
+        if includes is None:
+            result = await session.scalars(query.apply(_GET_ALL))
+            return result.unique().all()
+        models = (await session.scalars(query.apply(_SELECT))).all()
+        await includes.load(session, models)
+        return models
+
+    async def stream_all(
+        self,
+        session: AsyncSession,
+        query: ListQuery = ListQuery(),
+        includes: Includes | None = None,
+    ) -> AsyncIterator[Installation]:
+        statement = _SELECT if includes is not None else _STREAM_ALL
+        statement = query.apply(statement).execution_options(yield_per=1000)
+        result = await session.stream_scalars(statement)
+        async for models in result.partitions():
+            if includes is not None:
+                await includes.load(session, models)
+            for model in models:
+                yield model
 
     async def get_by_id(self, session: AsyncSession, installation_id: int) -> Installation:
-        query = select(Installation).where(Installation.installation_id == installation_id)
-        return await session.scalar(query)
+        return await session.scalar(_GET_BY_ID, {"installation_id": installation_id})
 
     async def get_with_software(self, session: AsyncSession, date: datetime) -> list[Installation]:
-        query = (
-            select(Installation)
-            .where(Installation.install_date <= date)
-            .options(
-                joinedload(Installation.license)
-                .subqueryload(License.software)
-                .subqueryload(Software.sw_type)
-            )
-        )
-        return (await session.scalars(query)).all()
+        return (await session.scalars(_GET_WITH_SOFTWARE, {"date": date})).all()
+
+    async def stream_with_software(
+        self, session: AsyncSession, date: datetime
+    ) -> AsyncIterator[Row]:
+        result = await session.stream(_STREAM_WITH_SOFTWARE, {"date": date})
+        async for row in result:
+            yield row
+
+    async def get_columns(self, session: AsyncSession, date: datetime) -> Row:
+        return (await session.execute(_GET_COLUMNS, {"date": date})).one()
+
+    async def get_for_computer(self, session: AsyncSession, computer_id: int) -> list[Row]:
+        return (await session.execute(_GET_FOR_COMPUTER, {"computer_id": computer_id})).all()
+
+    async def create_many(self, session: AsyncSession, rows: list[dict]) -> list[Row]:
+        try:
+            return (await session.execute(_CREATE_MANY, rows)).all()
+        except IntegrityError as err:
+            logger.error(f"Integrity error: {err}")
+            raise ValueError("Installation already exists") from err
+        except ProgrammingError as err:
+            logger.error(f"Programming error: {err}")
+            raise ValueError("Insufficient permissions") from err
+        except SQLAlchemyError as err:
+            logger.error(f"Generic SQLAlchemy error: {err}")
+            raise ValueError("DB writing error") from err
+
+    async def delete_by_ids(self, session: AsyncSession, ids: list[int]) -> None:
+        try:
+            await session.execute(_DELETE_BY_IDS, {"ids": ids})
+        except ProgrammingError as err:
+            logger.error(f"Programming error: {err}")
+            raise ValueError("Insufficient permissions") from err
+        except SQLAlchemyError as err:
+            logger.error(f"Generic SQLAlchemy error: {err}")
+            raise ValueError("DB writing error") from err
 
     async def create(self, session: AsyncSession, model: Installation) -> Installation:
         session.add(model)
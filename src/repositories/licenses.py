@@ -1,40 +1,119 @@
+from collections.abc import AsyncIterator
 from datetime import datetime
 
-from sqlalchemy import and_, select
+from sqlalchemy import Integer, Row, and_, bindparam, select
 from sqlalchemy.exc import IntegrityError, ProgrammingError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from src.dialects import ArrayAgg, ArrayOf, Epoch, any_of
+from src.fieldsets import FieldSet, Projection, SparseField
+from src.filters import EQ, IN, RANGE, FilterField, FilterSpec, ListQuery, parse_datetime
+from src.loaders import Includes, IncludeSpec
 from src.logger import get_logger
-from src.models import License
+from src.models import License, Software, Vendor
 
 
 logger = get_logger()
 
+_FIELDS = FieldSet(
+    {
+        "license_id": SparseField(columns=(License.license_id,)),
+        "software_id": SparseField(columns=(License.software_id,)),
+        "software_name": SparseField(
+            loaders=(joinedload(License.software).load_only(Software.name),)
+        ),
+        "vendor_id": SparseField(columns=(License.vendor_id,)),
+        "vendor_name": SparseField(loaders=(joinedload(License.vendor).load_only(Vendor.name),)),
+        "start_date": SparseField(columns=(License.start_date,)),
+        "end_date": SparseField(columns=(License.end_date,)),
+        "price_per_unit": SparseField(columns=(License.price_per_unit,)),
+    },
+    primary_key=License.license_id,
+)
+_SELECT = select(License)
+_GET_ALL = _FIELDS.all.apply(_SELECT)
+_GET_LOADED = _SELECT.options(joinedload(License.software), joinedload(License.vendor))
+_GET_BY_ID = _GET_LOADED.where(License.license_id == bindparam("license_id"))
+_GET_EXPIRING = _GET_LOADED.where(
+    and_(License.end_date >= bindparam("start_date"), License.end_date <= bindparam("end_date"))
+).order_by(License.end_date)
+_GET_EXISTING_IDS = select(License.license_id).where(
+    any_of(License.license_id, bindparam("ids", type_=ArrayOf(Integer)))
+)
+# Whole columns aggregated into one row of arrays, for vectorized analysis.
+_GET_COLUMNS = select(
+    ArrayAgg(License.license_id).label("license_id"),
+    ArrayAgg(License.software_id).label("software_id"),
+    ArrayAgg(Epoch(License.start_date)).label("start_date"),
+    ArrayAgg(Epoch(License.end_date)).label("end_date"),
+)
+
 
 class LicenseRepo:
-    async def get_all(self, session: AsyncSession) -> list[License]:
-        query = select(License).options(joinedload(License.software), joinedload(License.vendor))
-        return (await session.scalars(query)).all()
+    filters = FilterSpec(
+        {
+            "license_id": FilterField(License.license_id, int),
+            "software_id": FilterField(License.software_id, int),
+            "vendor_id": FilterField(License.vendor_id, int),
+            "start_date": FilterField(License.start_date, parse_datetime, frozenset({EQ, RANGE})),
+            "end_date": FilterField(License.end_date, parse_datetime, frozenset({EQ, RANGE})),
+            "price_per_unit": FilterField(
+                License.price_per_unit, float, frozenset({EQ, IN, RANGE})
+            ),
+        },
+        tiebreaker=License.license_id,
+    )
+    fields = _FIELDS
+    includes = IncludeSpec(License, ("software", "software.sw_type", "vendor"))
+
+    async def get_all(
+        self,
+        session: AsyncSession,
+        query: ListQuery = ListQuery(),
+        projection: Projection = _FIELDS.all,
+        includes: Includes | None = None,
+    ) -> list[License]:
+        if includes is not None:
+            models = (await session.scalars(query.apply(_SELECT))).all()
+            await includes.load(session, models)
+            return models
+        statement = _GET_ALL if projection is _FIELDS.all else projection.apply(_SELECT)
+        return (await session.scalars(query.apply(statement))).all()
+
+    async def stream_all(
+        self,
+        session: AsyncSession,
+        query: ListQuery = ListQuery(),
+        projection: Projection = _FIELDS.all,
+        includes: Includes | None = None,
+    ) -> AsyncIterator[License]:
+        if includes is not None:
+            statement = _SELECT
+        else:
+            statement = _GET_ALL if projection is _FIELDS.all else projection.apply(_SELECT)
+        statement = query.apply(statement).execution_options(yield_per=1000)
+        result = await session.stream_scalars(statement)
+        async for models in result.partitions():
+            if includes is not None:
+                await includes.load(session, models)
+            for model in models:
+                yield model
 
     async def get_by_id(self, session: AsyncSession, license_id: int) -> License:
-        query = (
-            select(License)
-            .where(License.license_id == license_id)
-            .options(joinedload(License.software), joinedload(License.vendor))
-        )
-        return await session.scalar(query)
+        return await session.scalar(_GET_BY_ID, {"license_id": license_id})
 
     async def get_expiring(
         self, session: AsyncSession, start_date: datetime, end_date: datetime
     ) -> list[License]:
-        query = (
-            select(License)
-            .where(and_(License.end_date >= start_date, License.end_date <= end_date))
-            .options(joinedload(License.software), joinedload(License.vendor))
-            .order_by(License.end_date)
-        )
-        return (await session.scalars(query)).all()
+        params = {"start_date": start_date, "end_date": end_date}
+        return (await session.scalars(_GET_EXPIRING, params)).all()
+
+    async def get_existing_ids(self, session: AsyncSession, ids: list[int]) -> set[int]:
+        return set((await session.scalars(_GET_EXISTING_IDS, {"ids": ids})).all())
+
+    async def get_columns(self, session: AsyncSession) -> Row:
+        return (await session.execute(_GET_COLUMNS)).one()
 
     async def create(self, session: AsyncSession, model: License) -> License:
         session.add(model)
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, select
+from sqlalchemy.exc import IntegrityError, ProgrammingError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.logger import get_logger
+from src.models import RevokedToken
+
+
+logger = get_logger()
+
+_GET_ACTIVE_IDS = select(RevokedToken.token_id).where(RevokedToken.expires_at > bindparam("now"))
+_EXISTS = select(RevokedToken.token_id).where(RevokedToken.token_id == bindparam("token_id"))
+_DELETE_EXPIRED = delete(RevokedToken).where(RevokedToken.expires_at <= bindparam("now"))
+
+
+class RevokedTokenRepo:
+    async def get_active_ids(self, session: AsyncSession, now: datetime) -> list[str]:
+        return (await session.scalars(_GET_ACTIVE_IDS, {"now": now})).all()
+
+    async def exists(self, session: AsyncSession, token_id: str) -> bool:
+        return await session.scalar(_EXISTS, {"token_id": token_id}) is not None
+
+    async def delete_expired(self, session: AsyncSession, now: datetime) -> None:
+        await session.execute(_DELETE_EXPIRED, {"now": now})
+
+    async def create(self, session: AsyncSession, model: RevokedToken) -> RevokedToken:
+        session.add(model)
+        try:
+            await session.flush()
+        except IntegrityError as err:
+            logger.error(f"Integrity error: {err}")
+            raise ValueError("Token already revoked") from err
+        except ProgrammingError as err:
+            logger.error(f"Programming error: {err}")
+            raise ValueError("Insufficient permissions") from err
+        except SQLAlchemyError as err:
+            logger.error(f"Generic SQLAlchemy error: {err}")
+            raise ValueError("DB writing error") from err
+        return model
@@ -0,0 +1,62 @@
+from sqlalchemy import Column, Row, bindparam, desc, literal, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.dialects import Greatest, Similarity
+from src.models import Computer, Software, Vendor
+
+
+_QUERY = bindparam("query")
+_PATTERN = bindparam("pattern")
+_LIMIT = bindparam("limit")
+
+
+def _ranked(kind: str, id_column: Column, label: Column, *columns: Column):
+    # ILIKE keeps matching exact for substrings, while the trigram GIN indexes on every
+    # searched column let the planner serve it with a bitmap index scan.
+    score = Greatest(*(Similarity(column, _QUERY) for column in columns))
+    return (
+        select(
+            literal(kind).label("type"),
+            id_column.label("id"),
+            label.label("label"),
+            score.label("score"),
+        )
+        .where(or_(*(column.ilike(_PATTERN, escape="\\") for column in columns)))
+        .order_by(score.desc())
+        .limit(_LIMIT)
+        .subquery()
+        .select()
+    )
+
+
+_SEARCH = (
+    union_all(
+        _ranked(
+            "computer", Computer.computer_id, Computer.inventory_number, Computer.inventory_number
+        ),
+        _ranked(
+            "software",
+            Software.software_id,
+            Software.name,
+            Software.name,
+            Software.code,
+            Software.manufacturer,
+        ),
+        _ranked("vendor", Vendor.vendor_id, Vendor.name, Vendor.name),
+    )
+    .order_by(desc("score"), "label")
+    .limit(_LIMIT)
+)
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class SearchRepo:
+    async def search(self, session: AsyncSession, query: str, limit: int) -> list[Row]:
+        result = await session.execute(
+            _SEARCH, {"query": query, "pattern": _like_pattern(query), "limit": limit}
+        )
+        return result.all()
@@ -1,35 +1,76 @@
+from collections.abc import AsyncIterator
 from datetime import datetime
 
-from sqlalchemy import and_, select
+from sqlalchemy import Row, and_, bindparam, func, select
 from sqlalchemy.exc import IntegrityError, ProgrammingError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from src.filters import EQ, IN, PREFIX, FilterField, FilterSpec, ListQuery
 from src.logger import get_logger
-from src.models import License, Software
+from src.models import License, Software, SoftwareType
 
 
 logger = get_logger()
 
+_GET_ALL = select(Software).options(joinedload(Software.sw_type))
+_GET_BY_ID = select(Software).where(Software.software_id == bindparam("software_id"))
+_GET_WITH_LICENSES = (
+    select(Software)
+    .join(Software.licenses)
+    .where(and_(License.start_date <= bindparam("date"), License.end_date >= bindparam("date")))
+    .options(joinedload(Software.licenses), joinedload(Software.sw_type))
+    .order_by(Software.code, License.start_date)
+)
+_STREAM_LICENSE_COUNTS = (
+    select(
+        Software.software_id,
+        Software.sw_type_id,
+        SoftwareType.name.label("sw_type_name"),
+        Software.code,
+        Software.name,
+        Software.short_name,
+        Software.manufacturer,
+        func.count(License.license_id).label("total_licenses"),
+    )
+    .join(Software.licenses)
+    .join(Software.sw_type)
+    .where(and_(License.start_date <= bindparam("date"), License.end_date >= bindparam("date")))
+    .group_by(Software.software_id, SoftwareType.sw_type_id)
+    .order_by(Software.code)
+    .execution_options(yield_per=1000)
+)
+
 
 class SoftwareRepo:
-    async def get_all(self, session: AsyncSession) -> list[Software]:
-        query = select(Software).options(joinedload(Software.sw_type))
-        return (await session.scalars(query)).all()
+    filters = FilterSpec(
+        {
+            "software_id": FilterField(Software.software_id, int),
+            "sw_type_id": FilterField(Software.sw_type_id, int),
+            "code": FilterField(Software.code, ops=frozenset({EQ, IN, PREFIX})),
+            "name": FilterField(Software.name, ops=frozenset({EQ, PREFIX})),
+            "manufacturer": FilterField(Software.manufacturer, ops=frozenset({EQ, IN, PREFIX})),
+        },
+        tiebreaker=Software.software_id,
+    )
+
+    async def get_all(
+        self, session: AsyncSession, query: ListQuery = ListQuery()
+    ) -> list[Software]:
+        return (await session.scalars(query.apply(_GET_ALL))).all()
 
     async def get_by_id(self, session: AsyncSession, software_id: int) -> Software:
-        query = select(Software).where(Software.software_id == software_id)
-        return await session.scalar(query)
+        return await session.scalar(_GET_BY_ID, {"software_id": software_id})
 
     async def get_with_licenses(self, session: AsyncSession, date: datetime) -> list[Software]:
-        query = (
-            select(Software)
-            .join(Software.licenses)
-            .where(and_(License.start_date <= date, License.end_date >= date))
-            .options(joinedload(Software.licenses), joinedload(Software.sw_type))
-            .order_by(Software.code, License.start_date)
-        )
-        return (await session.scalars(query)).unique().all()
+        return (await session.scalars(_GET_WITH_LICENSES, {"date": date})).unique().all()
+
+    async def stream_license_counts(
+        self, session: AsyncSession, date: datetime
+    ) -> AsyncIterator[Row]:
+        result = await session.stream(_STREAM_LICENSE_COUNTS, {"date": date})
+        async for row in result:
+            yield row
 
     async def create(self, session: AsyncSession, model: Software) -> Software:
         session.add(model)
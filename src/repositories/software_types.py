@@ -1,4 +1,4 @@
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from sqlalchemy.exc import IntegrityError, ProgrammingError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,15 +8,16 @@ from src.models import SoftwareType
 
 logger = get_logger()
 
+_GET_ALL = select(SoftwareType)
+_GET_BY_ID = select(SoftwareType).where(SoftwareType.sw_type_id == bindparam("sw_type_id"))
+
 
 class SoftwareTypeRepo:
     async def get_all(self, session: AsyncSession) -> list[SoftwareType]:
-        query = select(SoftwareType)
-        return (await session.scalars(query)).all()
+        return (await session.scalars(_GET_ALL)).all()
 
     async def get_by_id(self, session: AsyncSession, sw_type_id: int) -> SoftwareType:
-        query = select(SoftwareType).where(SoftwareType.sw_type_id == sw_type_id)
-        return await session.scalar(query)
+        return await session.scalar(_GET_BY_ID, {"sw_type_id": sw_type_id})
 
     async def create(self, session: AsyncSession, model: SoftwareType) -> SoftwareType:
         session.add(model)
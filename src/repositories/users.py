@@ -1,4 +1,4 @@
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from sqlalchemy.exc import IntegrityError, ProgrammingError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,19 +8,20 @@ from src.models import User
 
 logger = get_logger()
 
+_GET_ALL = select(User)
+_GET_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+_GET_BY_ID = select(User).where(User.user_id == bindparam("user_id"))
+
 
 class UserRepo:
     async def get_all(self, session: AsyncSession) -> list[User]:
-        query = select(User)
-        return (await session.scalars(query)).all()
+        return (await session.scalars(_GET_ALL)).all()
 
     async def get_by_username(self, session: AsyncSession, username: str) -> User:
-        query = select(User).where(User.username == username)
-        return await session.scalar(query)
+        return await session.scalar(_GET_BY_USERNAME, {"username": username})
 
     async def get_by_id(self, session: AsyncSession, user_id: int) -> User:
-        query = select(User).where(User.user_id == user_id)
-        return await session.scalar(query)
+        return await session.scalar(_GET_BY_ID, {"user_id": user_id})
 
     async def create(self, session: AsyncSession, model: User) -> User:
         session.add(model)
@@ -1,4 +1,4 @@
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from sqlalchemy.exc import IntegrityError, ProgrammingError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,15 +8,16 @@ from src.models import Vendor
 
 logger = get_logger()
 
+_GET_ALL = select(Vendor)
+_GET_BY_ID = select(Vendor).where(Vendor.vendor_id == bindparam("vendor_id"))
+
 
 class VendorRepo:
     async def get_all(self, session: AsyncSession) -> list[Vendor]:
-        query = select(Vendor)
-        return (await session.scalars(query)).all()
+        return (await session.scalars(_GET_ALL)).all()
 
     async def get_by_id(self, session: AsyncSession, vendor_id: int) -> Vendor:
-        query = select(Vendor).where(Vendor.vendor_id == vendor_id)
-        return await session.scalar(query)
+        return await session.scalar(_GET_BY_ID, {"vendor_id": vendor_id})
 
     async def create(self, session: AsyncSession, model: Vendor) -> Vendor:
         session.add(model)
@@ -0,0 +1,97 @@
+import asyncio
+import math
+from datetime import UTC, datetime
+from hashlib import blake2b
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from settings import Settings
+from src.logger import get_logger
+from src.metrics import record_cache
+from src.repositories.revoked_tokens import RevokedTokenRepo
+
+
+logger = get_logger()
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self._size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def _positions(self, key: str) -> list[int]:
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self._size for i in range(self._hashes)]
+
+
+class RevocationList:
+    """
+    Revoked session and refresh token ids, mirrored from ``revoked_tokens`` into a Bloom
+    filter so the per-request check in ``read_token`` rarely touches the database.
+
+    A miss means the id is not revoked; a hit is confirmed against the table. The filter is
+    rebuilt from the unexpired rows every ``revocation_reload_interval`` seconds, which also
+    picks up revocations made by other workers and keeps memory fixed by its capacity.
+    """
+
+    def __init__(self, settings: Settings, revoked_tokens: RevokedTokenRepo) -> None:
+        self._capacity = settings.revocation_filter_capacity
+        self._error_rate = settings.revocation_filter_error_rate
+        self._reload_interval = settings.revocation_reload_interval
+        self._revoked_tokens = revoked_tokens
+        self._filter = BloomFilter(self._capacity, self._error_rate)
+        self._added_during_reload: list[str] = []
+
+    def add(self, token_id: str) -> None:
+        self._filter.add(token_id)
+        self._added_during_reload.append(token_id)
+
+    def __contains__(self, token_id: str) -> bool:
+        maybe_revoked = token_id in self._filter
+        record_cache("revocation_filter", not maybe_revoked)
+        return maybe_revoked
+
+    async def is_revoked(
+        self, sessionmaker: async_sessionmaker[AsyncSession], token_id: str
+    ) -> bool:
+        if token_id not in self:
+            return False
+        async with sessionmaker() as session:
+            return await self._revoked_tokens.exists(session, token_id)
+
+    async def reload(self, sessionmaker: async_sessionmaker[AsyncSession]) -> None:
+        self._added_during_reload = []
+        now = datetime.now(UTC)
+        async with sessionmaker() as session:
+            await self._revoked_tokens.delete_expired(session, now)
+            token_ids = await self._revoked_tokens.get_active_ids(session, now)
+            await session.commit()
+
+        if len(token_ids) > self._capacity:
+            logger.warning(
+                f"{len(token_ids)} revoked tokens exceed the filter capacity of {self._capacity}"
+            )
+        bloom = BloomFilter(self._capacity, self._error_rate)
+        # Revocations committed while the snapshot was read may be missing from it.
+        for token_id in (*token_ids, *self._added_during_reload):
+            bloom.add(token_id)
+        self._filter = bloom
+
+    async def monitor(self, sessionmaker: async_sessionmaker[AsyncSession]) -> None:
+        while True:
+            await asyncio.sleep(self._reload_interval)
+            try:
+                await self.reload(sessionmaker)
+            except (SQLAlchemyError, OSError) as err:
+                logger.warning(f"Revocation list reload failed: {err}")
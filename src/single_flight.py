@@ -0,0 +1,71 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from functools import partial
+from typing import Any, TypeVar
+
+from fastapi import Request
+
+from src.metrics import record_cache
+
+
+T = TypeVar("T")
+# Runs a load through a flight and returns its rendered result; see SingleFlight.sharing.
+Share = Callable[[Callable[[], Awaitable[Any]]], Awaitable[Any]]
+
+SESSION_TARGET_STATE = "session_target"
+
+
+def request_key(request: Request, token: dict) -> tuple:
+    # A replica may lag the primary, so callers reading different targets must not share.
+    return (
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+        token["role"],
+        request.headers.get("accept", ""),
+        getattr(request.state, SESSION_TARGET_STATE, None),
+    )
+
+
+class SingleFlight:
+    """
+    Share one in-flight load-and-render among concurrent callers with the same key.
+
+    Results are not cached: once the leader finishes, the next caller starts a new flight.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, asyncio.Future] = {}
+
+    async def do(
+        self, key: Hashable, load: Callable[[], Awaitable[Any]], render: Callable[[Any], T]
+    ) -> T:
+        while (flight := self._flights.get(key)) is not None:
+            try:
+                result = await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                continue  # the leader was cancelled, so try to lead a new flight
+            record_cache("single_flight", True)
+            return result
+
+        record_cache("single_flight", False)
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            result = render(await load())
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as err:
+            flight.set_exception(err)
+            flight.exception()  # followers re-raise it; do not report it as unretrieved
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+
+    def sharing(self, key: Hashable, render: Callable[[Any], T]) -> Share:
+        return partial(self.do, key, render=render)
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from time import perf_counter
+
+from greenlet import getcurrent
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.logger import get_logger
+from src.metrics import current_route
+
+
+logger = get_logger()
+
+REPOSITORY_MODULE_PREFIX = "src.repositories."
+UNKNOWN_ORIGIN = "unknown"
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_IN_LIST_RE = re.compile(r"\bIN \((?:\s*(?:\$\d+|\?|%\(\w+\)s)\s*,?)+\)", re.IGNORECASE)
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|(?<![$\w.])\d+(?:\.\d+)?\b")
+
+
+def normalize_sql(statement: str) -> str:
+    normalized = _WHITESPACE_RE.sub(" ", statement).strip()
+    normalized = _IN_LIST_RE.sub("IN (...)", normalized)
+    return _LITERAL_RE.sub("?", normalized)
+
+
+def _redact(parameters):
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, list | tuple):
+        return [_redact(value) for value in parameters]
+    return type(parameters).__name__
+
+
+def _repository_caller() -> str:
+    """
+    Find the repository method that issued the statement.
+
+    Statements run inside SQLAlchemy's greenlet, so the walk continues into the
+    suspended parent greenlet where the awaiting coroutine frames live.
+    """
+    frame = sys._getframe(1)
+    current = getcurrent()
+    while True:
+        while frame is not None:
+            if frame.f_globals.get("__name__", "").startswith(REPOSITORY_MODULE_PREFIX):
+                owner = frame.f_locals.get("self")
+                name = frame.f_code.co_name
+                return f"{type(owner).__name__}.{name}" if owner is not None else name
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return UNKNOWN_ORIGIN
+        frame = current.gr_frame
+
+
+@dataclass
+class SlowQuery:
+    fingerprint: str
+    role: str
+    origin: str
+    route: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_parameters: object = None
+    plan: object = None
+    explain_pending: bool = field(default=False, repr=False)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class SlowQueryLog:
+    def __init__(
+        self, threshold_ms: float, redact_params: bool, explain: bool, max_entries: int
+    ) -> None:
+        self._threshold = threshold_ms / 1000
+        self._redact_params = redact_params
+        self._explain = explain
+        self._max_entries = max_entries
+        self._entries: dict[tuple[str, str], SlowQuery] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def attach(self, engine: AsyncEngine, role: str) -> None:
+        sync_engine = engine.sync_engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _before_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("slow_query_start", []).append(perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _after_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = perf_counter() - conn.info["slow_query_start"].pop()
+            if elapsed >= self._threshold and not statement.startswith(EXPLAIN_PREFIX):
+                self._record(engine, role, statement, parameters, elapsed)
+
+        @event.listens_for(sync_engine, "handle_error")
+        def _on_error(exception_context):
+            conn = exception_context.connection
+            if conn is not None and conn.info.get("slow_query_start"):
+                conn.info["slow_query_start"].pop()
+
+    def top(self, limit: int) -> list[SlowQuery]:
+        return sorted(self._entries.values(), key=lambda e: e.total_ms, reverse=True)[:limit]
+
+    async def drain(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _record(
+        self, engine: AsyncEngine, role: str, statement: str, parameters, elapsed: float
+    ) -> None:
+        fingerprint = normalize_sql(statement)
+        entry = self._entries.get((role, fingerprint))
+        if entry is None:
+            if len(self._entries) >= self._max_entries:
+                cheapest = min(self._entries.values(), key=lambda e: e.total_ms)
+                del self._entries[(cheapest.role, cheapest.fingerprint)]
+            entry = SlowQuery(
+                fingerprint=fingerprint,
+                role=role,
+                origin=_repository_caller(),
+                route=current_route.get(),
+            )
+            self._entries[(role, fingerprint)] = entry
+
+        elapsed_ms = elapsed * 1000
+        entry.calls += 1
+        entry.total_ms += elapsed_ms
+        entry.max_ms = max(entry.max_ms, elapsed_ms)
+        entry.last_parameters = _redact(parameters) if self._redact_params else parameters
+
+        # The captured plan is PostgreSQL's EXPLAIN JSON.
+        if engine.dialect.name == "postgresql" and self._should_explain(entry, statement):
+            entry.explain_pending = True
+            task = asyncio.get_running_loop().create_task(
+                self._capture_plan(engine, entry, statement, parameters)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _should_explain(self, entry: SlowQuery, statement: str) -> bool:
+        return (
+            self._explain
+            and entry.plan is None
+            and not entry.explain_pending
+            and statement.lstrip()[:6].upper() == "SELECT"
+        )
+
+    async def _capture_plan(
+        self, engine: AsyncEngine, entry: SlowQuery, statement: str, parameters
+    ) -> None:
+        try:
+            async with engine.connect() as conn:
+                result = await conn.exec_driver_sql(EXPLAIN_PREFIX + statement, parameters)
+                plan = result.scalar()
+                entry.plan = json.loads(plan) if isinstance(plan, str) else plan
+                await conn.rollback()
+        except SQLAlchemyError as err:
+            logger.warning(f"EXPLAIN capture failed: {err}")
+        finally:
+            entry.explain_pending = False
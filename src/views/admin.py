@@ -1,13 +1,16 @@
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.controllers.admin import AdminController
-from src.dependencies import get_admin_controller, get_rbac_session, read_token
+from src.dependencies import get_admin_controller, get_rbac_session, read_token, require_admin
 from src.enums import UserRole
 
 
-router = APIRouter(prefix="/api", tags=["Admin"])
+router = APIRouter(prefix="/api", tags=["Admin"], dependencies=[Depends(require_admin)])
 
 
 @router.get("/users")
@@ -104,18 +107,47 @@ async def create_software_type(
 @router.get("/auditLogs")
 async def get_audit_logs(
     limit: int = 50,
+    start: datetime | None = None,
+    end: datetime | None = None,
     controller: AdminController = Depends(get_admin_controller),
     session: AsyncSession = Depends(get_rbac_session),
 ) -> Response:
-    models = await controller.get_audit_logs(session, limit)
+    records = await controller.get_audit_logs(session, limit, start, end)
     return JSONResponse(
         content=[
             {
-                "log_id": model.log_id,
-                "user_id": model.user_id,
-                "username": model.user.username,
-                "action": model.action,
-                "action_time": model.action_time.isoformat(),
+                "log_id": record.log_id,
+                "user_id": record.user_id,
+                "username": record.username,
+                "action": record.action,
+                "action_time": record.action_time.isoformat(),
+            }
+            for record in records
+        ],
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.get("/slowQueries")
+async def get_slow_queries(
+    limit: int = 20,
+    controller: AdminController = Depends(get_admin_controller),
+    token: dict = Depends(read_token),
+) -> Response:
+    models = controller.get_slow_queries(token, limit)
+    return JSONResponse(
+        content=[
+            {
+                "fingerprint": model.fingerprint,
+                "role": model.role,
+                "origin": model.origin,
+                "route": model.route,
+                "calls": model.calls,
+                "total_ms": round(model.total_ms, 3),
+                "mean_ms": round(model.mean_ms, 3),
+                "max_ms": round(model.max_ms, 3),
+                "last_parameters": jsonable_encoder(model.last_parameters),
+                "plan": model.plan,
             }
             for model in models
         ],
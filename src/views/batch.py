@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Body, Depends
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.controllers.batch import BatchController, BatchOperation
+from src.dependencies import get_batch_controller, get_rbac_session, read_token
+from src.fieldsets import FIELDS_PARAM, select_fields
+from src.renderers import JSON_MEDIA_TYPE, render_json
+from src.views.fields import (
+    COMPUTER_FIELDS,
+    DEPARTMENT_FIELDS,
+    INSTALLATION_FIELDS,
+    LICENSE_FIELDS,
+    SOFTWARE_FIELDS,
+    SOFTWARE_TYPE_FIELDS,
+    VENDOR_FIELDS,
+)
+
+
+router = APIRouter(prefix="/api", tags=["Batch"])
+
+_OPERATION_FIELDS = {
+    "computers": COMPUTER_FIELDS,
+    "software": SOFTWARE_FIELDS,
+    "softwareTypes": SOFTWARE_TYPE_FIELDS,
+    "vendors": VENDOR_FIELDS,
+    "licenses": LICENSE_FIELDS,
+    "installations": INSTALLATION_FIELDS,
+    "departments": DEPARTMENT_FIELDS,
+    "expiringLicenses": LICENSE_FIELDS,
+}
+
+
+@router.post("/batch")
+async def run_batch(
+    operations: list[BatchOperation] = Body(embed=True),
+    controller: BatchController = Depends(get_batch_controller),
+    session: AsyncSession = Depends(get_rbac_session),
+    token: dict = Depends(read_token),
+) -> Response:
+    results = await controller.run(session, token, operations)
+    content = {}
+    for operation in operations:
+        getters = select_fields(_OPERATION_FIELDS[operation.op], operation.params.get(FIELDS_PARAM))
+        content[operation.result_id] = [
+            {name: get(model) for name, get in getters.items()}
+            for model in results[operation.result_id]
+        ]
+    return Response(content=render_json(content), media_type=JSON_MEDIA_TYPE)
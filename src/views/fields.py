@@ -0,0 +1,110 @@
+# Field name -> getter maps shared by the list views and the batch endpoint.
+
+COMPUTER_FIELDS = {
+    "computer_id": lambda model: model.computer_id,
+    "inventory_number": lambda model: model.inventory_number,
+    "computer_type": lambda model: model.computer_type.value,
+    "purchase_date": lambda model: model.purchase_date,
+    "status": lambda model: model.status,
+    "assigned_dept": lambda model: (
+        {
+            "dept_id": model.assignment.department.dept_id,
+            "dept_name": model.assignment.department.dept_name,
+            "dept_code": model.assignment.department.dept_code,
+            "dept_short_name": model.assignment.department.dept_short_name,
+        }
+        if model.assignment
+        else None
+    ),
+}
+
+
+SOFTWARE_TYPE_FIELDS = {
+    "name": lambda model: model.name,
+    "sw_type_id": lambda model: model.sw_type_id,
+}
+
+
+SOFTWARE_FIELDS = {
+    "software_id": lambda model: model.software_id,
+    "sw_type_id": lambda model: model.sw_type_id,
+    "sw_type_name": lambda model: model.sw_type.name,
+    "code": lambda model: model.code,
+    "name": lambda model: model.name,
+    "short_name": lambda model: model.short_name,
+    "manufacturer": lambda model: model.manufacturer,
+}
+
+
+VENDOR_FIELDS = {
+    "vendor_id": lambda model: model.vendor_id,
+    "name": lambda model: model.name,
+    "address": lambda model: model.address,
+    "phone": lambda model: model.phone,
+    "website": lambda model: model.website,
+}
+
+
+LICENSE_FIELDS = {
+    "license_id": lambda model: model.license_id,
+    "software_id": lambda model: model.software_id,
+    "software_name": lambda model: model.software.name,
+    "vendor_id": lambda model: model.vendor_id,
+    "vendor_name": lambda model: model.vendor.name,
+    "start_date": lambda model: model.start_date,
+    "end_date": lambda model: model.end_date,
+    "price_per_unit": lambda model: model.price_per_unit,
+}
+
+
+INSTALLATION_FIELDS = {
+    "installation_id": lambda model: model.installation_id,
+    "license_id": lambda model: model.license_id,
+    "computer_id": lambda model: model.computer_id,
+    "install_date": lambda model: model.install_date,
+    "license": lambda model: (
+        {
+            "license_id": model.license.license_id,
+            "software_id": model.license.software_id,
+            "software_name": model.license.software.name,
+            "vendor_id": model.license.vendor_id,
+            "vendor_name": model.license.vendor.name,
+            "start_date": model.license.start_date,
+            "end_date": model.license.end_date,
+            "price_per_unit": model.license.price_per_unit,
+        }
+        if model.license
+        else None
+    ),
+    "computer": lambda model: (
+        {
+            "computer_id": model.computer_id,
+            "inventory_number": model.computer.inventory_number,
+            "computer_type": model.computer.computer_type.value,
+            "purchase_date": model.computer.purchase_date,
+            "status": model.computer.status,
+        }
+        if model.computer
+        else None
+    ),
+}
+
+
+# Spreadsheet cells cannot nest, so exports flatten the related license and computer.
+INSTALLATION_EXPORT_FIELDS = {
+    "installation_id": lambda model: model.installation_id,
+    "license_id": lambda model: model.license_id,
+    "computer_id": lambda model: model.computer_id,
+    "install_date": lambda model: model.install_date,
+    "software_name": lambda model: model.license.software.name if model.license else None,
+    "vendor_name": lambda model: model.license.vendor.name if model.license else None,
+    "inventory_number": lambda model: model.computer.inventory_number if model.computer else None,
+}
+
+
+DEPARTMENT_FIELDS = {
+    "dept_id": lambda model: model.dept_id,
+    "dept_name": lambda model: model.dept_name,
+    "dept_code": lambda model: model.dept_code,
+    "dept_short_name": lambda model: model.dept_short_name,
+}
@@ -1,11 +1,11 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Body, Depends, status
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.controllers.login import LoginController
-from src.dependencies import get_login_controller, get_root_session
+from src.dependencies import get_login_controller, get_root_session, read_token
 
 
 router = APIRouter(prefix="/api", tags=["Login"])
@@ -20,3 +20,23 @@ async def login(
 ) -> JSONResponse:
     jwt = await ctrl.login(session, username, password)
     return JSONResponse(content=jwt, status_code=status.HTTP_200_OK)
+
+
+@router.post("/refresh")
+async def refresh(
+    refresh_token: Annotated[str, Body(embed=True, alias="refreshToken")],
+    ctrl: Annotated[LoginController, Depends(get_login_controller)],
+    session: Annotated[AsyncSession, Depends(get_root_session)],
+) -> JSONResponse:
+    jwt = await ctrl.refresh(session, refresh_token)
+    return JSONResponse(content=jwt, status_code=status.HTTP_200_OK)
+
+
+@router.post("/logout")
+async def logout(
+    ctrl: Annotated[LoginController, Depends(get_login_controller)],
+    session: Annotated[AsyncSession, Depends(get_root_session)],
+    token: Annotated[dict, Depends(read_token)],
+) -> Response:
+    await ctrl.logout(session, token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,172 +1,195 @@
+from collections.abc import AsyncIterator, Callable
 from datetime import datetime
+from enum import Enum
+from functools import partial
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Header, Query, Request
 from fastapi import status as st
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.controllers.manager import ManagerController
-from src.dependencies import get_manager_controller, get_rbac_session, read_token
-from src.enums import ComputerType
+from src.controllers.manager import CHANGE_CURSOR_PATTERN, InventoryItem, ManagerController
+from src.database import Database
+from src.dependencies import (
+    get_database,
+    get_idempotency_store,
+    get_manager_controller,
+    get_rbac_session,
+    get_rbac_session_unless_export,
+    get_rbac_stream,
+    get_sharing,
+    read_token,
+)
+from src.enums import ComputerType, ReportJobStatus, ReportKind
+from src.fieldsets import select_fields
+from src.idempotency import IDEMPOTENCY_HEADER, IdempotencyStore, request_fingerprint
+from src.renderers import (
+    EXPORT_MEDIA_TYPES,
+    JSON_MEDIA_TYPE,
+    SPREADSHEET_EXTENSIONS,
+    SPREADSHEET_MEDIA_TYPES,
+    STREAMED_MEDIA_TYPES,
+    negotiate,
+    render_json,
+    render_records,
+    render_rows,
+    stream_export,
+)
+from src.report_jobs import ReportJob
+from src.views.fields import (
+    COMPUTER_FIELDS,
+    INSTALLATION_EXPORT_FIELDS,
+    INSTALLATION_FIELDS,
+    LICENSE_FIELDS,
+    SOFTWARE_FIELDS,
+    SOFTWARE_TYPE_FIELDS,
+    VENDOR_FIELDS,
+)
 
 
 router = APIRouter(prefix="/api", tags=["Manager"])
 
 
+async def _export(
+    stream: Callable,
+    media_type: str,
+    rows: Callable[[AsyncSession], AsyncIterator[dict]],
+    filename: str,
+) -> StreamingResponse:
+    chunks = await stream(lambda session: stream_export(media_type, rows(session)))
+    if media_type not in SPREADSHEET_MEDIA_TYPES:
+        return StreamingResponse(chunks, media_type=media_type)
+    extension = SPREADSHEET_EXTENSIONS[media_type]
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
+
+
 @router.get("/computers")
 async def get_computers(
+    request: Request,
+    fields: str | None = None,
     controller: ManagerController = Depends(get_manager_controller),
     session: AsyncSession = Depends(get_rbac_session),
     token: dict = Depends(read_token),
+    sharing: Callable = Depends(get_sharing),
 ) -> Response:
-    models = await controller.get_all_computers(session, token)
-    return JSONResponse(
-        content=[
-            {
-                "computer_id": model.computer_id,
-                "inventory_number": model.inventory_number,
-                "computer_type": model.computer_type.value,
-                "purchase_date": model.purchase_date.isoformat(),
-                "status": model.status,
-                "assigned_dept": {
-                    "dept_id": model.assignment.department.dept_id,
-                    "dept_name": model.assignment.department.dept_name,
-                    "dept_code": model.assignment.department.dept_code,
-                    "dept_short_name": model.assignment.department.dept_short_name,
-                }
-                if model.assignment
-                else None,
-            }
-            for model in models
-        ],
-        status_code=st.HTTP_200_OK,
+    media_type = negotiate(request.headers.get("accept"))
+    render = partial(render_records, media_type, select_fields(COMPUTER_FIELDS, fields))
+    body = await controller.get_all_computers(
+        session, token, request.query_params.multi_items(), fields, sharing(render)
     )
+    return Response(content=body, media_type=media_type)
 
 
 @router.get("/softwareTypes")
 async def get_software_types(
+    request: Request,
     controller: ManagerController = Depends(get_manager_controller),
     session: AsyncSession = Depends(get_rbac_session),
     token: dict = Depends(read_token),
+    sharing: Callable = Depends(get_sharing),
 ) -> Response:
-    models = await controller.get_all_sw_types(session, token)
-    return JSONResponse(
-        content=[{"name": model.name, "sw_type_id": model.sw_type_id} for model in models],
-        status_code=st.HTTP_200_OK,
-    )
+    media_type = negotiate(request.headers.get("accept"))
+    render = partial(render_records, media_type, SOFTWARE_TYPE_FIELDS)
+    body = await controller.get_all_sw_types(session, token, sharing(render))
+    return Response(content=body, media_type=media_type)
 
 
 @router.get("/software")
 async def get_software(
+    request: Request,
     controller: ManagerController = Depends(get_manager_controller),
     session: AsyncSession = Depends(get_rbac_session),
     token: dict = Depends(read_token),
+    sharing: Callable = Depends(get_sharing),
 ) -> Response:
-    models = await controller.get_all_software(session, token)
-    return JSONResponse(
-        content=[
-            {
-                "software_id": model.software_id,
-                "sw_type_id": model.sw_type_id,
-                "sw_type_name": model.sw_type.name,
-                "code": model.code,
-                "name": model.name,
-                "short_name": model.short_name,
-                "manufacturer": model.manufacturer,
-            }
-            for model in models
-        ],
-        status_code=st.HTTP_200_OK,
+    media_type = negotiate(request.headers.get("accept"))
+    render = partial(render_records, media_type, SOFTWARE_FIELDS)
+    body = await controller.get_all_software(
+        session, token, request.query_params.multi_items(), sharing(render)
     )
+    return Response(content=body, media_type=media_type)
 
 
 @router.get("/vendors")
 async def get_vendors(
+    request: Request,
     controller: ManagerController = Depends(get_manager_controller),
     session: AsyncSession = Depends(get_rbac_session),
     token: dict = Depends(read_token),
+    sharing: Callable = Depends(get_sharing),
 ) -> Response:
-    models = await controller.get_all_vendors(session, token)
-    return JSONResponse(
-        content=[
-            {
-                "vendor_id": model.vendor_id,
-                "name": model.name,
-                "address": model.address,
-                "phone": model.phone,
-                "website": model.website,
-            }
-            for model in models
-        ],
-        status_code=st.HTTP_200_OK,
-    )
+    media_type = negotiate(request.headers.get("accept"))
+    render = partial(render_records, media_type, VENDOR_FIELDS)
+    body = await controller.get_all_vendors(session, token, sharing(render))
+    return Response(content=body, media_type=media_type)
 
 
 @router.get("/licenses")
 async def get_licenses(
+    request: Request,
+    fields: str | None = None,
+    include: str | None = None,
     controller: ManagerController = Depends(get_manager_controller),
-    session: AsyncSession = Depends(get_rbac_session),
+    session: AsyncSession | None = Depends(get_rbac_session_unless_export),
+    stream: Callable = Depends(get_rbac_stream),
     token: dict = Depends(read_token),
+    sharing: Callable = Depends(get_sharing),
 ) -> Response:
-    models = await controller.get_all_licenses(session, token)
-    return JSONResponse(
-        content=[
-            {
-                "license_id": model.license_id,
-                "software_id": model.software_id,
-                "software_name": model.software.name,
-                "vendor_id": model.vendor_id,
-                "vendor_name": model.vendor.name,
-                "start_date": model.start_date.isoformat(),
-                "end_date": model.end_date.isoformat(),
-                "price_per_unit": model.price_per_unit,
-            }
-            for model in models
-        ],
-        status_code=st.HTTP_200_OK,
+    media_type = negotiate(request.headers.get("accept"), EXPORT_MEDIA_TYPES)
+    includes = controller.license_includes(include, flat=media_type in SPREADSHEET_MEDIA_TYPES)
+    getters = includes.getters() if includes else select_fields(LICENSE_FIELDS, fields)
+    if media_type in STREAMED_MEDIA_TYPES:
+        rows = partial(
+            controller.export_licenses,
+            token=token,
+            params=request.query_params.multi_items(),
+            fields=fields,
+            includes=includes,
+            getters=getters,
+        )
+        return await _export(stream, media_type, rows, "licenses")
+    render = partial(render_records, media_type, getters)
+    body = await controller.get_all_licenses(
+        session, token, request.query_params.multi_items(), fields, includes, sharing(render)
     )
+    return Response(content=body, media_type=media_type)
 
 
 @router.get("/installations")
 async def get_installations(
+    request: Request,
+    include: str | None = None,
     controller: ManagerController = Depends(get_manager_controller),
-    session: AsyncSession = Depends(get_rbac_session),
+    session: AsyncSession | None = Depends(get_rbac_session_unless_export),
+    stream: Callable = Depends(get_rbac_stream),
     token: dict = Depends(read_token),
+    sharing: Callable = Depends(get_sharing),
 ) -> Response:
-    models = await controller.get_all_installations(session, token)
-    return JSONResponse(
-        content=[
-            {
-                "installation_id": model.installation_id,
-                "license_id": model.license_id,
-                "computer_id": model.computer_id,
-                "install_date": model.install_date.isoformat(),
-                "license": {
-                    "license_id": model.license.license_id,
-                    "software_id": model.license.software_id,
-                    "software_name": model.license.software.name,
-                    "vendor_id": model.license.vendor_id,
-                    "vendor_name": model.license.vendor.name,
-                    "start_date": model.license.start_date.isoformat(),
-                    "end_date": model.license.end_date.isoformat(),
-                    "price_per_unit": model.license.price_per_unit,
-                }
-                if model.license
-                else None,
-                "computer": {
-                    "computer_id": model.computer_id,
-                    "inventory_number": model.computer.inventory_number,
-                    "computer_type": model.computer.computer_type.value,
-                    "purchase_date": model.computer.purchase_date.isoformat(),
-                    "status": model.computer.status,
-                }
-                if model.computer
-                else None,
-            }
-            for model in models
-        ],
-        status_code=st.HTTP_200_OK,
+    media_type = negotiate(request.headers.get("accept"), EXPORT_MEDIA_TYPES)
+    spreadsheet = media_type in SPREADSHEET_MEDIA_TYPES
+    includes = controller.installation_includes(include, flat=spreadsheet)
+    if spreadsheet:
+        getters = INSTALLATION_EXPORT_FIELDS
+    else:
+        getters = includes.getters() if includes else INSTALLATION_FIELDS
+    if media_type in STREAMED_MEDIA_TYPES:
+        rows = partial(
+            controller.export_installations,
+            token=token,
+            params=request.query_params.multi_items(),
+            includes=includes,
+            getters=getters,
+        )
+        return await _export(stream, media_type, rows, "installations")
+    render = partial(render_records, media_type, getters)
+    body = await controller.get_all_installations(
+        session, token, request.query_params.multi_items(), includes, sharing(render)
     )
+    return Response(content=body, media_type=media_type)
 
 
 @router.post("/computers")
@@ -196,6 +219,7 @@ async def create_computer(
 
 @router.post("/computerAssignments")
 async def create_computer_assignment(
+    request: Request,
     computer_id: int,
     dept_id: int,
     doc_number: str,
@@ -203,25 +227,67 @@ async def create_computer_assignment(
     doc_type: str,
     start_date: datetime,
     end_date: datetime | None = None,
+    idempotency_key: str | None = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255),
+    idempotency: IdempotencyStore = Depends(get_idempotency_store),
     controller: ManagerController = Depends(get_manager_controller),
     session: AsyncSession = Depends(get_rbac_session),
     token: dict = Depends(read_token),
 ) -> Response:
-    model = await controller.create_computer_assignment(
-        session, token, computer_id, dept_id, start_date, end_date, doc_number, doc_date, doc_type
+    async def create() -> Response:
+        model = await controller.create_computer_assignment(
+            session,
+            token,
+            computer_id,
+            dept_id,
+            start_date,
+            end_date,
+            doc_number,
+            doc_date,
+            doc_type,
+        )
+        return JSONResponse(
+            content={
+                "assignment_id": model.assignment_id,
+                "computer_id": model.computer_id,
+                "dept_id": model.dept_id,
+                "start_date": model.start_date.isoformat(),
+                "end_date": model.end_date.isoformat() if model.end_date is not None else None,
+                "doc_number": model.doc_number,
+                "doc_date": model.doc_date.isoformat(),
+                "doc_type": model.doc_type,
+            },
+            status_code=st.HTTP_201_CREATED,
+        )
+
+    return await idempotency.run(
+        token["user_id"], idempotency_key, request_fingerprint(request), create
     )
+
+
+@router.get("/computers/{computer_id}/assignments")
+async def get_computer_assignments(
+    computer_id: int,
+    controller: ManagerController = Depends(get_manager_controller),
+    session: AsyncSession = Depends(get_rbac_session),
+    token: dict = Depends(read_token),
+) -> Response:
+    models = await controller.get_computer_assignments(session, token, computer_id)
     return JSONResponse(
-        content={
-            "assignment_id": model.assignment_id,
-            "computer_id": model.computer_id,
-            "dept_id": model.dept_id,
-            "start_date": model.start_date.isoformat(),
-            "end_date": model.end_date.isoformat() if model.end_date is not None else None,
-            "doc_number": model.doc_number,
-            "doc_date": model.doc_date.isoformat(),
-            "doc_type": model.doc_type,
-        },
-        status_code=st.HTTP_201_CREATED,
+        content=[
+            {
+                "assignment_id": model.assignment_id,
+                "computer_id": model.computer_id,
+                "dept_id": model.dept_id,
+                "dept_name": model.department.dept_name,
+                "start_date": model.start_date.isoformat(),
+                "end_date": model.end_date.isoformat() if model.end_date is not None else None,
+                "doc_number": model.doc_number,
+                "doc_date": model.doc_date.isoformat(),
+                "doc_type": model.doc_type,
+            }
+            for model in models
+        ],
+        status_code=st.HTTP_200_OK,
     )
 
 
@@ -266,77 +332,137 @@ async def create_software(
 
 @router.post("/licenses")
 async def create_license(
+    request: Request,
     software_id: int,
     vendor_id: int,
     start_date: datetime,
     end_date: datetime,
     price_per_unit: float,
+    idempotency_key: str | None = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255),
+    idempotency: IdempotencyStore = Depends(get_idempotency_store),
     controller: ManagerController = Depends(get_manager_controller),
     session: AsyncSession = Depends(get_rbac_session),
     token: dict = Depends(read_token),
 ) -> Response:
-    model = await controller.create_license(
-        session, token, software_id, vendor_id, start_date, end_date, price_per_unit
-    )
-    return JSONResponse(
-        content={
-            "license_id": model.license_id,
-            "software_id": model.software_id,
-            "software_name": model.software.name,
-            "vendor_id": model.vendor_id,
-            "vendor_name": model.vendor.name,
-            "start_date": model.start_date.isoformat(),
-            "end_date": model.end_date.isoformat(),
-            "price_per_unit": model.price_per_unit,
-        },
-        status_code=st.HTTP_201_CREATED,
+    async def create() -> Response:
+        model = await controller.create_license(
+            session, token, software_id, vendor_id, start_date, end_date, price_per_unit
+        )
+        return JSONResponse(
+            content={
+                "license_id": model.license_id,
+                "software_id": model.software_id,
+                "software_name": model.software.name,
+                "vendor_id": model.vendor_id,
+                "vendor_name": model.vendor.name,
+                "start_date": model.start_date.isoformat(),
+                "end_date": model.end_date.isoformat(),
+                "price_per_unit": model.price_per_unit,
+            },
+            status_code=st.HTTP_201_CREATED,
+        )
+
+    return await idempotency.run(
+        token["user_id"], idempotency_key, request_fingerprint(request), create
     )
 
 
 @router.post("/installations")
 async def create_installation(
+    request: Request,
     license_id: int,
     computer_id: int,
     install_date: datetime,
+    idempotency_key: str | None = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255),
+    idempotency: IdempotencyStore = Depends(get_idempotency_store),
     controller: ManagerController = Depends(get_manager_controller),
     session: AsyncSession = Depends(get_rbac_session),
     token: dict = Depends(read_token),
 ) -> Response:
-    model = await controller.create_installation(
-        session, token, license_id, computer_id, install_date
+    async def create() -> Response:
+        model = await controller.create_installation(
+            session, token, license_id, computer_id, install_date
+        )
+        return JSONResponse(
+            content={
+                "installation_id": model.installation_id,
+                "license_id": model.license_id,
+                "computer_id": model.computer_id,
+                "install_date": model.install_date.isoformat(),
+                "license": {
+                    "license_id": model.license.license_id,
+                    "software_id": model.license.software_id,
+                    "software_name": model.license.software.name,
+                    "vendor_id": model.license.vendor_id,
+                    "vendor_name": model.license.vendor.name,
+                    "start_date": model.license.start_date.isoformat(),
+                    "end_date": model.license.end_date.isoformat(),
+                    "price_per_unit": model.license.price_per_unit,
+                }
+                if model.license
+                else None,
+                "computer": {
+                    "computer_id": model.computer_id,
+                    "inventory_number": model.computer.inventory_number,
+                    "computer_type": model.computer.computer_type.value,
+                    "purchase_date": model.computer.purchase_date.isoformat(),
+                    "status": model.computer.status,
+                }
+                if model.computer
+                else None,
+            },
+            status_code=st.HTTP_201_CREATED,
+        )
+
+    return await idempotency.run(
+        token["user_id"], idempotency_key, request_fingerprint(request), create
     )
+
+
+@router.put("/computers/{computer_id}/inventory")
+async def sync_computer_inventory(
+    computer_id: int,
+    licenses: list[InventoryItem] = Body(embed=True),
+    controller: ManagerController = Depends(get_manager_controller),
+    session: AsyncSession = Depends(get_rbac_session),
+    token: dict = Depends(read_token),
+) -> Response:
+    added, removed = await controller.sync_inventory(session, token, computer_id, licenses)
     return JSONResponse(
         content={
-            "installation_id": model.installation_id,
-            "license_id": model.license_id,
-            "computer_id": model.computer_id,
-            "install_date": model.install_date.isoformat(),
-            "license": {
-                "license_id": model.license.license_id,
-                "software_id": model.license.software_id,
-                "software_name": model.license.software.name,
-                "vendor_id": model.license.vendor_id,
-                "vendor_name": model.license.vendor.name,
-                "start_date": model.license.start_date.isoformat(),
-                "end_date": model.license.end_date.isoformat(),
-                "price_per_unit": model.license.price_per_unit,
-            }
-            if model.license
-            else None,
-            "computer": {
-                "computer_id": model.computer_id,
-                "inventory_number": model.computer.inventory_number,
-                "computer_type": model.computer.computer_type.value,
-                "purchase_date": model.computer.purchase_date.isoformat(),
-                "status": model.computer.status,
-            }
-            if model.computer
-            else None,
+            "computer_id": computer_id,
+            "installed": [
+                {
+                    "installation_id": row.installation_id,
+                    "license_id": row.license_id,
+                    "install_date": row.install_date.isoformat(),
+                }
+                for row in added
+            ],
+            "removed": removed,
         },
-        status_code=st.HTTP_201_CREATED,
+        status_code=st.HTTP_200_OK,
     )
 
 
+@router.get("/changes")
+async def get_changes(
+    since: str = Query("0-0", pattern=CHANGE_CURSOR_PATTERN),
+    limit: int = Query(1000, ge=1, le=10_000),
+    controller: ManagerController = Depends(get_manager_controller),
+    session: AsyncSession = Depends(get_rbac_session),
+    token: dict = Depends(read_token),
+) -> Response:
+    content = await controller.get_changes(session, token, since, limit)
+    for change in content["changes"]:
+        if "data" in change:
+            change["data"] = {
+                name: value.value if isinstance(value, Enum) else value
+                for name, value in change["data"].items()
+            }
+    return Response(content=render_json(content), media_type=JSON_MEDIA_TYPE)
+
+
 @router.get("/computers/installedSoftware/{computer_id}")
 async def get_computer_installed_software(
     computer_id: int,
@@ -385,34 +511,139 @@ async def create_vendor(
     )
 
 
+@router.get("/search")
+async def search(
+    q: str = Query(min_length=3, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    controller: ManagerController = Depends(get_manager_controller),
+    session: AsyncSession = Depends(get_rbac_session),
+    token: dict = Depends(read_token),
+) -> Response:
+    rows = await controller.search(session, token, q, limit)
+    return JSONResponse(
+        content=[
+            {"type": row.type, "id": row.id, "label": row.label, "score": row.score} for row in rows
+        ],
+        status_code=st.HTTP_200_OK,
+    )
+
+
 @router.get("/reports/installedSoftware")
 async def generate_report_with_installed_software(
     date: datetime,
+    request: Request,
     controller: ManagerController = Depends(get_manager_controller),
-    session: AsyncSession = Depends(get_rbac_session),
+    session: AsyncSession | None = Depends(get_rbac_session_unless_export),
+    stream: Callable = Depends(get_rbac_stream),
     token: dict = Depends(read_token),
+    sharing: Callable = Depends(get_sharing),
 ) -> Response:
-    data = await controller.gen_installed_sw_report(session, token, date)
-    return JSONResponse(content=data, status_code=st.HTTP_200_OK)
+    media_type = negotiate(request.headers.get("accept"), EXPORT_MEDIA_TYPES)
+    if media_type in STREAMED_MEDIA_TYPES:
+        rows = partial(controller.export_installed_sw_report, token=token, date=date)
+        return await _export(stream, media_type, rows, "installed_software")
+    render = partial(render_rows, media_type)
+    body = await controller.gen_installed_sw_report(session, token, date, sharing(render))
+    return Response(content=body, media_type=media_type)
 
 
 @router.get("/reports/countSoftwareLicenses")
 async def generate_report_with_counted_software_licenses(
     date: datetime,
+    request: Request,
     controller: ManagerController = Depends(get_manager_controller),
-    session: AsyncSession = Depends(get_rbac_session),
+    session: AsyncSession | None = Depends(get_rbac_session_unless_export),
+    stream: Callable = Depends(get_rbac_stream),
     token: dict = Depends(read_token),
+    sharing: Callable = Depends(get_sharing),
 ) -> Response:
-    data = await controller.gen_counted_sw_licenses_report(session, token, date)
-    return JSONResponse(content=data, status_code=st.HTTP_200_OK)
+    media_type = negotiate(request.headers.get("accept"), EXPORT_MEDIA_TYPES)
+    if media_type in STREAMED_MEDIA_TYPES:
+        rows = partial(controller.export_counted_sw_licenses_report, token=token, date=date)
+        return await _export(stream, media_type, rows, "software_licenses")
+    render = partial(render_rows, media_type)
+    body = await controller.gen_counted_sw_licenses_report(session, token, date, sharing(render))
+    return Response(content=body, media_type=media_type)
 
 
 @router.get("/reports/countDepartmentsComputers")
 async def generate_report_with_counted_department_computers(
     date: datetime,
+    request: Request,
+    controller: ManagerController = Depends(get_manager_controller),
+    session: AsyncSession | None = Depends(get_rbac_session_unless_export),
+    stream: Callable = Depends(get_rbac_stream),
+    token: dict = Depends(read_token),
+    sharing: Callable = Depends(get_sharing),
+) -> Response:
+    media_type = negotiate(request.headers.get("accept"), EXPORT_MEDIA_TYPES)
+    if media_type in STREAMED_MEDIA_TYPES:
+        rows = partial(controller.export_counted_depts_comps_report, token=token, date=date)
+        return await _export(stream, media_type, rows, "department_computers")
+    render = partial(render_rows, media_type)
+    body = await controller.gen_counted_depts_comps_report(session, token, date, sharing(render))
+    return Response(content=body, media_type=media_type)
+
+
+@router.get("/reports/licenseCompliance")
+async def generate_license_compliance_report(
+    start: datetime,
+    end: datetime,
+    request: Request,
     controller: ManagerController = Depends(get_manager_controller),
     session: AsyncSession = Depends(get_rbac_session),
     token: dict = Depends(read_token),
+    sharing: Callable = Depends(get_sharing),
+) -> Response:
+    body = await controller.gen_license_compliance_report(
+        session, token, start, end, sharing(render_json)
+    )
+    return Response(content=body, media_type=JSON_MEDIA_TYPE)
+
+
+def _report_job_content(job: ReportJob) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "params": job.params,
+        "status": job.status,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "error": job.error,
+        "result": f"/api/reports/jobs/{job.id}/result"
+        if job.status == ReportJobStatus.done.value
+        else None,
+    }
+
+
+@router.post("/reports/jobs")
+async def create_report_job(
+    kind: ReportKind,
+    date: datetime,
+    controller: ManagerController = Depends(get_manager_controller),
+    db: Database = Depends(get_database),
+    token: dict = Depends(read_token),
+) -> Response:
+    sessionmaker = db.sessionmaker_for(token["role"], token["user_id"], read_only=True)
+    job = controller.submit_report_job(token, kind, date, sessionmaker)
+    return JSONResponse(content=_report_job_content(job), status_code=st.HTTP_202_ACCEPTED)
+
+
+@router.get("/reports/jobs/{job_id}")
+async def get_report_job(
+    job_id: str,
+    controller: ManagerController = Depends(get_manager_controller),
+    token: dict = Depends(read_token),
+) -> Response:
+    job = controller.get_report_job(token, job_id)
+    return JSONResponse(content=_report_job_content(job), status_code=st.HTTP_200_OK)
+
+
+@router.get("/reports/jobs/{job_id}/result")
+async def get_report_job_result(
+    job_id: str,
+    controller: ManagerController = Depends(get_manager_controller),
+    token: dict = Depends(read_token),
 ) -> Response:
-    data = await controller.gen_counted_depts_comps_report(session, token, date)
-    return JSONResponse(content=data, status_code=st.HTTP_200_OK)
+    path = controller.get_report_job_result(token, job_id)
+    return FileResponse(path, media_type=JSON_MEDIA_TYPE)
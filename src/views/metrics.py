@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from src.metrics import CONTENT_TYPE_LATEST, render_latest
+
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    return Response(content=render_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,12 +1,16 @@
+from collections.abc import Callable
 from datetime import datetime
+from functools import partial
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi import status as st
 from fastapi.responses import JSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.controllers.supervisor import SupervisorController
-from src.dependencies import get_rbac_session, get_supervisor_controller, read_token
+from src.dependencies import get_rbac_session, get_sharing, get_supervisor_controller, read_token
+from src.renderers import negotiate, render_records
+from src.views.fields import DEPARTMENT_FIELDS, LICENSE_FIELDS
 
 
 router = APIRouter(prefix="/api", tags=["Supervisor"])
@@ -14,23 +18,16 @@ router = APIRouter(prefix="/api", tags=["Supervisor"])
 
 @router.get("/departments")
 async def get_departments(
+    request: Request,
     controller: SupervisorController = Depends(get_supervisor_controller),
     session: AsyncSession = Depends(get_rbac_session),
     token: dict = Depends(read_token),
+    sharing: Callable = Depends(get_sharing),
 ) -> Response:
-    models = await controller.get_all_depts(session, token)
-    return JSONResponse(
-        content=[
-            {
-                "dept_id": model.dept_id,
-                "dept_name": model.dept_name,
-                "dept_code": model.dept_code,
-                "dept_short_name": model.dept_short_name,
-            }
-            for model in models
-        ],
-        status_code=st.HTTP_200_OK,
-    )
+    media_type = negotiate(request.headers.get("accept"))
+    render = partial(render_records, media_type, DEPARTMENT_FIELDS)
+    body = await controller.get_all_depts(session, token, sharing(render))
+    return Response(content=body, media_type=media_type)
 
 
 @router.get("/departments/installedSoftware/{dept_id}")
@@ -85,24 +82,15 @@ async def get_department_assigned_computers(
 async def get_expiring_licenses(
     start_date: datetime,
     end_date: datetime,
+    request: Request,
     controller: SupervisorController = Depends(get_supervisor_controller),
     session: AsyncSession = Depends(get_rbac_session),
     token: dict = Depends(read_token),
+    sharing: Callable = Depends(get_sharing),
 ) -> Response:
-    models = await controller.get_expiring_licenses(session, token, start_date, end_date)
-    return JSONResponse(
-        content=[
-            {
-                "license_id": model.license_id,
-                "software_id": model.software_id,
-                "software_name": model.software.name,
-                "vendor_id": model.vendor_id,
-                "vendor_name": model.vendor.name,
-                "start_date": model.start_date.isoformat(),
-                "end_date": model.end_date.isoformat(),
-                "price_per_unit": model.price_per_unit,
-            }
-            for model in models
-        ],
-        status_code=st.HTTP_200_OK,
+    media_type = negotiate(request.headers.get("accept"))
+    render = partial(render_records, media_type, LICENSE_FIELDS)
+    body = await controller.get_expiring_licenses(
+        session, token, start_date, end_date, sharing(render)
     )
+    return Response(content=body, media_type=media_type)
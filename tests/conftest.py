@@ -0,0 +1,75 @@
+from collections.abc import AsyncIterator
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from settings import Settings
+from src.app import create_app
+from src.enums import UserRole
+from src.models import User
+
+
+USERS = {role: {"username": role.value, "password": f"{role.value}-password"} for role in UserRole}
+MANAGER = USERS[UserRole.manager]
+
+
+@pytest.fixture
+def settings(tmp_path) -> Settings:
+    return Settings(
+        db_backend="sqlite",
+        sqlite_url=f"sqlite+aiosqlite:///{tmp_path / 'test.db'}",
+        db_echo=False,
+        jwt_secret="test-secret-at-least-32-bytes-long",
+        audit_archive_dir=str(tmp_path / "audit_archive"),
+        report_jobs_dir=str(tmp_path / "report_jobs"),
+    )
+
+
+@pytest.fixture
+def manager_credentials() -> dict[str, str]:
+    return dict(MANAGER)
+
+
+@pytest.fixture
+async def app(settings: Settings) -> AsyncIterator[FastAPI]:
+    app = create_app(settings)
+    async with app.router.lifespan_context(app):
+        async with app.state.db.sessions["root"]() as session:
+            for role, credentials in USERS.items():
+                session.add(
+                    User(
+                        username=credentials["username"],
+                        password=await app.state.passwords.hash(credentials["password"]),
+                        role=role,
+                        full_name=f"Test {role.value.title()}",
+                    )
+                )
+            await session.commit()
+        yield app
+
+
+@pytest.fixture
+async def client(app: FastAPI) -> AsyncIterator[AsyncClient]:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def _login(client: AsyncClient, role: UserRole) -> dict[str, str]:
+    response = await client.get("/api/login", params=USERS[role])
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+@pytest.fixture
+async def manager_headers(client: AsyncClient) -> dict[str, str]:
+    return await _login(client, UserRole.manager)
+
+
+@pytest.fixture
+async def supervisor_headers(client: AsyncClient) -> dict[str, str]:
+    return await _login(client, UserRole.supervisor)
+
+
+@pytest.fixture
+async def admin_headers(client: AsyncClient) -> dict[str, str]:
+    return await _login(client, UserRole.admin)
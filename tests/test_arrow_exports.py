@@ -0,0 +1,86 @@
+from datetime import UTC, datetime
+
+import pyarrow as pa
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from src import renderers
+from src.enums import ComputerType
+from src.models import Computer, Installation, License, Software, SoftwareType, Vendor
+from src.renderers import ARROW_STREAM_MEDIA_TYPE
+
+
+ARROW = {"Accept": ARROW_STREAM_MEDIA_TYPE}
+
+
+@pytest.fixture
+async def installations(app: FastAPI) -> None:
+    async with app.state.db.sessions["root"]() as session:
+        software = Software(
+            sw_type=SoftwareType(name="Office"), code="SW1", name="Suite", manufacturer="Acme"
+        )
+        license = License(
+            software=software,
+            vendor=Vendor(name="Acme", address="1 Main St", phone="555-0100"),
+            start_date=datetime(2024, 1, 1, tzinfo=UTC),
+            end_date=datetime(2025, 1, 1, tzinfo=UTC),
+            price_per_unit=10.0,
+        )
+        session.add_all(
+            Installation(
+                license=license,
+                computer=Computer(
+                    inventory_number=f"PC-{i}",
+                    computer_type=ComputerType.workstation,
+                    purchase_date=datetime(2023, 1, 1, tzinfo=UTC),
+                ),
+                install_date=datetime(2024, 2, i + 1, tzinfo=UTC),
+            )
+            for i in range(5)
+        )
+        await session.commit()
+
+
+async def test_arrow_list_is_streamed_in_record_batches(
+    client: AsyncClient, manager_headers: dict, installations: None, monkeypatch
+) -> None:
+    monkeypatch.setattr(renderers, "ARROW_BATCH_ROWS", 2)
+    response = await client.get("/api/installations", headers={**manager_headers, **ARROW})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == ARROW_STREAM_MEDIA_TYPE
+    assert "content-length" not in response.headers
+
+    batches = list(pa.ipc.open_stream(response.content))
+    assert [batch.num_rows for batch in batches] == [2, 2, 1]
+    table = pa.Table.from_batches(batches)
+    assert table.column("computer_id").to_pylist() == [1, 2, 3, 4, 5]
+    assert {row["vendor_name"] for row in table.column("license").to_pylist()} == {"Acme"}
+
+
+async def test_arrow_export_loads_includes_per_batch(
+    client: AsyncClient, manager_headers: dict, installations: None, monkeypatch
+) -> None:
+    monkeypatch.setattr(renderers, "ARROW_BATCH_ROWS", 2)
+    response = await client.get(
+        "/api/licenses", headers={**manager_headers, **ARROW}, params={"include": "vendor"}
+    )
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("vendor").to_pylist()[0]["name"] == "Acme"
+
+
+async def test_spreadsheet_export_flattens_installations(
+    client: AsyncClient, manager_headers: dict, installations: None
+) -> None:
+    headers = {**manager_headers, "Accept": "text/csv"}
+    response = await client.get("/api/installations", headers=headers)
+    assert response.status_code == 200
+    header, first, *_ = response.text.lstrip("﻿").splitlines()
+    assert header.split(",")[-3:] == ["software_name", "vendor_name", "inventory_number"]
+    assert first.split(",")[-3:] == ["Suite", "Acme", "PC-0"]
+
+    response = await client.get(
+        "/api/installations", headers=headers, params={"include": "license"}
+    )
+    assert response.status_code == 400
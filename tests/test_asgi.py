@@ -0,0 +1,43 @@
+import importlib
+import os
+
+import pytest
+
+from settings import get_settings
+from src.metrics import MULTIPROC_DIR_ENV, record_cache, render_latest
+
+
+@pytest.fixture
+def asgi(monkeypatch, tmp_path):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("JWT_SECRET", "test-secret-at-least-32-bytes-long")
+    monkeypatch.setenv("METRICS_MULTIPROC_DIR", str(tmp_path / "metrics"))
+    # Set first so monkeypatch restores the variable whatever run_prod does with it.
+    monkeypatch.setenv(MULTIPROC_DIR_ENV, "")
+    monkeypatch.delenv(MULTIPROC_DIR_ENV)
+    get_settings.cache_clear()
+    yield importlib.import_module("asgi")
+    get_settings.cache_clear()
+
+
+@pytest.mark.parametrize(("server_workers", "cores"), [(1, 4), (0, 1)])
+def test_single_worker_serves_in_process_metrics(
+    asgi, monkeypatch, server_workers: int, cores: int
+) -> None:
+    monkeypatch.setenv("SERVER_WORKERS", str(server_workers))
+    get_settings.cache_clear()
+    monkeypatch.setattr(asgi, "_available_cores", lambda: cores)
+    served = {}
+
+    def run(app: str, **options) -> None:
+        # uvicorn serves from this process, which imported prometheus_client already.
+        served["workers"] = options["workers"]
+        record_cache("asgi_test", True)
+        served["metrics"] = render_latest().decode()
+
+    monkeypatch.setattr(asgi.uvicorn, "run", run)
+    asgi.run_prod()
+
+    assert served["workers"] == 1
+    assert MULTIPROC_DIR_ENV not in os.environ
+    assert 'cache_requests_total{cache="asgi_test",result="hit"}' in served["metrics"]
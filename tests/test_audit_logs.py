@@ -0,0 +1,32 @@
+from datetime import UTC, datetime
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from src.models import AuditLog
+
+
+async def test_naive_range_bounds_are_taken_as_utc(
+    app: FastAPI, client: AsyncClient, admin_headers: dict
+) -> None:
+    async with app.state.db.sessions["root"]() as session:
+        session.add_all(
+            [
+                AuditLog(
+                    user_id=1, action="archived", action_time=datetime(2024, 1, 5, tzinfo=UTC)
+                ),
+                AuditLog(
+                    user_id=1, action="too old", action_time=datetime(2023, 12, 5, tzinfo=UTC)
+                ),
+            ]
+        )
+        await session.commit()
+    assert await app.state.audit_archive.archive(app.state.db.sessions["root"]) == 2
+
+    response = await client.get(
+        "/api/auditLogs",
+        headers=admin_headers,
+        params={"start": "2024-01-01T00:00:00", "end": "2024-02-01T00:00:00"},
+    )
+    assert response.status_code == 200
+    assert [record["action"] for record in response.json()] == ["archived"]
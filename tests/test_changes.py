@@ -0,0 +1,60 @@
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import delete, update
+
+from src.models import Software, SoftwareType, Vendor
+
+
+async def _feed(client: AsyncClient, headers: dict, limit: int) -> tuple[list[dict], str]:
+    changes, cursor = [], "0-0"
+    while True:
+        response = await client.get(
+            "/api/changes", headers=headers, params={"since": cursor, "limit": limit}
+        )
+        assert response.status_code == 200
+        page = response.json()
+        changes += page["changes"]
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            return changes, cursor
+
+
+async def test_feed_pages_upserts_and_deletes_in_order(
+    app: FastAPI, client: AsyncClient, manager_headers: dict
+) -> None:
+    async with app.state.db.sessions["root"]() as session:
+        acme = Vendor(name="Acme", address="1 Main St", phone="555-0100")
+        globex = Vendor(name="Globex", address="2 Main St", phone="555-0101")
+        session.add_all([acme, globex])
+        await session.flush()
+        session.add(
+            Software(
+                sw_type=SoftwareType(name="Office"), code="SW1", name="Suite", manufacturer="Acme"
+            )
+        )
+        await session.commit()
+        await session.execute(
+            update(Vendor).where(Vendor.vendor_id == acme.vendor_id).values(website="acme.test")
+        )
+        await session.execute(delete(Vendor).where(Vendor.vendor_id == globex.vendor_id))
+        await session.commit()
+
+    changes, cursor = await _feed(client, manager_headers, limit=1)
+
+    assert [(c["table"], c["id"], c["op"]) for c in changes] == [
+        ("software", 1, "upsert"),
+        ("vendors", 1, "upsert"),
+        ("vendors", 2, "delete"),
+    ]
+    assert [c["seq"] for c in changes] == sorted(c["seq"] for c in changes)
+    assert changes[1]["data"]["website"] == "acme.test"
+    assert "updated_seq" not in changes[1]["data"]
+    assert "updated_xid" not in changes[1]["data"]
+
+    response = await client.get("/api/changes", headers=manager_headers, params={"since": cursor})
+    assert response.json() == {"changes": [], "cursor": cursor, "has_more": False}
+
+
+async def test_malformed_cursor_is_rejected(client: AsyncClient, manager_headers: dict) -> None:
+    response = await client.get("/api/changes", headers=manager_headers, params={"since": "12"})
+    assert response.status_code == 422
@@ -0,0 +1,100 @@
+from datetime import UTC, datetime
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from src.enums import ComputerType
+from src.models import Computer, Department
+
+
+@pytest.fixture
+async def computer(app: FastAPI) -> Computer:
+    async with app.state.db.sessions["root"]() as session:
+        computer = Computer(
+            inventory_number="INV0001",
+            computer_type=ComputerType.workstation,
+            purchase_date=datetime(2022, 1, 1, tzinfo=UTC),
+            status="active",
+        )
+        session.add_all(
+            [
+                computer,
+                Department(dept_code="D1", dept_name="First"),
+                Department(dept_code="D2", dept_name="Second"),
+                Department(dept_code="D3", dept_name="Third"),
+            ]
+        )
+        await session.commit()
+        return computer
+
+
+async def assign(
+    client: AsyncClient, headers: dict, dept_id: int, start: str, end: str | None = None
+) -> int:
+    params = {
+        "computer_id": 1,
+        "dept_id": dept_id,
+        "doc_number": f"DOC-{dept_id}",
+        "doc_date": start,
+        "doc_type": "order",
+        "start_date": start,
+    }
+    if end is not None:
+        params["end_date"] = end
+    response = await client.post("/api/computerAssignments", headers=headers, params=params)
+    return response.status_code
+
+
+async def test_reassignment_closes_running_assignment(
+    client: AsyncClient, manager_headers: dict, computer: Computer
+) -> None:
+    assert await assign(client, manager_headers, 1, "2023-01-01T00:00:00Z") == 201
+    assert await assign(client, manager_headers, 2, "2025-01-01T00:00:00Z") == 201
+
+    response = await client.get("/api/computers/1/assignments", headers=manager_headers)
+    periods = [(row["start_date"][:10], row["end_date"]) for row in response.json()]
+    assert sorted(periods) == [("2023-01-01", "2025-01-01T00:00:00+00:00"), ("2025-01-01", None)]
+
+
+async def test_bounded_assignment_inside_running_one_is_rejected(
+    client: AsyncClient, manager_headers: dict, computer: Computer
+) -> None:
+    assert await assign(client, manager_headers, 1, "2023-01-01T00:00:00Z") == 201
+    assert await assign(client, manager_headers, 2, "2025-01-01T00:00:00Z") == 201
+    status = await assign(
+        client, manager_headers, 3, "2023-06-01T00:00:00Z", "2023-07-01T00:00:00Z"
+    )
+    assert status == 409
+
+    response = await client.get(
+        "/api/reports/countDepartmentsComputers",
+        headers=manager_headers,
+        params={"date": "2024-03-01T00:00:00Z"},
+    )
+    assert response.status_code == 200
+    assert [(row["dept_code"], row["total_computers"]) for row in response.json()] == [("D1", 1)]
+
+
+async def test_assignment_overlapping_a_later_one_is_rejected(
+    client: AsyncClient, manager_headers: dict, computer: Computer
+) -> None:
+    assert await assign(client, manager_headers, 1, "2023-01-01T00:00:00Z") == 201
+    assert await assign(client, manager_headers, 2, "2025-01-01T00:00:00Z") == 201
+    assert await assign(client, manager_headers, 3, "2024-01-01T00:00:00Z") == 409
+    status = await assign(client, manager_headers, 3, "2024-01-01T00:00:00", "2025-06-01T00:00:00")
+    assert status == 409
+    assert (
+        await assign(client, manager_headers, 3, "2024-01-01T00:00:00", "2025-01-01T00:00:00")
+        == 201
+    )
+
+    response = await client.get("/api/computers/1/assignments", headers=manager_headers)
+    periods = sorted(
+        (row["start_date"][:10], (row["end_date"] or "")[:10]) for row in response.json()
+    )
+    assert periods == [
+        ("2023-01-01", "2024-01-01"),
+        ("2024-01-01", "2025-01-01"),
+        ("2025-01-01", ""),
+    ]
@@ -0,0 +1,24 @@
+import pytest
+from httpx import AsyncClient
+
+from settings import Settings
+
+
+@pytest.fixture
+def settings(settings: Settings) -> Settings:
+    # One slot per user, so an export holding two of them would be turned away.
+    return settings.model_copy(update={"admission_user_limit": 1})
+
+
+@pytest.mark.parametrize(
+    "path", ["/api/licenses", "/api/reports/installedSoftware?date=2024-01-01T00:00:00Z"]
+)
+async def test_export_takes_one_admission_slot(
+    client: AsyncClient, manager_headers: dict, path: str
+) -> None:
+    response = await client.get(path, headers={**manager_headers, "Accept": "text/csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    response = await client.get(path, headers=manager_headers)
+    assert response.status_code == 200
@@ -0,0 +1,121 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from src.idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER, IdempotencyStore
+from src.models import License, User
+from src.repositories.idempotency_keys import IdempotencyKeyRepo
+
+
+async def _license_params(client: AsyncClient, manager_headers: dict, admin_headers: dict) -> dict:
+    response = await client.post(
+        "/api/softwareTypes", headers=admin_headers, params={"name": "Office"}
+    )
+    software = {
+        "sw_type_id": response.json()["sw_type_id"],
+        "code": "WRD",
+        "name": "Word",
+        "short_name": "Word",
+        "manufacturer": "Acme",
+    }
+    response = await client.post("/api/software", headers=manager_headers, params=software)
+    software_id = response.json()["software_id"]
+    vendor = {"name": "Acme", "address": "1 Main St", "phone": "555-0100"}
+    response = await client.post("/api/vendors", headers=manager_headers, params=vendor)
+    return {
+        "software_id": software_id,
+        "vendor_id": response.json()["vendor_id"],
+        "start_date": "2024-01-01T00:00:00Z",
+        "end_date": "2025-01-01T00:00:00Z",
+        "price_per_unit": 10.0,
+    }
+
+
+async def test_retry_replays_the_stored_response(
+    app: FastAPI, client: AsyncClient, manager_headers: dict, admin_headers: dict
+) -> None:
+    params = await _license_params(client, manager_headers, admin_headers)
+    headers = {**manager_headers, IDEMPOTENCY_HEADER: "license-1"}
+
+    first = await client.post("/api/licenses", headers=headers, params=params)
+    assert first.status_code == 201
+    assert REPLAYED_HEADER not in first.headers
+
+    # Drop the process cache so the retry replays the row another worker would read.
+    app.state.idempotency._cache.clear()
+    retry = await client.post("/api/licenses", headers=headers, params=params)
+    assert retry.status_code == 201
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert retry.json() == first.json()
+
+    other = await client.post(
+        "/api/licenses", headers=headers, params={**params, "price_per_unit": 20.0}
+    )
+    assert other.status_code == 400
+
+    async with app.state.db.sessions["root"]() as session:
+        assert await session.scalar(select(func.count()).select_from(License)) == 1
+
+
+async def _manager_id(app: FastAPI) -> int:
+    async with app.state.db.sessions["root"]() as session:
+        return await session.scalar(select(User.user_id).where(User.username == "manager"))
+
+
+async def test_duplicate_on_another_worker_waits_for_the_first_response(app: FastAPI) -> None:
+    settings = app.state.settings.model_copy(update={"idempotency_poll_seconds": 0.01})
+    sessions = app.state.db.sessions["root"]
+    first_worker = IdempotencyStore(settings, IdempotencyKeyRepo(), sessions)
+    second_worker = IdempotencyStore(settings, IdempotencyKeyRepo(), sessions)
+    user_id = await _manager_id(app)
+    release = asyncio.Event()
+    calls = []
+
+    async def handler() -> Response:
+        calls.append(True)
+        await release.wait()
+        return JSONResponse({"created": len(calls)}, status_code=201)
+
+    first = asyncio.create_task(first_worker.run(user_id, "key", "request", handler))
+    await asyncio.sleep(0.05)
+    second = asyncio.create_task(second_worker.run(user_id, "key", "request", handler))
+    await asyncio.sleep(0.05)
+    assert not second.done()
+
+    release.set()
+    first_response, second_response = await asyncio.gather(first, second)
+    assert calls == [True]
+    assert second_response.status_code == 201
+    assert second_response.body == first_response.body
+    assert second_response.headers[REPLAYED_HEADER] == "true"
+
+
+async def test_duplicate_on_another_worker_runs_after_the_first_fails(app: FastAPI) -> None:
+    settings = app.state.settings.model_copy(update={"idempotency_poll_seconds": 0.01})
+    sessions = app.state.db.sessions["root"]
+    first_worker = IdempotencyStore(settings, IdempotencyKeyRepo(), sessions)
+    second_worker = IdempotencyStore(settings, IdempotencyKeyRepo(), sessions)
+    user_id = await _manager_id(app)
+    release = asyncio.Event()
+
+    async def failing() -> Response:
+        await release.wait()
+        return Response(status_code=409)
+
+    async def succeeding() -> Response:
+        return Response(status_code=201)
+
+    first = asyncio.create_task(first_worker.run(user_id, "key", "request", failing))
+    await asyncio.sleep(0.05)
+    second = asyncio.create_task(second_worker.run(user_id, "key", "request", succeeding))
+    await asyncio.sleep(0.05)
+    assert not second.done()
+
+    release.set()
+    assert (await first).status_code == 409
+    response = await second
+    assert response.status_code == 201
+    assert REPLAYED_HEADER not in response.headers
@@ -0,0 +1,29 @@
+import subprocess
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+IMPORT_BUDGET_SECONDS = 2.0
+
+
+def test_app_import_time_within_budget() -> None:
+    # An empty environment: importing the app must not read settings or open connections.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.app"],
+        cwd=ROOT,
+        env={},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # stderr lines read "import time: self [us] | cumulative | package".
+    cumulative = {
+        name.strip(): int(total)
+        for _, total, name in (
+            line.removeprefix("import time:").split("|")
+            for line in result.stderr.splitlines()
+            if line.startswith("import time:") and "[us]" not in line
+        )
+    }
+    assert cumulative["src.app"] / 1_000_000 < IMPORT_BUDGET_SECONDS
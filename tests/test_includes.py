@@ -0,0 +1,36 @@
+from datetime import UTC, datetime
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from src.models import License, Software, SoftwareType, Vendor
+
+
+async def test_include_payload_leaves_out_bookkeeping_columns(
+    app: FastAPI, client: AsyncClient, manager_headers: dict
+) -> None:
+    async with app.state.db.sessions["root"]() as session:
+        software = Software(
+            sw_type=SoftwareType(name="Office"), code="SW1", name="Suite", manufacturer="Acme"
+        )
+        session.add(
+            License(
+                software=software,
+                vendor=Vendor(name="Acme", address="1 Main St", phone="555-0100"),
+                start_date=datetime(2024, 1, 1, tzinfo=UTC),
+                end_date=datetime(2025, 1, 1, tzinfo=UTC),
+                price_per_unit=10.0,
+            )
+        )
+        await session.commit()
+
+    response = await client.get(
+        "/api/licenses", headers=manager_headers, params={"include": "software.sw_type,vendor"}
+    )
+    assert response.status_code == 200
+    (license,) = response.json()
+    assert "updated_seq" not in license
+    assert "updated_seq" not in license["software"]
+    assert "updated_seq" not in license["vendor"]
+    assert license["vendor"]["name"] == "Acme"
+    assert license["software"]["sw_type"]["name"] == "Office"
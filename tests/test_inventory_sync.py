@@ -0,0 +1,147 @@
+from datetime import UTC, datetime
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from src.enums import ComputerType
+from src.models import AuditLog, Computer, Installation, License, Software, SoftwareType, Vendor
+
+
+START = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+async def _seed(app: FastAPI) -> tuple[int, list[int]]:
+    async with app.state.db.sessions["root"]() as session:
+        computer = Computer(
+            inventory_number="INV-1",
+            computer_type=ComputerType.workstation,
+            purchase_date=START,
+            status="active",
+        )
+        software = Software(
+            sw_type=SoftwareType(name="Office"),
+            code="WRD",
+            name="Word",
+            short_name="Word",
+            manufacturer="Acme",
+        )
+        vendor = Vendor(name="Acme", address="1 Main St", phone="555-0100")
+        licenses = [
+            License(
+                software=software,
+                vendor=vendor,
+                start_date=START,
+                end_date=datetime(2030, 1, 1, tzinfo=UTC),
+                price_per_unit=10.0,
+            )
+            for _ in range(3)
+        ]
+        session.add_all([computer, *licenses])
+        await session.commit()
+        return computer.computer_id, [model.license_id for model in licenses]
+
+
+async def _installed(app: FastAPI, computer_id: int) -> dict[int, int]:
+    async with app.state.db.sessions["root"]() as session:
+        rows = await session.execute(
+            select(Installation.license_id, Installation.installation_id).where(
+                Installation.computer_id == computer_id
+            )
+        )
+        return dict(rows.all())
+
+
+async def _sync(client: AsyncClient, headers: dict, computer_id: int, licenses: list[dict]):
+    return await client.put(
+        f"/api/computers/{computer_id}/inventory", headers=headers, json={"licenses": licenses}
+    )
+
+
+async def test_sync_adds_removes_and_then_is_a_no_op(
+    app: FastAPI, client: AsyncClient, manager_headers: dict
+) -> None:
+    computer_id, (first, second, third) = await _seed(app)
+
+    response = await _sync(
+        client,
+        manager_headers,
+        computer_id,
+        [{"license_id": first}, {"license_id": second, "install_date": "2024-02-01T00:00:00Z"}],
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert sorted(row["license_id"] for row in body["installed"]) == [first, second]
+    assert body["removed"] == []
+    dates = {row["license_id"]: row["install_date"] for row in body["installed"]}
+    assert datetime.fromisoformat(dates[second]) == datetime(2024, 2, 1, tzinfo=UTC)
+    installed = await _installed(app, computer_id)
+
+    response = await _sync(
+        client, manager_headers, computer_id, [{"license_id": second}, {"license_id": third}]
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [row["license_id"] for row in body["installed"]] == [third]
+    assert body["removed"] == [installed[first]]
+    after = await _installed(app, computer_id)
+    assert sorted(after) == [second, third]
+    assert after[second] == installed[second]
+
+    response = await _sync(
+        client, manager_headers, computer_id, [{"license_id": third}, {"license_id": second}]
+    )
+    assert response.json() == {"computer_id": computer_id, "installed": [], "removed": []}
+    assert await _installed(app, computer_id) == after
+
+    async with app.state.db.sessions["root"]() as session:
+        actions = (
+            await session.scalars(
+                select(AuditLog.action)
+                .where(AuditLog.action.like("Inventory synced%"))
+                .order_by(AuditLog.log_id)
+            )
+        ).all()
+    assert actions == [
+        "Inventory synced on INV-1: 2 installed, 0 removed",
+        "Inventory synced on INV-1: 1 installed, 1 removed",
+        "Inventory synced on INV-1: 0 installed, 0 removed",
+    ]
+
+
+async def test_sync_removes_duplicate_installations(
+    app: FastAPI, client: AsyncClient, manager_headers: dict
+) -> None:
+    computer_id, (first, *_) = await _seed(app)
+    async with app.state.db.sessions["root"]() as session:
+        session.add_all(
+            Installation(computer_id=computer_id, license_id=first, install_date=START)
+            for _ in range(2)
+        )
+        await session.commit()
+
+    response = await _sync(client, manager_headers, computer_id, [{"license_id": first}])
+    assert response.status_code == 200
+    assert response.json()["installed"] == []
+    assert len(response.json()["removed"]) == 1
+    assert list(await _installed(app, computer_id)) == [first]
+
+
+async def test_sync_with_unknown_ids_changes_nothing(
+    app: FastAPI, client: AsyncClient, manager_headers: dict
+) -> None:
+    computer_id, (first, *_) = await _seed(app)
+    assert (
+        await _sync(client, manager_headers, computer_id, [{"license_id": first}])
+    ).status_code == 200
+
+    response = await _sync(client, manager_headers, computer_id, [{"license_id": 999}])
+    assert response.status_code == 404
+    assert list(await _installed(app, computer_id)) == [first]
+    assert (await _sync(client, manager_headers, 999, [])).status_code == 404
+
+    too_many = [{"license_id": first}] * (app.state.settings.inventory_max_items + 1)
+    assert (await _sync(client, manager_headers, computer_id, too_many)).status_code == 400
+    async with app.state.db.sessions["root"]() as session:
+        count = select(func.count()).select_from(Installation)
+        assert await session.scalar(count) == 1
@@ -0,0 +1,136 @@
+import random
+from datetime import UTC, datetime, timedelta
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from src.enums import ComputerType
+from src.models import Computer, Installation, License, Software, SoftwareType, Vendor
+
+
+START = datetime(2024, 1, 1, tzinfo=UTC)
+DAYS = 10
+
+
+def _reference(licenses: list[dict], installations: list[dict], start: datetime) -> dict:
+    # Day by day, one installation and license at a time.
+    end = start + timedelta(days=DAYS - 1)
+    by_id = {lcns["license_id"]: lcns for lcns in licenses}
+    counted = [i for i in installations if i["install_date"] <= end]
+    shortfalls = []
+    for day in range(DAYS):
+        at = start + timedelta(days=day)
+        for software_id in sorted({lcns["software_id"] for lcns in licenses}):
+            installed = sum(
+                1
+                for i in counted
+                if by_id[i["license_id"]]["software_id"] == software_id and i["install_date"] <= at
+            )
+            licensed = sum(
+                1
+                for lcns in licenses
+                if lcns["software_id"] == software_id
+                and lcns["start_date"] <= at <= lcns["end_date"]
+            )
+            if installed > licensed:
+                shortfalls.append(
+                    {
+                        "date": at.isoformat(),
+                        "software_id": software_id,
+                        "installed": installed,
+                        "licensed": licensed,
+                    }
+                )
+    expired = [
+        {
+            "installation_id": i["installation_id"],
+            "license_id": i["license_id"],
+            "software_id": by_id[i["license_id"]]["software_id"],
+            "install_date": i["install_date"].isoformat(),
+            "license_end_date": by_id[i["license_id"]]["end_date"].isoformat(),
+        }
+        for i in counted
+        if i["install_date"] > by_id[i["license_id"]]["end_date"]
+    ]
+    return {"shortfalls": shortfalls, "expired_installations": expired}
+
+
+def _moment(rng: random.Random) -> datetime:
+    return START + timedelta(hours=rng.randrange(-5 * 24, (DAYS + 5) * 24))
+
+
+async def test_matches_brute_force_reference(
+    app: FastAPI, client: AsyncClient, manager_headers: dict
+) -> None:
+    rng = random.Random(48)
+    async with app.state.db.sessions["root"]() as session:
+        sw_type = SoftwareType(name="Office")
+        vendor = Vendor(name="Acme", address="1 Main St", phone="555-0100")
+        software = [
+            Software(sw_type=sw_type, code=f"SW{i}", name=f"Suite {i}", manufacturer="Acme")
+            for i in range(3)
+        ]
+        computers = [
+            Computer(
+                inventory_number=f"PC-{i}",
+                computer_type=ComputerType.workstation,
+                purchase_date=START,
+            )
+            for i in range(5)
+        ]
+        licenses = []
+        for _ in range(12):
+            start_date, end_date = sorted((_moment(rng), _moment(rng)))
+            licenses.append(
+                License(
+                    software=rng.choice(software),
+                    vendor=vendor,
+                    start_date=start_date,
+                    end_date=end_date,
+                    price_per_unit=1.0,
+                )
+            )
+        installations = [
+            Installation(
+                license=rng.choice(licenses),
+                computer=rng.choice(computers),
+                install_date=_moment(rng),
+            )
+            for _ in range(60)
+        ]
+        session.add_all(installations)
+        await session.commit()
+        license_rows = [
+            {
+                "license_id": m.license_id,
+                "software_id": m.software_id,
+                "start_date": m.start_date,
+                "end_date": m.end_date,
+            }
+            for m in licenses
+        ]
+        installation_rows = [
+            {
+                "installation_id": m.installation_id,
+                "license_id": m.license_id,
+                "install_date": m.install_date,
+            }
+            for m in installations
+        ]
+
+    expected = _reference(license_rows, installation_rows, START)
+    expected["expired_installations"].sort(key=lambda row: row["installation_id"])
+    assert expected["shortfalls"] and expected["expired_installations"]
+    end = START + timedelta(days=DAYS - 1)
+    # Offsets may be given or left out; a bound without one is taken as UTC.
+    for params in (
+        {"start": START.isoformat(), "end": end.isoformat()},
+        {"start": "2024-01-01T00:00:00", "end": "2024-01-10T00:00:00Z"},
+    ):
+        response = await client.get(
+            "/api/reports/licenseCompliance", headers=manager_headers, params=params
+        )
+        assert response.status_code == 200, response.text
+        report = response.json()
+        report["expired_installations"].sort(key=lambda row: row["installation_id"])
+        assert report == expected
@@ -0,0 +1,110 @@
+import asyncio
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from src.enums import UserRole
+
+
+async def test_unknown_username_costs_a_password_check(
+    app: FastAPI, client: AsyncClient, manager_credentials: dict, monkeypatch
+) -> None:
+    passwords = app.state.passwords
+    checked = []
+    verify = passwords.verify
+
+    async def spy(password: str, hashed: str) -> bool:
+        checked.append(hashed)
+        return await verify(password, hashed)
+
+    monkeypatch.setattr(passwords, "verify", spy)
+    response = await client.get(
+        "/api/login", params={"username": "nobody", "password": manager_credentials["password"]}
+    )
+    assert response.status_code == 403
+    assert checked == [passwords.dummy_hash]
+
+    response = await client.get(
+        "/api/login", params={"username": manager_credentials["username"], "password": "wrong"}
+    )
+    assert response.status_code == 403
+    assert (
+        response.json()
+        == (await client.get("/api/login", params={"username": "nobody", "password": "x"})).json()
+    )
+
+
+async def _refresh(client: AsyncClient, refresh_token: str):
+    return await client.post("/api/refresh", json={"refreshToken": refresh_token})
+
+
+def _bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['token']}"}
+
+
+async def test_reused_refresh_token_revokes_the_session(
+    client: AsyncClient, manager_credentials: dict
+) -> None:
+    tokens = (await client.get("/api/login", params=manager_credentials)).json()
+    response = await _refresh(client, tokens["refreshToken"])
+    assert response.status_code == 200
+    rotated = response.json()
+    assert (await client.get("/api/vendors", headers=_bearer(rotated))).status_code == 200
+
+    assert (await _refresh(client, tokens["refreshToken"])).status_code == 403
+    assert (await _refresh(client, rotated["refreshToken"])).status_code == 403
+    assert (await client.get("/api/vendors", headers=_bearer(rotated))).status_code == 403
+
+
+async def test_concurrent_refreshes_with_one_token_count_as_reuse(
+    client: AsyncClient, manager_credentials: dict
+) -> None:
+    tokens = (await client.get("/api/login", params=manager_credentials)).json()
+    responses = await asyncio.gather(
+        _refresh(client, tokens["refreshToken"]), _refresh(client, tokens["refreshToken"])
+    )
+    assert sorted(response.status_code for response in responses) == [200, 403]
+    winner = next(response.json() for response in responses if response.status_code == 200)
+    assert (await _refresh(client, winner["refreshToken"])).status_code == 403
+
+
+async def test_logout_revokes_access_and_refresh_tokens(
+    client: AsyncClient, manager_credentials: dict
+) -> None:
+    tokens = (await client.get("/api/login", params=manager_credentials)).json()
+    assert (await client.post("/api/logout", headers=_bearer(tokens))).status_code == 204
+    assert (await client.get("/api/vendors", headers=_bearer(tokens))).status_code == 403
+    assert (await _refresh(client, tokens["refreshToken"])).status_code == 403
+
+    other = (await client.get("/api/login", params=manager_credentials)).json()
+    assert (await client.get("/api/vendors", headers=_bearer(other))).status_code == 200
+
+
+async def test_refresh_reloads_the_user(client: AsyncClient, admin_headers: dict) -> None:
+    user = {"username": "clerk", "password": "clerk-password", "full_name": "Clerk"}
+    response = await client.post(
+        "/api/users", headers=admin_headers, params={**user, "role": UserRole.supervisor.value}
+    )
+    user_id = response.json()["user_id"]
+    credentials = {"username": user["username"], "password": user["password"]}
+    tokens = (await client.get("/api/login", params=credentials)).json()
+    assert tokens["role"] == UserRole.supervisor.value
+
+    response = await client.put(
+        f"/api/users/{user_id}",
+        headers=admin_headers,
+        params={
+            "username": user["username"],
+            "full_name": user["full_name"],
+            "role": UserRole.manager.value,
+        },
+    )
+    assert response.status_code == 200
+    response = await _refresh(client, tokens["refreshToken"])
+    assert response.status_code == 200
+    tokens = response.json()
+    assert tokens["role"] == UserRole.manager.value
+    assert (await client.get("/api/vendors", headers=_bearer(tokens))).status_code == 200
+
+    assert (await client.delete(f"/api/users/{user_id}", headers=admin_headers)).status_code == 204
+    assert (await _refresh(client, tokens["refreshToken"])).status_code == 403
@@ -0,0 +1,47 @@
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from src.primary_pins import PRIMARY_PIN_COOKIE
+
+
+async def test_write_pins_reads_to_primary_across_workers(
+    app: FastAPI, client: AsyncClient, manager_headers: dict
+) -> None:
+    db = app.state.db
+    replica_reads = []
+
+    def replica(**kw):
+        replica_reads.append(True)
+        return db.sessions["manager"](**kw)
+
+    # Stand in a replica for the manager role; it reads the same SQLite database.
+    db.replica_sessions["manager"] = replica
+    db._healthy_replicas.add("manager")
+
+    vendor = {"name": "Acme", "address": "1 Main St", "phone": "555-0100"}
+    response = await client.post("/api/vendors", headers=manager_headers, params=vendor)
+    assert response.status_code == 201
+    assert PRIMARY_PIN_COOKIE in response.cookies
+
+    # Another worker never saw the write, so only the cookie can pin the read.
+    db._primary_pins.clear()
+    assert (await client.get("/api/vendors", headers=manager_headers)).status_code == 200
+    assert replica_reads == []
+
+    client.cookies.clear()
+    assert (await client.get("/api/vendors", headers=manager_headers)).status_code == 200
+    assert replica_reads == [True]
+
+
+async def test_reads_and_failed_writes_set_no_pin(
+    app: FastAPI, client: AsyncClient, manager_headers: dict
+) -> None:
+    app.state.db.replica_sessions["manager"] = app.state.db.sessions["manager"]
+    response = await client.get("/api/vendors", headers=manager_headers)
+    assert PRIMARY_PIN_COOKIE not in response.cookies
+    vendor = {"name": "Acme", "address": "1 Main St", "phone": "555-0100"}
+    assert (await client.post("/api/vendors", headers=manager_headers, params=vendor)).is_success
+    client.cookies.clear()
+    response = await client.post("/api/vendors", headers=manager_headers, params=vendor)
+    assert response.status_code == 409
+    assert PRIMARY_PIN_COOKIE not in response.cookies
@@ -0,0 +1,52 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+from settings import Settings
+from src.enums import ReportJobStatus, ReportKind
+from src.report_jobs import JOB_SUFFIX, LOCK_SUFFIX, ReportJobs
+
+
+async def test_identical_submissions_share_one_job_across_workers(settings: Settings) -> None:
+    first_worker, second_worker = ReportJobs(settings), ReportJobs(settings)
+    release = asyncio.Event()
+    kind = next(iter(ReportKind))
+
+    async def produce() -> AsyncIterator[dict]:
+        await release.wait()
+        yield {"row": 1}
+
+    job = first_worker.submit(kind, {"year": "2024"}, "manager", 1, produce)
+    duplicate = second_worker.submit(kind, {"year": "2024"}, "manager", 1, produce)
+    assert duplicate.id == job.id
+    assert len(list(first_worker._directory.glob(f"*{JOB_SUFFIX}"))) == 1
+    (lock,) = first_worker._directory.glob(f"*{LOCK_SUFFIX}")
+    assert lock.read_text() == job.id
+
+    release.set()
+    await asyncio.gather(*first_worker._tasks)
+    assert first_worker.get(job.id).status == ReportJobStatus.done.value
+    assert not lock.exists()
+
+    again = second_worker.submit(kind, {"year": "2024"}, "manager", 1, produce)
+    assert again.id != job.id
+    await asyncio.gather(*second_worker._tasks)
+
+
+async def test_lock_left_by_a_finished_job_is_taken_over(settings: Settings) -> None:
+    jobs = ReportJobs(settings)
+    kind = next(iter(ReportKind))
+
+    async def produce() -> AsyncIterator[dict]:
+        yield {"row": 1}
+
+    job = jobs.submit(kind, {}, "manager", 1, produce)
+    (lock,) = jobs._directory.glob(f"*{LOCK_SUFFIX}")
+    await asyncio.gather(*jobs._tasks)
+    # A worker that died after finishing would leave its lock behind.
+    lock.write_text(job.id)
+
+    replacement = jobs.submit(kind, {}, "manager", 1, produce)
+    assert replacement.id != job.id
+    assert lock.read_text() == replacement.id
+    await asyncio.gather(*jobs._tasks)
+    assert not lock.exists()
@@ -0,0 +1,74 @@
+from datetime import UTC, datetime
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from src.enums import ComputerType
+from src.models import Computer, Software, SoftwareType, Vendor
+
+
+async def _seed(app: FastAPI) -> None:
+    purchased = datetime(2024, 1, 1, tzinfo=UTC)
+    async with app.state.db.sessions["root"]() as session:
+        office = SoftwareType(name="Office")
+        session.add_all(
+            [
+                *(
+                    Computer(
+                        inventory_number=number,
+                        computer_type=ComputerType.workstation,
+                        purchase_date=purchased,
+                        status="active",
+                    )
+                    for number in ("INV-0500", "INV-0501", "50%OFF")
+                ),
+                Software(
+                    sw_type=office,
+                    code="VS22",
+                    name="Visual Studio",
+                    short_name="VS",
+                    manufacturer="Microsoft",
+                ),
+                Vendor(name="Micro Center", address="1 Main St", phone="555-0100"),
+                Vendor(name="Acme", address="2 Main St", phone="555-0101"),
+            ]
+        )
+        await session.commit()
+
+
+async def _search(client: AsyncClient, headers: dict, **params) -> list[tuple[str, str]]:
+    response = await client.get("/api/search", headers=headers, params=params)
+    assert response.status_code == 200
+    return [(row["type"], row["label"]) for row in response.json()]
+
+
+async def test_results_are_typed_and_ranked_by_score(
+    app: FastAPI, client: AsyncClient, manager_headers: dict
+) -> None:
+    await _seed(app)
+    # "micro" covers more of "Microsoft" than of "Micro Center".
+    assert await _search(client, manager_headers, q="micro") == [
+        ("software", "Visual Studio"),
+        ("vendor", "Micro Center"),
+    ]
+    assert await _search(client, manager_headers, q="vs2") == [("software", "Visual Studio")]
+    # Equal scores fall back to the label.
+    assert await _search(client, manager_headers, q="inv-05") == [
+        ("computer", "INV-0500"),
+        ("computer", "INV-0501"),
+    ]
+    assert await _search(client, manager_headers, q="inv-05", limit=1) == [("computer", "INV-0500")]
+    assert await _search(client, manager_headers, q="nothing") == []
+
+
+async def test_like_wildcards_match_literally(
+    app: FastAPI, client: AsyncClient, manager_headers: dict
+) -> None:
+    await _seed(app)
+    assert await _search(client, manager_headers, q="50%") == [("computer", "50%OFF")]
+    assert await _search(client, manager_headers, q="___") == []
+
+
+async def test_short_queries_are_rejected(client: AsyncClient, manager_headers: dict) -> None:
+    response = await client.get("/api/search", headers=manager_headers, params={"q": "in"})
+    assert response.status_code == 422
@@ -0,0 +1,64 @@
+import asyncio
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from src.models import AuditLog
+from src.primary_pins import PRIMARY_PIN_COOKIE
+from src.repositories.vendor import VendorRepo
+
+
+async def test_concurrent_reads_share_one_load_and_audit_each_caller(
+    app: FastAPI, client: AsyncClient, manager_headers: dict, monkeypatch
+) -> None:
+    loads = []
+    release = asyncio.Event()
+    get_all = VendorRepo.get_all
+
+    async def slow_get_all(self, session):
+        loads.append(True)
+        await release.wait()
+        return await get_all(self, session)
+
+    monkeypatch.setattr(VendorRepo, "get_all", slow_get_all)
+    requests = [
+        asyncio.create_task(client.get("/api/vendors", headers=manager_headers)) for _ in range(3)
+    ]
+    while not loads:
+        await asyncio.sleep(0)
+    for _ in range(10):
+        await asyncio.sleep(0)
+    release.set()
+    responses = await asyncio.gather(*requests)
+
+    assert [response.status_code for response in responses] == [200] * 3
+    assert loads == [True]
+    async with app.state.db.sessions["root"]() as session:
+        audited = await session.scalar(
+            select(func.count()).where(AuditLog.action == "All vendors retrieved")
+        )
+    assert audited == 3
+
+
+async def test_primary_and_replica_reads_do_not_share(
+    app: FastAPI, client: AsyncClient, manager_headers: dict, monkeypatch
+) -> None:
+    db = app.state.db
+    # Stand in a replica for the manager role; it reads the same SQLite database.
+    db.replica_sessions["manager"] = lambda **kw: db.sessions["manager"](**kw)
+    db._healthy_replicas.add("manager")
+    keys = []
+    do = app.state.flights.do
+
+    async def spy(key, load, render):
+        keys.append(key)
+        return await do(key, load, render)
+
+    monkeypatch.setattr(app.state.flights, "do", spy)
+    assert (await client.get("/api/vendors", headers=manager_headers)).status_code == 200
+    client.cookies.set(PRIMARY_PIN_COOKIE, "9999999999")
+    assert (await client.get("/api/vendors", headers=manager_headers)).status_code == 200
+
+    assert [key[-1] for key in keys] == ["replica", "primary"]
+    assert keys[0][:-1] == keys[1][:-1]
@@ -0,0 +1,40 @@
+import pytest
+from httpx import AsyncClient
+
+
+async def test_login(client: AsyncClient, manager_credentials: dict[str, str]) -> None:
+    response = await client.get("/api/login", params=manager_credentials)
+    assert response.status_code == 200
+    assert response.json()["role"] == "manager"
+
+    response = await client.get("/api/login", params={**manager_credentials, "password": "wrong"})
+    assert response.status_code == 403
+
+
+async def test_manager_read(client: AsyncClient, manager_headers: dict[str, str]) -> None:
+    response = await client.get("/api/computers", headers=manager_headers)
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+async def test_manager_write(client: AsyncClient, manager_headers: dict[str, str]) -> None:
+    vendor = {"name": "Acme", "address": "1 Main St", "phone": "555-0100"}
+    response = await client.post("/api/vendors", headers=manager_headers, params=vendor)
+    assert response.status_code == 201
+    assert response.json() == {"vendor_id": 1, **vendor, "website": None}
+
+    response = await client.post("/api/vendors", headers=manager_headers, params=vendor)
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize("path", ["/api/users", "/api/auditLogs"])
+async def test_admin_reads_are_admin_only(
+    client: AsyncClient,
+    admin_headers: dict[str, str],
+    manager_headers: dict[str, str],
+    supervisor_headers: dict[str, str],
+    path: str,
+) -> None:
+    assert (await client.get(path, headers=admin_headers)).status_code == 200
+    assert (await client.get(path, headers=manager_headers)).status_code == 403
+    assert (await client.get(path, headers=supervisor_headers)).status_code == 403